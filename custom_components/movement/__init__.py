@@ -13,9 +13,15 @@ from homeassistant.helpers.event import (
 )
 from homeassistant.helpers.typing import ConfigType
 
-from .const import CONF_DEPENDENT_ENTITIES, CONF_TRACKED_ENTITY, DOMAIN
+from .const import (
+    CONF_DEPENDENT_ENTITIES,
+    CONF_SOURCE_ENTITIES,
+    CONF_TRACKED_ENTITY,
+    DOMAIN,
+)
 from .coordinator import MovementUpdateCoordinator
 from .services import async_setup_services
+from .store import HistoryStore
 from .types import MovementConfigEntry, MovementConfigEntryRuntimeData
 
 _LOGGER = logging.getLogger(__name__)
@@ -51,7 +57,10 @@ async def async_setup_entry(hass: HomeAssistant, entry: MovementConfigEntry) ->
     entry.async_on_unload(
         async_track_state_change_event(
             hass,
-            [entry.data[CONF_TRACKED_ENTITY]],
+            [
+                entry.data[CONF_TRACKED_ENTITY],
+                *entry.data.get(CONF_SOURCE_ENTITIES, []),
+            ],
             coordinator.async_handle_entity_state_change,
         ),
     )
@@ -89,10 +98,16 @@ async def async_unload_entry(hass: HomeAssistant, entry: MovementConfigEntry) ->
     if unload_ok:
         coordinator = entry.runtime_data.coordinator
         coordinator.cancel_all_listeners()
+        await coordinator.store.async_flush()
 
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: MovementConfigEntry) -> None:
+    """Remove stored data for a config entry."""
+    await HistoryStore(hass, entry.entry_id).async_remove()
+
+
 async def _async_update_listener(
     hass: HomeAssistant,
     entry: MovementConfigEntry,
@@ -2,7 +2,7 @@
 
 import datetime as dt
 import logging
-import math
+from typing import Final
 
 from homeassistant.util import dt as dt_util
 
@@ -16,13 +16,16 @@ from .const import (
     SPEED_USABLE_DELTA,
     UPDATES_STALLED_DELTA,
 )
+from .distance import DISTANCE_ENGINES
 from .history import HistoryRegistry
+from .kalman import KalmanSpeedFilter
+from .trace import TraceBuffer
 from .transition import TransitionRegistry
 from .types import (
-    ABSENT_NONE,
     AbsentNone,
+    DistanceEngine,
     HistoryEntry,
-    Location,
+    ModeConstraint,
     ModeOfTransit,
     MovementConfigEntry,
     MovementData,
@@ -32,6 +35,7 @@ from .types import (
     StateChangedData,
     StatisticGroup,
     TransitionRequiredCondition,
+    TypedMovementContext,
     TypedMovementData,
     UpdatesStalledIndicator,
 )
@@ -54,6 +58,11 @@ DISTANCE_THRESHOLDS_BEFORE_MODE_CHANGE = {
 }
 
 
+_SPEED_USABLE_SECONDS: Final = SPEED_USABLE_DELTA.total_seconds()
+_SPEED_STALE_SECONDS: Final = SPEED_STALE_DELTA.total_seconds()
+_HISTORY_EXPIRATION_SECONDS: Final = HISTORY_EXPIRATION_DELTA.total_seconds()
+_JUMP_SECONDS: Final = dt.timedelta(minutes=60).total_seconds()
+
 _LOGGER = logging.getLogger(__name__)
 _TRACE = 5
 
@@ -62,6 +71,7 @@ def calculate_distance(
     *,
     update: MovementData,
     history: HistoryRegistry,
+    distance_engine: DistanceEngine = DistanceEngine.HAVERSINE,
 ) -> None:
     """Calculate the distance moved for an update.
 
@@ -72,6 +82,7 @@ def calculate_distance(
         history: The history containing information about prior locations. The
             distance from `prior_entry.location` to `current_entry.location`
             will be calculated.
+        distance_engine: The engine used to calculate distances.
     """
     assert update is not None
 
@@ -91,7 +102,7 @@ def calculate_distance(
     _LOGGER.debug("calculating from: %s -> %s", from_location, to_location)
     assert not isinstance(from_location, AbsentNone)
     assert not isinstance(to_location, AbsentNone)
-    distance = haversine(from_location, to_location)
+    distance = history.distance_cache(DISTANCE_ENGINES[distance_engine]).distance(0)
 
     _LOGGER.debug("distance: %s", distance)
 
@@ -99,11 +110,13 @@ def calculate_distance(
     update.distance = distance
 
 
-def calculate_speed(  # noqa: PLR0914
+def calculate_speed(
     *,
     prior: MovementData,
     update: MovementData,
     history: HistoryRegistry,
+    distance_engine: DistanceEngine = DistanceEngine.HAVERSINE,
+    trace: TraceBuffer | None = None,
 ) -> None:
     """Calculate speed while considering various factors.
 
@@ -111,6 +124,8 @@ def calculate_speed(  # noqa: PLR0914
         prior: The state of data prior to what's currently being calculated.
         update: The update into which calculated update values are stored.
         history: The history containing information about prior locations.
+        distance_engine: The engine used to calculate distances.
+        trace: A trace to record each candidate entry to (if enabled).
 
     Raises:
         TransitionRequiredCondition: If updates have stalled or if GPS accuracy
@@ -196,73 +211,89 @@ def calculate_speed(  # noqa: PLR0914
     _LOGGER.debug("_calculate_speed")
 
     distance = update.distance
-    location = history.current_entry.location
-    accuracy = history.current_entry.accuracy
+    current_entry = history.current_entry
+    accuracy = current_entry.accuracy
 
     # see consideration #1 above
-    current_time = dt_util.utcnow()
-    delta = current_time - history.prior_entry.at
-    has_stalled = prior.mode_of_transit is None and delta > HISTORY_EXPIRATION_DELTA
+    delta = current_entry.seconds_since(history.prior_entry.timestamp)
+    has_stalled = prior.mode_of_transit is None and delta > _HISTORY_EXPIRATION_SECONDS
+
+    # see consideration #3 above. a stationary entry is within the accuracy of
+    # every prior entry, so the search would not find one to use. the movement
+    # is also too small to be a large jump (see consideration #4).
+    if history.stationary and not has_stalled:
+        _LOGGER.debug("  stationary, skipped calculating speed")
+        if trace is not None:
+            trace.record("speed_stationary", delta)
+        raise TransitionRequiredCondition("poor_gps_accuracy")
 
     # see considerations #2 & #3 above
-    accuracy_preventing_calculation = False
-    matched_pair: tuple[float, dt.timedelta] | None = None  # distance, delta
-    still_acceptable_movement = True
-    for index, entry in enumerate(history.prior):
-        assert not isinstance(entry.location, AbsentNone)
-        assert not isinstance(location, AbsentNone)
-
-        delta = current_time - entry.at
-        distance = haversine(entry.location, location)
-        distance_in_meters = distance * 1000
-        accuracy_combined = accuracy + entry.accuracy
-        accuracy_combined = (
-            accuracy_combined
-            if accuracy_combined < HistoryEntry.NO_ACCURACY
-            else distance_in_meters
-        )
-        acceptable_movement = distance_in_meters >= accuracy_combined
-        still_acceptable_movement = still_acceptable_movement and acceptable_movement
+    #
+    # prior entries are ordered by time, so only those that are old enough to
+    # be used & not yet expired need to be considered.
+    distance_cache = history.distance_cache(DISTANCE_ENGINES[distance_engine])
+    prior_entries = history.prior
+    window = history.prior_window(
+        current_entry.timestamp,
+        min_age=_SPEED_USABLE_SECONDS,
+        max_age=_HISTORY_EXPIRATION_SECONDS,
+    )
 
-        delta_min = SPEED_USABLE_DELTA
-        delta_max = (
-            HISTORY_EXPIRATION_DELTA if still_acceptable_movement else SPEED_STALE_DELTA
-        )
-        acceptable_time_lapsed = delta >= delta_min and delta < delta_max
-
-        _LOGGER.debug(
-            "\n"
-            "  [%s]\n"
-            "    delta: %s\n"
-            "    distance_in_meters: %s\n"
-            "    accuracy_combined: %s\n"
-            "    acceptable_movement: %s\n"
-            "    acceptable_time_lapsed: %s",
-            index,
-            delta,
-            distance_in_meters,
-            accuracy_combined,
-            acceptable_movement,
-            acceptable_time_lapsed,
-        )
+    # distances from the candidate entries are calculated up front in one batch
+    # (reusing any already calculated for this update, i.e. the distance from
+    # the prior entry) so the loop below only needs to apply the accuracy &
+    # time gating.
+    distances = distance_cache.get(slice(window.start, window.stop))
+
+    accuracy_preventing_calculation = False
+    matched_pair: tuple[float, float] | None = None  # distance, delta
+    for index, distance in zip(window, distances, strict=True):
+        entry = prior_entries[index]
+        delta = current_entry.seconds_since(entry.timestamp)
+        acceptable_movement = _is_acceptable_movement(distance, accuracy, entry)
+
+        if trace is not None:
+            trace.record(
+                "speed_candidate",
+                index,
+                delta,
+                distance,
+                acceptable_movement,
+            )
+
+        # stale entries can only be used if the movement from every more recent
+        # entry (including those too recent to be used) was also acceptable.
+        # otherwise accuracy is poor, and no older entry will be usable either.
+        if delta >= _SPEED_STALE_SECONDS:
+            if acceptable_movement and all(
+                _is_acceptable_movement(recent_distance, accuracy, recent_entry)
+                for recent_distance, recent_entry in zip(
+                    distance_cache.get(slice(index)),
+                    prior_entries,
+                    strict=False,
+                )
+            ):
+                matched_pair = (distance, delta)
+            break
 
-        if acceptable_time_lapsed and acceptable_movement:
+        if acceptable_movement:
             matched_pair = (distance, delta)
             break
 
     if matched_pair is not None:
         distance, delta = matched_pair
     else:
+        # the oldest entry is used to check for large jumps below
+        distance = distance_cache.distance(-1)
+        delta = current_entry.seconds_since(prior_entries[-1].timestamp)
         accuracy_preventing_calculation = True
 
-    speed = distance / delta.total_seconds() * 3600
+    speed = distance / delta * 3600
 
     _LOGGER.debug("  calculated speed: %s", speed)
 
     # see consideration #4 above
-    clear_speed_related_attrs = (
-        speed > 200 and distance > 250 and delta > dt.timedelta(minutes=60)
-    )
+    clear_speed_related_attrs = speed > 200 and distance > 250 and delta > _JUMP_SECONDS
 
     # final assignment of all output information
     if clear_speed_related_attrs:
@@ -275,6 +306,75 @@ def calculate_speed(  # noqa: PLR0914
         update.speed = speed
 
 
+def calculate_speed_kalman(
+    *,
+    prior: MovementData,
+    update: MovementData,
+    history: HistoryRegistry,
+    speed_filter: KalmanSpeedFilter,
+) -> None:
+    """Calculate speed using a Kalman filter.
+
+    This is an alternative to `calculate_speed` that keeps a constant-size
+    position & velocity state rather than searching through the location
+    history, so the cost of each update is independent of the history size.
+    The history is only replayed to seed the filter when it has no state (i.e.
+    after a restart).
+
+    The same considerations as `calculate_speed` apply:
+
+    1. Stalled updates are detected in exactly the same way.
+    2. Clustered updates are weighted by the filter rather than skipped, but a
+       speed is not used until updates span `SPEED_USABLE_DELTA`.
+    3. Poor GPS accuracy is detected when the estimated speed cannot be
+       distinguished from the uncertainty of the estimate.
+    4. Large jumps after a long delay are detected from the distance & time
+       since the prior entry.
+
+    Args:
+        prior: The state of data prior to what's currently being calculated.
+        update: The update into which calculated update values are stored.
+        history: The history containing information about prior locations.
+        speed_filter: The filter to update with the current location.
+
+    Raises:
+        TransitionRequiredCondition: If updates have stalled or if GPS accuracy
+            is poor.
+    """
+    assert prior is not None
+    assert update is not None
+
+    _LOGGER.debug("_calculate_speed_kalman")
+
+    if not speed_filter.initialized:
+        for entry in reversed(history.prior):
+            speed_filter.add_entry(entry)
+
+    speed_filter.add_entry(history.current_entry)
+
+    # see consideration #1 above
+    delta = history.current_entry.seconds_since(history.prior_entry.timestamp)
+    has_stalled = prior.mode_of_transit is None and delta > _HISTORY_EXPIRATION_SECONDS
+
+    # see consideration #4 above
+    distance = update.distance
+    jump_speed = distance / delta * 3600
+    clear_speed_related_attrs = (
+        jump_speed > 200 and distance > 250 and delta > _JUMP_SECONDS
+    )
+
+    _LOGGER.debug("  calculated speed: %s", speed_filter.speed)
+
+    if clear_speed_related_attrs:
+        update.speed = None
+    else:
+        if has_stalled:
+            raise TransitionRequiredCondition("stalled")
+        if not speed_filter.is_confident:
+            raise TransitionRequiredCondition("poor_gps_accuracy")
+        update.speed = speed_filter.speed
+
+
 def update_or_maintain_mode(
     *,
     prior: MovementData,
@@ -282,6 +382,7 @@ def update_or_maintain_mode(
     statistics: StatisticGroup,
     transition: TransitionRegistry,
     proposed_mode: ModeOfTransit | None,
+    mode_constraint: ModeConstraint = ModeConstraint.MAX,
 ) -> None:
     """Update the mode of transit if shouldn't be maintained at the prior value.
 
@@ -353,6 +454,10 @@ def update_or_maintain_mode(
         transition: The transition containing information about updates that
             could not be processed immediately.
         proposed_mode: Proposed (newly calculated) mode of transit
+        mode_constraint: The recent speed statistic that is combined with the
+            average to constrain the mode. The 95th percentile is less affected
+            than the maximum by a single speed that's too high (i.e. from a jump
+            in location).
 
     Raises:
         TransitionRequiredCondition: If the prior mode of transit should be
@@ -372,10 +477,15 @@ def update_or_maintain_mode(
     elif not proposed_mode:
         maintain = True
     else:
+        speed_recent = (
+            statistics.speed_recent_p95
+            if mode_constraint == ModeConstraint.P95
+            else statistics.speed_recent_max
+        )
         speed_recent_combined_max = max(
             default_0(speed),
             default_0(statistics.speed_recent_avg.value),
-            default_0(statistics.speed_recent_max.value),
+            default_0(speed_recent.value),
         )
         constraint_mode = mode_of_transit_from_speed(speed_recent_combined_max)
 
@@ -397,7 +507,9 @@ def update_or_maintain_mode(
 
     # check that distance threshold has been met when mode is changing
     if not maintain and proposed_mode != prior_mode:
-        transition_distances = sum(item.distance for item in transition.items or [])
+        transition_distances = (
+            transition.pending_distance + transition.finalized_distance
+        )
         threshold = (
             DISTANCE_THRESHOLDS_BEFORE_MODE_CHANGE.get(str(proposed_mode), 0)
             if proposed_mode is not None
@@ -486,62 +598,37 @@ def mode_of_transit_from_speed(speed: float) -> ModeOfTransit:
     )
 
 
-def get_updates_for_typed_movement_sensor(
+def calculate_typed_movement_context(
     *,
-    entity_id: str,
-    type_data: TypedMovementData,
-    mode_type: ModeOfTransit,
     reset: bool = False,
     prior: MovementData | None,  # can only be none for reset
     update: MovementData | None,  # can only be none for reset
     transition: TransitionRegistry,
-) -> TypedMovementData:
-    """Get updates for a typed movement sensor, i.e. distance walking.
+    at: dt.datetime | None = None,
+) -> TypedMovementContext:
+    """Calculate the context shared by all typed movement sensors.
 
-    This is also used for dependent template entities.
+    The result does not depend on the mode type, so it is calculated once for
+    each update & then applied to each typed movement sensor & dependent
+    template entity with `get_updates_for_typed_movement_sensor`. Trips that
+    start are recorded as starting `at` the given time (or now).
 
     Returns:
-        The typed movement data.
+        The typed movement context.
     """
-    _LOGGER.debug(
-        "_typed_distance calculation for `%s` on %s (%s)",
-        "reset" if reset else "update",
-        entity_id or "internal",
-        mode_type or "mode type pending",
-    )
-
     if reset:
-        return TypedMovementData(
-            distance=0,
-            trip_start=None,
-            trip_distance=None,
-            trip_adjustments=None,
-        )
+        return TypedMovementContext(reset=True, changed=False)
 
     assert prior is not None
     assert update is not None
 
     if update.distance == 0:
-        return type_data
-
-    distance = type_data.distance
-    trip_start = type_data.trip_start
-    total_trip_distance = type_data.trip_distance or 0
-    total_trip_distance_adjustments = type_data.trip_adjustments or 0
+        return TypedMovementContext(reset=False, changed=False)
 
     from_mode = prior.mode_of_transit
     to_mode = update.mode_of_transit
     modes = [from_mode, to_mode]
-    in_transition = (
-        len(
-            [
-                item
-                for item in (transition.items or [])
-                if item.adjustments == ABSENT_NONE
-            ],
-        )
-        > 0
-    )
+    in_transition = transition.pending_count > 0
     stalled_from_in_transition = (
         transition.prior is not None
         and transition.items is None
@@ -563,9 +650,6 @@ def get_updates_for_typed_movement_sensor(
 
     _LOGGER.debug("contributes_to: %s", contributes_to)
 
-    contributes = contributes_to[mode_type]
-    _LOGGER.debug("contributes: %s from %s", contributes, repr(mode_type))
-
     # count the distance traveled in transition (before being finalized).
     #
     # the objects in the transition registry that have `adjustments` set are
@@ -609,14 +693,8 @@ def get_updates_for_typed_movement_sensor(
     # protects from losing values over multiple state changes.
     #
     # note: do not re-add the `adjustments` anywhere.
-    distance_from_transition = sum(
-        item.distance
-        for item in (transition.items or [])
-        if item.adjustments != ABSENT_NONE
-    ) - sum(
-        item.adjustments
-        for item in (transition.items or [])
-        if item.adjustments != ABSENT_NONE
+    distance_from_transition = (
+        transition.finalized_distance - transition.finalized_adjustments
     )
 
     _LOGGER.debug("distance_from_transition: %s", distance_from_transition)
@@ -633,16 +711,10 @@ def get_updates_for_typed_movement_sensor(
     # distance traveled can go into transition state while maintaining speed &
     # mode of transit. see `calculate_speed` consideration #1.
     if in_transition:
-        contributes = False
+        contributes_to = dict.fromkeys(contributes_to, False)
 
-    applicable_distance = (
-        update.distance - prior.distance + distance_from_transition
-        if contributes
-        else 0
-    )
-    applicable_distance_adjustments = (
-        update.adjustments - prior.adjustments if contributes else 0
-    )
+    applicable_distance = update.distance - prior.distance + distance_from_transition
+    applicable_distance_adjustments = update.adjustments - prior.adjustments
 
     _LOGGER.debug("applicable_distance: %s", applicable_distance)
     _LOGGER.debug(
@@ -650,10 +722,68 @@ def get_updates_for_typed_movement_sensor(
         applicable_distance_adjustments,
     )
 
+    return TypedMovementContext(
+        reset=False,
+        changed=True,
+        from_mode=from_mode,
+        to_mode=to_mode,
+        contributes_to=frozenset(
+            mode for mode, contributes in contributes_to.items() if contributes
+        ),
+        applicable_distance=applicable_distance,
+        applicable_distance_adjustments=applicable_distance_adjustments,
+        at=at,
+    )
+
+
+def get_updates_for_typed_movement_sensor(
+    *,
+    entity_id: str,
+    type_data: TypedMovementData,
+    mode_type: ModeOfTransit,
+    context: TypedMovementContext,
+) -> TypedMovementData:
+    """Get updates for a typed movement sensor, i.e. distance walking.
+
+    This is also used for dependent template entities.
+
+    Returns:
+        The typed movement data.
+    """
+    _LOGGER.debug(
+        "_typed_distance calculation for `%s` on %s (%s)",
+        "reset" if context.reset else "update",
+        entity_id or "internal",
+        mode_type or "mode type pending",
+    )
+
+    if context.reset:
+        return TypedMovementData(
+            distance=0,
+            trip_start=None,
+            trip_distance=None,
+            trip_adjustments=None,
+        )
+
+    if not context.changed:
+        return type_data
+
+    distance = type_data.distance
+    trip_start = type_data.trip_start
+    total_trip_distance = type_data.trip_distance or 0
+    total_trip_distance_adjustments = type_data.trip_adjustments or 0
+
+    contributes = mode_type in context.contributes_to
+    _LOGGER.debug("contributes: %s from %s", contributes, repr(mode_type))
+
+    applicable_distance = context.applicable_distance if contributes else 0
+    applicable_distance_adjustments = (
+        context.applicable_distance_adjustments if contributes else 0
+    )
+
     # if mode is changing to be the target type, then we need a trip reset
-    if from_mode != mode_type and to_mode == mode_type:
-        current_time = dt_util.utcnow()
-        trip_start = current_time
+    if context.from_mode != mode_type and context.to_mode == mode_type:
+        trip_start = context.at or dt_util.utcnow()
         total_trip_distance = 0
         total_trip_distance_adjustments = 0
 
@@ -674,19 +804,23 @@ def get_updates_for_typed_movement_sensor(
     )
 
 
-def haversine(x: Location, y: Location) -> float:
-    d_lat = (y.latitude - x.latitude) * math.pi / 180
-    d_long = (y.longitude - x.longitude) * math.pi / 180
-    a = (math.sin(d_lat / 2) * math.sin(d_lat / 2)) + (
-        math.sin(d_long / 2)
-        * math.sin(d_long / 2)
-        * math.cos(x.latitude * math.pi / 180)
-        * math.cos(y.latitude * math.pi / 180)
-    )
-    rad = 6371
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return rad * c
-
-
 def default_0(value: float | None) -> float:
     return 0.0 if value is None else value
+
+
+def _is_acceptable_movement(
+    distance: float,
+    accuracy: float,
+    entry: HistoryEntry,
+) -> bool:
+    """Check if movement from an entry exceeds the combined accuracy.
+
+    Returns:
+        A flag indicating if the movement is acceptable.
+    """
+    accuracy_combined = accuracy + entry.accuracy
+
+    return (
+        accuracy_combined >= HistoryEntry.NO_ACCURACY
+        or distance * 1000 >= accuracy_combined
+    )
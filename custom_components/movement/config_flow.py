@@ -14,31 +14,51 @@ from homeassistant.config_entries import (
     ConfigFlowResult,
     OptionsFlow,
 )
-from homeassistant.const import UnitOfLength
+from homeassistant.const import UnitOfInformation, UnitOfLength, UnitOfTime
 from homeassistant.core import State, callback
 from homeassistant.data_entry_flow import section
 from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.selector import (
+    BooleanSelector,
     EntitySelector,
     EntitySelectorConfig,
     NumberSelector,
     NumberSelectorConfig,
     NumberSelectorMode,
+    SelectSelector,
+    SelectSelectorConfig,
+    SelectSelectorMode,
 )
 from homeassistant.helpers.typing import VolDictType
 from homeassistant.util import slugify
 import voluptuous as vol
 
 from .const import (
+    CONF_DECAYED_STATISTICS,
     CONF_DEPENDENT_ENTITIES,
+    CONF_DISTANCE_ENGINE,
     CONF_HIGHWAY,
     CONF_LOCAL,
+    CONF_MODE_CONSTRAINT,
     CONF_MULTIPLIERS,
     CONF_NEIGHBORHOOD,
+    CONF_RETENTION_MAX_AGE,
+    CONF_RETENTION_MAX_ENTRIES,
+    CONF_RETENTION_MAX_SIZE,
+    CONF_SOURCE_ENTITIES,
+    CONF_SPEED_ENGINE,
+    CONF_TRACE,
     CONF_TRACKED_ENTITY,
     CONF_TRIP_ADDITION,
     DOMAIN,
 )
+from .history import HISTORY_ENTRIES_MAX
+from .retention import (
+    RETENTION_ENTRIES_MAX,
+    RETENTION_ENTRIES_MIN,
+    RETENTION_MAX_AGE_MIN,
+)
+from .types import DistanceEngine, ModeConstraint, SpeedEngine
 
 SECTION_ADVANCED_OPTIONS: Final = "advanced_options"
 
@@ -193,6 +213,98 @@ class MovementOptionsFlow(OptionsFlow):
                                     multiple=True,
                                 ),
                             ),
+                            vol.Required(
+                                CONF_SOURCE_ENTITIES,
+                                default=user_input.get(CONF_SOURCE_ENTITIES, []),
+                            ): EntitySelector(
+                                EntitySelectorConfig(
+                                    domain=[DEVICE_TRACKER_DOMAIN, PERSON_DOMAIN],
+                                    multiple=True,
+                                ),
+                            ),
+                            vol.Required(
+                                CONF_DISTANCE_ENGINE,
+                                default=user_input.get(
+                                    CONF_DISTANCE_ENGINE,
+                                    DistanceEngine.HAVERSINE,
+                                ),
+                            ): SelectSelector(
+                                SelectSelectorConfig(
+                                    options=list(DistanceEngine),
+                                    mode=SelectSelectorMode.DROPDOWN,
+                                    translation_key=CONF_DISTANCE_ENGINE,
+                                ),
+                            ),
+                            vol.Required(
+                                CONF_SPEED_ENGINE,
+                                default=user_input.get(
+                                    CONF_SPEED_ENGINE,
+                                    SpeedEngine.HISTORY,
+                                ),
+                            ): SelectSelector(
+                                SelectSelectorConfig(
+                                    options=list(SpeedEngine),
+                                    mode=SelectSelectorMode.DROPDOWN,
+                                    translation_key=CONF_SPEED_ENGINE,
+                                ),
+                            ),
+                            vol.Required(
+                                CONF_MODE_CONSTRAINT,
+                                default=user_input.get(
+                                    CONF_MODE_CONSTRAINT,
+                                    ModeConstraint.MAX,
+                                ),
+                            ): SelectSelector(
+                                SelectSelectorConfig(
+                                    options=list(ModeConstraint),
+                                    mode=SelectSelectorMode.DROPDOWN,
+                                    translation_key=CONF_MODE_CONSTRAINT,
+                                ),
+                            ),
+                            vol.Required(
+                                CONF_DECAYED_STATISTICS,
+                                default=user_input.get(CONF_DECAYED_STATISTICS, False),
+                            ): BooleanSelector(),
+                            vol.Required(
+                                CONF_RETENTION_MAX_ENTRIES,
+                                default=user_input.get(
+                                    CONF_RETENTION_MAX_ENTRIES,
+                                    HISTORY_ENTRIES_MAX,
+                                ),
+                            ): NumberSelector(
+                                NumberSelectorConfig(
+                                    min=RETENTION_ENTRIES_MIN,
+                                    max=RETENTION_ENTRIES_MAX,
+                                    step=1,
+                                    mode=NumberSelectorMode.BOX,
+                                ),
+                            ),
+                            vol.Required(
+                                CONF_RETENTION_MAX_AGE,
+                                default=user_input.get(CONF_RETENTION_MAX_AGE, 0),
+                            ): NumberSelector(
+                                NumberSelectorConfig(
+                                    min=0,
+                                    step=1,
+                                    mode=NumberSelectorMode.BOX,
+                                    unit_of_measurement=UnitOfTime.MINUTES,
+                                ),
+                            ),
+                            vol.Required(
+                                CONF_RETENTION_MAX_SIZE,
+                                default=user_input.get(CONF_RETENTION_MAX_SIZE, 0),
+                            ): NumberSelector(
+                                NumberSelectorConfig(
+                                    min=0,
+                                    step=1,
+                                    mode=NumberSelectorMode.BOX,
+                                    unit_of_measurement=UnitOfInformation.KIBIBYTES,
+                                ),
+                            ),
+                            vol.Required(
+                                CONF_TRACE,
+                                default=user_input.get(CONF_TRACE, False),
+                            ): BooleanSelector(),
                         },
                     ),
                     {"collapsed": True},
@@ -209,20 +321,43 @@ class MovementOptionsFlow(OptionsFlow):
         Returns:
             The config flow result.
         """
+        data = dict(self.config_entry.data)
+        errors: dict[str, str] = {}
+
         if user_input is not None:
             advanced_options = user_input.pop(SECTION_ADVANCED_OPTIONS)
-            self.hass.config_entries.async_update_entry(
-                self.config_entry,
-                data={**self.config_entry.data, **user_input, **advanced_options},
-            )
-            return self.async_create_entry(title=self.config_entry.title, data={})
+            data = {**data, **user_input, **advanced_options}
+
+            if not _is_valid_retention_max_age(data.get(CONF_RETENTION_MAX_AGE, 0)):
+                errors["base"] = "retention_max_age_too_short"
+            else:
+                self.hass.config_entries.async_update_entry(
+                    self.config_entry,
+                    data=data,
+                )
+                return self.async_create_entry(title=self.config_entry.title, data={})
 
         return self.async_show_form(
             step_id="init",
-            data_schema=self._user_form_schema(dict(self.config_entry.data)),
+            data_schema=self._user_form_schema(data),
+            errors=errors,
+            description_placeholders={
+                "retention_max_age_min": str(
+                    int(RETENTION_MAX_AGE_MIN.total_seconds() // 60),
+                ),
+            },
         )
 
 
+def _is_valid_retention_max_age(max_age: float) -> bool:
+    """Check if a max age (in minutes) keeps the history needed for speed.
+
+    Returns:
+        A flag indicating if the max age is valid (`0` is no limit).
+    """
+    return not max_age or max_age * 60 >= RETENTION_MAX_AGE_MIN.total_seconds()
+
+
 def _is_total_increasing_and_kilometers(
     entity_registry: er.EntityRegistry,
     entity_id: str,
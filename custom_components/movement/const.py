@@ -15,18 +15,32 @@ ATTR_MODE_OF_TRANSIT: Final = "mode_of_transit"
 ATTR_GPS_ACCURACY: Final = "gps_accuracy"
 ATTR_UPDATE_COUNT: Final = "distance_updates"
 
+CONF_DECAYED_STATISTICS: Final = "decayed_statistics"
 CONF_DEPENDENT_ENTITIES: Final = "dependent_entities"
+CONF_DISTANCE_ENGINE: Final = "distance_engine"
 CONF_TRACKED_ENTITY: Final = "tracked_entity"
 CONF_TRIP_ADDITION: Final = "trip_addition"
 CONF_MULTIPLIERS: Final = "multipliers"
 CONF_NEIGHBORHOOD: Final = "neighborhood"
 CONF_LOCAL: Final = "local"
+CONF_MODE_CONSTRAINT: Final = "mode_constraint"
 CONF_HIGHWAY: Final = "highway"
+CONF_RETENTION_MAX_AGE: Final = "retention_max_age"
+CONF_RETENTION_MAX_ENTRIES: Final = "retention_max_entries"
+CONF_RETENTION_MAX_SIZE: Final = "retention_max_size"
+CONF_SOURCE_ENTITIES: Final = "source_entities"
+CONF_SPEED_ENGINE: Final = "speed_engine"
+CONF_TRACE: Final = "trace"
 
 UPDATES_STALLED_DELTA: Final = dt.timedelta(minutes=20)
 HISTORY_EXPIRATION_DELTA: Final = dt.timedelta(hours=1)
 SPEED_USABLE_DELTA: Final = dt.timedelta(seconds=45)
 DEBOUNCE_UPDATES_DELTA: Final = dt.timedelta(seconds=5)
 
+# changes from several sources within this time of each other are merged. it
+# matches the debounce time since history entries that are closer together
+# than that are not used.
+MERGE_UPDATES_DELTA: Final = DEBOUNCE_UPDATES_DELTA
+
 MAX_RESTORE_HISTORY: Final = 25
 MAX_RESTORE_TRANSITION: Final = 25
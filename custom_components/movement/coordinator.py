@@ -6,13 +6,14 @@ from functools import partial
 import logging
 import re
 import time
-from typing import Any, Final, NoReturn, TypedDict
+from typing import Any, Final, NoReturn
 
 from homeassistant.core import (
     CALLBACK_TYPE,
     Event,
     EventStateChangedData,
     HomeAssistant,
+    State,
     callback,
 )
 from homeassistant.helpers import entity_registry as er, event as evt
@@ -24,39 +25,59 @@ from .calculations import (
     calculate_distance,
     calculate_distance_adjustments,
     calculate_speed,
+    calculate_speed_kalman,
+    calculate_typed_movement_context,
     get_updates_for_typed_movement_sensor,
     mode_of_transit_from_speed,
     update_or_maintain_mode,
 )
 from .const import (
+    CONF_DECAYED_STATISTICS,
     CONF_DEPENDENT_ENTITIES,
+    CONF_DISTANCE_ENGINE,
+    CONF_MODE_CONSTRAINT,
+    CONF_SOURCE_ENTITIES,
+    CONF_SPEED_ENGINE,
+    CONF_TRACE,
     CONF_TRACKED_ENTITY,
     DOMAIN,
+    MERGE_UPDATES_DELTA,
     UPDATES_STALLED_DELTA,
 )
-from .history import HistoryRegistry
+from .history import HISTORY_ENTRIES_MAX, HistoryRegistry
+from .kalman import KalmanSpeedFilter
+from .retention import RetentionPolicy
 from .statistics import (
     STAT_AVERAGE_LINEAR,
     STAT_CHANGE_SECOND,
+    STAT_DECAYED_AVERAGE,
+    STAT_DECAYED_RATE,
+    STAT_PERCENTILE,
     STAT_VALUE_MAX,
     Statistic,
 )
+from .store import HistoryStore
+from .trace import TraceBuffer
 from .transition import TransitionRegistry
 from .types import (
+    DistanceEngine,
     EntityMissingError,
     HistoryEntry,
     MisconfigurationError,
+    ModeConstraint,
     ModeOfTransit,
     MovementConfigEntry,
     MovementData,
     ResetRequest,
     ServiceAdjustment,
     SkipUpdateCondition,
+    SpeedEngine,
     SpeedStaleIndicator,
     StateChangedData,
     StatisticGroup,
     TransitionEntry,
     TransitionRequiredCondition,
+    TypedMovementContext,
     TypedMovementData,
     UpdatesStalledIndicator,
 )
@@ -74,6 +95,11 @@ DEFAULT_TYPED_MOVEMENT_DATA: Final = TypedMovementData(
 )
 
 
+# the attributes of the tracked entity that are used to make history entries.
+# changes to any other attributes (i.e. battery level, source, zone name) can't
+# affect the result of an update.
+_LOCATION_ATTRIBUTES: Final = ("latitude", "longitude", "gps_accuracy")
+
 _LOGGER = logging.getLogger(__name__)
 _TRACE = 5
 
@@ -81,6 +107,8 @@ _TRACE = 5
 class MovementUpdateCoordinator(DataUpdateCoordinator[MovementData]):
     """Class to manage movement calculations and updates."""
 
+    config_entry: MovementConfigEntry
+
     def __init__(
         self,
         hass: HomeAssistant,
@@ -92,8 +120,30 @@ class MovementUpdateCoordinator(DataUpdateCoordinator[MovementData]):
             CONF_DEPENDENT_ENTITIES,
             [],
         )
-        self.history = HistoryRegistry()
+        self.source_entities: list[str] = config_entry.data.get(
+            CONF_SOURCE_ENTITIES,
+            [],
+        )
+        self.distance_engine = DistanceEngine(
+            config_entry.data.get(CONF_DISTANCE_ENGINE, DistanceEngine.HAVERSINE),
+        )
+        self.speed_engine = SpeedEngine(
+            config_entry.data.get(CONF_SPEED_ENGINE, SpeedEngine.HISTORY),
+        )
+        self.mode_constraint = ModeConstraint(
+            config_entry.data.get(CONF_MODE_CONSTRAINT, ModeConstraint.MAX),
+        )
+        self.trace = TraceBuffer() if config_entry.data.get(CONF_TRACE, False) else None
+        self.history = HistoryRegistry(
+            trace=self.trace,
+            retention=RetentionPolicy.from_config(
+                config_entry.data,
+                max_entries=HISTORY_ENTRIES_MAX,
+            ),
+        )
+        self.speed_filter = KalmanSpeedFilter()
         self.transition = TransitionRegistry(config_entry)
+        self.store = HistoryStore(hass, config_entry.entry_id)
         self.change: (
             ResetRequest
             | ServiceAdjustment
@@ -105,14 +155,19 @@ class MovementUpdateCoordinator(DataUpdateCoordinator[MovementData]):
         self.walking_movement_data = replace(DEFAULT_TYPED_MOVEMENT_DATA)
         self.biking_movement_data = replace(DEFAULT_TYPED_MOVEMENT_DATA)
         self.driving_movement_data = replace(DEFAULT_TYPED_MOVEMENT_DATA)
+        decayed = config_entry.data.get(CONF_DECAYED_STATISTICS, False)
         self.statistics = StatisticGroup(
             update_rate=Statistic(
-                state_characteristic=STAT_CHANGE_SECOND,
+                state_characteristic=STAT_DECAYED_RATE
+                if decayed
+                else STAT_CHANGE_SECOND,
                 samples_max_buffer_size=None,
                 samples_max_age=UPDATE_RATE_STATISTIC_MAX_AGE,
             ),
             speed_recent_avg=Statistic(
-                state_characteristic=STAT_AVERAGE_LINEAR,
+                state_characteristic=STAT_DECAYED_AVERAGE
+                if decayed
+                else STAT_AVERAGE_LINEAR,
                 samples_max_buffer_size=None,
                 samples_max_age=SPEED_AVERAGE_STATISTIC_MAX_AGE,
             ),
@@ -121,11 +176,23 @@ class MovementUpdateCoordinator(DataUpdateCoordinator[MovementData]):
                 samples_max_buffer_size=None,
                 samples_max_age=SPEED_MAXIMUM_STATISTIC_MAX_AGE,
             ),
+            speed_recent_p95=Statistic(
+                state_characteristic=STAT_PERCENTILE,
+                samples_max_buffer_size=None,
+                samples_max_age=SPEED_MAXIMUM_STATISTIC_MAX_AGE,
+                percentile=95,
+            ),
         )
 
         self._reset_listener: CALLBACK_TYPE | None = None
         self._statistics_update_listener: CALLBACK_TYPE | None = None
         self._updates_stalled_listener: CALLBACK_TYPE | None = None
+        self._merge_listener: CALLBACK_TYPE | None = None
+        self._merge_pending: StateChangedData | None = None
+        self._merged_state: State | None = None
+        self._history_from_store = False
+        self.skipped_state_changes = 0
+        self.merged_state_changes = 0
 
         super().__init__(
             hass,
@@ -152,8 +219,22 @@ class MovementUpdateCoordinator(DataUpdateCoordinator[MovementData]):
 
         Make an additional call to `async_set_updated_data` if that
         functionality is required.
+
+        Entries loaded from the store during setup are kept rather than being
+        replaced by `history` & `transition` unless `history` is more recent.
+        The store holds the full history while restored sensor data only holds
+        the most recent entries.
         """
+        from_store = self._history_from_store
+        self._history_from_store = False
         self.data: MovementData = data
+        self.speed_filter.reset()
+
+        if from_store and (
+            not history or self.history.items[0].timestamp >= history[0].timestamp
+        ):
+            return
+
         self.history.reset(history)
         self.transition.reset(transition)
 
@@ -200,7 +281,7 @@ class MovementUpdateCoordinator(DataUpdateCoordinator[MovementData]):
             "%s (%s) state changed on %s, %s -> %s",
             self.config_entry.title,
             self.config_entry.entry_id,
-            self.tracked_entity,
+            data["entity_id"],
             old_state,
             new_state,
         )
@@ -209,7 +290,19 @@ class MovementUpdateCoordinator(DataUpdateCoordinator[MovementData]):
             "only one change handler should be invoked before refresh"
         )
 
-        if old_state and new_state:
+        if old_state and new_state and _is_same_location(old_state, new_state):
+            _LOGGER.debug(
+                "%s (%s) state changed without changing location -> skip",
+                self.config_entry.title,
+                self.config_entry.entry_id,
+            )
+
+            self.skipped_state_changes += 1
+
+        elif old_state and new_state and self.source_entities:
+            self._merge_state_change(old_state, new_state)
+
+        elif old_state and new_state:
             _LOGGER.debug(
                 "%s (%s) state changed between valid states "
                 "-> refresh:state-changed-data",
@@ -224,6 +317,84 @@ class MovementUpdateCoordinator(DataUpdateCoordinator[MovementData]):
 
             await self.async_refresh()
 
+    @callback
+    def _merge_state_change(self, old_state: State, new_state: State) -> None:
+        """Merge a state change from one of several sources.
+
+        The tracked entity & its sources can all change for the same movement,
+        i.e. a person entity changes along with the device tracker that it's
+        using. The first change schedules a refresh `MERGE_UPDATES_DELTA` later,
+        and changes that arrive before then are merged into it, keeping the new
+        state with the best GPS accuracy. Changes without a location add no
+        information when there are other sources, so they are skipped.
+        """
+        if not _has_location(new_state):
+            _LOGGER.debug(
+                "%s (%s) state changed without a location -> skip",
+                self.config_entry.title,
+                self.config_entry.entry_id,
+            )
+
+            self.skipped_state_changes += 1
+
+        elif (pending := self._merge_pending) is not None:
+            _LOGGER.debug(
+                "%s (%s) state changed before pending refresh -> merge",
+                self.config_entry.title,
+                self.config_entry.entry_id,
+            )
+
+            if _gps_accuracy(new_state) < _gps_accuracy(pending.new_state):
+                self._merge_pending = replace(pending, new_state=new_state)
+
+            self.merged_state_changes += 1
+
+        else:
+            _LOGGER.debug(
+                "%s (%s) state changed on a source "
+                "-> scheduling refresh:state-changed-data",
+                self.config_entry.title,
+                self.config_entry.entry_id,
+            )
+
+            self._merge_pending = StateChangedData(
+                old_state=self._merged_state or old_state,
+                new_state=new_state,
+            )
+            self._merge_listener = evt.async_call_later(
+                self.hass,
+                MERGE_UPDATES_DELTA.total_seconds(),
+                self._async_handle_merged_state_change,
+            )
+
+    async def _async_handle_merged_state_change(
+        self,
+        now: dt.datetime | None = None,  # noqa: ARG002
+    ) -> None:
+        """Timer callback for merged state changes."""
+        assert self.change is None, (
+            "only one change handler should be invoked before refresh"
+        )
+        assert self._merge_pending is not None
+
+        _LOGGER.debug(
+            "%s (%s): executing handler for merged state changes "
+            "-> refresh:state-changed-data",
+            self.config_entry.title,
+            self.config_entry.entry_id,
+        )
+
+        change = self._merge_pending
+        self._merge_pending = None
+        self._merge_listener = None
+        self._merged_state = change.new_state
+
+        # the location is from the time of the new state rather than the time
+        # of the refresh.
+        self.change = replace(change, at=change.new_state.last_updated)
+
+        await self.async_refresh()
+
     async def async_handle_tracked_entity_change(
         self,
         event: Event[er.EventEntityRegistryUpdatedData],
@@ -258,6 +429,7 @@ class MovementUpdateCoordinator(DataUpdateCoordinator[MovementData]):
         self._async_cancel_reset_listener()
         self._async_cancel_statistics_update_listener()
         self._async_cancel_updates_stalled_listener()
+        self._async_cancel_merge_listener()
 
     def _async_cancel_reset_listener(self) -> None:
         """Cancel the reset event listener."""
@@ -265,6 +437,13 @@ class MovementUpdateCoordinator(DataUpdateCoordinator[MovementData]):
             self._reset_listener()
             self._reset_listener = None
 
+    def _async_cancel_merge_listener(self) -> None:
+        """Cancel the merged state change listener."""
+        if self._merge_listener:
+            self._merge_listener()
+            self._merge_listener = None
+            self._merge_pending = None
+
     def _async_cancel_statistics_update_listener(self) -> None:
         """Cancel the scheduled statistics update listener."""
         if self._statistics_update_listener:
@@ -388,11 +567,19 @@ class MovementUpdateCoordinator(DataUpdateCoordinator[MovementData]):
             ignore_count=0,
         )
 
+        if stored := await self.store.async_load_entries():
+            self.history.reset(stored.history)
+            self.transition.reset(stored.transition)
+            self._history_from_store = bool(stored.history)
+
     async def _async_update_data(self) -> MovementData:
         assert self.data is not None
 
+        at = self._change_time()
+        now_timestamp = at.timestamp() if at else None
+
         for stat in self.statistics:
-            stat.update()
+            stat.update(now_timestamp)
 
         self.update: MovementData = replace(self.data, distance=0, adjustments=0)
 
@@ -418,12 +605,21 @@ class MovementUpdateCoordinator(DataUpdateCoordinator[MovementData]):
                     self.update,
                 )
 
-        self._recalc_default_typed_movement_data()
-        self._notify_dependent_trigger_entities()
-        self._add_statistics_post_update()
+        context = calculate_typed_movement_context(
+            reset=isinstance(self.change, ResetRequest),
+            prior=self.data,
+            update=self.update,
+            transition=self.transition,
+            at=at,
+        )
+
+        self._recalc_default_typed_movement_data(context)
+        self._notify_dependent_trigger_entities(context)
+        self._add_statistics_post_update(now_timestamp)
         self._schedule_reset_event()
         self._schedule_statistics_update()
         self._schedule_updates_stalled_event_post_update()
+        self.store.async_schedule_save(self.history.items, self.transition.items)
 
         # this event is only for users who with to use it to help debug
         # the internals of the integration. it's not public facing/stable nor
@@ -446,13 +642,15 @@ class MovementUpdateCoordinator(DataUpdateCoordinator[MovementData]):
 
         return self.update
 
-    def _add_statistics_post_update(self) -> None:
+    def _add_statistics_post_update(self, now_timestamp: float | None) -> None:
         """Add necessary values to all statistics objects.
 
         This must be done post-update when `self.update` has been set.
         """
         update = self.update
-        now_timestamp = time.time()
+
+        if now_timestamp is None:
+            now_timestamp = time.time()
 
         if update.change_count >= 0 and (update.change_count != self.data.change_count):
             self.statistics.update_rate.add_state(update.change_count, now_timestamp)
@@ -460,6 +658,7 @@ class MovementUpdateCoordinator(DataUpdateCoordinator[MovementData]):
         if update.speed and (update.speed != self.data.speed):
             self.statistics.speed_recent_avg.add_state(update.speed, now_timestamp)
             self.statistics.speed_recent_max.add_state(update.speed, now_timestamp)
+            self.statistics.speed_recent_p95.add_state(update.speed, now_timestamp)
 
     def _schedule_reset_event(self) -> None:
         """Ensure scheduling is in place for restting at midnight."""
@@ -562,6 +761,10 @@ class MovementUpdateCoordinator(DataUpdateCoordinator[MovementData]):
         transitioning = False
 
         if isinstance(self.change, StateChangedData):
+            if self.trace is not None:
+                at = self.change.at or dt_util.utcnow()
+                self.trace.record("state_change", at.isoformat())
+
             try:
                 self.history.add_entry_from_state_change(
                     self.change,
@@ -581,14 +784,25 @@ class MovementUpdateCoordinator(DataUpdateCoordinator[MovementData]):
             calculate_distance(
                 update=self.update,
                 history=self.history,
+                distance_engine=self.distance_engine,
             )
 
             try:
-                calculate_speed(
-                    prior=self.data,
-                    update=self.update,
-                    history=self.history,
-                )
+                if self.speed_engine == SpeedEngine.KALMAN:
+                    calculate_speed_kalman(
+                        prior=self.data,
+                        update=self.update,
+                        history=self.history,
+                        speed_filter=self.speed_filter,
+                    )
+                else:
+                    calculate_speed(
+                        prior=self.data,
+                        update=self.update,
+                        history=self.history,
+                        distance_engine=self.distance_engine,
+                        trace=self.trace,
+                    )
             except TransitionRequiredCondition as err:
                 _LOGGER.log(
                     _TRACE,
@@ -609,6 +823,7 @@ class MovementUpdateCoordinator(DataUpdateCoordinator[MovementData]):
                 statistics=self.statistics,
                 transition=self.transition,
                 proposed_mode=proposed_mode,
+                mode_constraint=self.mode_constraint,
             )
         except TransitionRequiredCondition as err:
             _LOGGER.log(
@@ -668,6 +883,7 @@ class MovementUpdateCoordinator(DataUpdateCoordinator[MovementData]):
         # handle reset for when updates stall.
         if isinstance(self.change, UpdatesStalledIndicator):
             update.speed = None
+            self.speed_filter.reset()
             self.transition.reset(None)
 
         # bind mode reset to any speed resets that have occurred.
@@ -683,47 +899,37 @@ class MovementUpdateCoordinator(DataUpdateCoordinator[MovementData]):
         if update.distance != data.distance:
             update.change_count = max(update.change_count, 0) + 1
 
-    def _recalc_default_typed_movement_data(self) -> None:
+    def _recalc_default_typed_movement_data(
+        self,
+        context: TypedMovementContext,
+    ) -> None:
         """Recalculation for walking, biking, and driving sensor data.
 
         This should be called after the main recalculation is complete.
         """
-        reset = isinstance(self.change, ResetRequest)
-
-        class SharedKwargs(TypedDict):
-            entity_id: str
-            reset: bool
-            prior: MovementData
-            update: MovementData
-            transition: TransitionRegistry
-
-        shared_kwargs: SharedKwargs = {
-            "entity_id": "",
-            "reset": reset,
-            "prior": self.data,
-            "update": self.update,
-            "transition": self.transition,
-        }
-
         self.walking_movement_data = get_updates_for_typed_movement_sensor(
+            entity_id="",
             type_data=self.walking_movement_data,
             mode_type=ModeOfTransit.WALKING,
-            **shared_kwargs,
+            context=context,
         )
         self.biking_movement_data = get_updates_for_typed_movement_sensor(
+            entity_id="",
             type_data=self.biking_movement_data,
             mode_type=ModeOfTransit.BIKING,
-            **shared_kwargs,
+            context=context,
         )
         self.driving_movement_data = get_updates_for_typed_movement_sensor(
+            entity_id="",
             type_data=self.driving_movement_data,
             mode_type=ModeOfTransit.DRIVING,
-            **shared_kwargs,
+            context=context,
         )
 
-    def _notify_dependent_trigger_entities(self) -> None:
-        reset = isinstance(self.change, ResetRequest)
-
+    def _notify_dependent_trigger_entities(
+        self,
+        context: TypedMovementContext,
+    ) -> None:
         for entity_id in self.dependent_entities:
             try:
                 type_data, mode_type = (
@@ -733,10 +939,7 @@ class MovementUpdateCoordinator(DataUpdateCoordinator[MovementData]):
                     entity_id=entity_id,
                     type_data=type_data,
                     mode_type=mode_type,
-                    reset=reset,
-                    prior=self.data,
-                    update=self.update,
-                    transition=self.transition,
+                    context=context,
                 ).as_state_dict()
 
                 from_dict = self.data.as_dict()
@@ -751,7 +954,7 @@ class MovementUpdateCoordinator(DataUpdateCoordinator[MovementData]):
                     {
                         "entity_id": entity_id,
                         "config_entry_id": self.config_entry.entry_id,
-                        "reason": "reset" if reset else "update",
+                        "reason": "reset" if context.reset else "update",
                         "from_state": from_state,
                         "to_state": to_state,
                         "_for": slugify(
@@ -802,6 +1005,14 @@ class MovementUpdateCoordinator(DataUpdateCoordinator[MovementData]):
 
         return type_data, mode_type
 
+    def _change_time(self) -> dt.datetime | None:
+        """Get the time as of which the current change is processed.
+
+        Returns:
+            The time of the change or `None` if it's being processed as of now.
+        """
+        return self.change.at if isinstance(self.change, StateChangedData) else None
+
     def _create_removed_tracked_entity_issue(self, entity_id: str) -> None:
         """Create a repair issue for a removed tracked entity."""
         async_create_issue(
@@ -829,6 +1040,29 @@ def _serialize(data: Any) -> Any:  # noqa: ANN401
     return data
 
 
+def _has_location(state: State) -> bool:
+    attrs = state.attributes
+
+    return attrs.get("latitude") is not None and attrs.get("longitude") is not None
+
+
+def _gps_accuracy(state: State) -> float:
+    accuracy = state.attributes.get("gps_accuracy")
+
+    return HistoryEntry.NO_ACCURACY if accuracy is None else accuracy
+
+
+def _is_same_location(old_state: State, new_state: State) -> bool:
+    old_attrs = old_state.attributes
+    new_attrs = new_state.attributes
+
+    # changes without a location are not skipped here so that they are counted
+    # as ignored updates when tracking a single entity.
+    return _has_location(new_state) and all(
+        old_attrs.get(attr) == new_attrs.get(attr) for attr in _LOCATION_ATTRIBUTES
+    )
+
+
 def _raise(
     exception: type[Exception],
     *args,  # noqa: ANN002
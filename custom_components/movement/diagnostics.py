@@ -40,8 +40,16 @@ async def async_get_config_entry_diagnostics(  # noqa: RUF029
         "transition": [item.as_dict() for item in coordinator.transition.items]
         if coordinator.transition.items is not None
         else None,
+        "distance_cache": coordinator.history.distance_cache_counters.as_dict(),
+        "history_retention": coordinator.history.retention_counters.as_dict(),
+        "transition_retention": coordinator.transition.retention_counters.as_dict(),
+        "skipped_state_changes": coordinator.skipped_state_changes,
+        "merged_state_changes": coordinator.merged_state_changes,
     }
 
+    if coordinator.trace is not None:
+        data["trace"] = coordinator.trace.as_list()
+
     add_latitude = random.uniform(0, 180)  # noqa: S311
     add_longitude = random.uniform(0, 360)  # noqa: S311
 
@@ -0,0 +1,462 @@
+"""Distance calculation engines."""
+
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from functools import lru_cache
+import math
+from typing import Any, Final, cast
+
+import numpy as np
+import numpy.typing as npt
+
+from .types import AbsentNone, CoordinateArrays, DistanceEngine, HistoryEntry, Location
+
+EARTH_RADIUS_KM: Final = 6371
+
+# below this many points, distances are calculated one at a time since the
+# overhead of building arrays outweighs the benefit of vectorizing.
+BATCH_DISTANCE_MIN_POINTS: Final = 32
+
+# the local plane approximation is within 0.001% of `haversine` for hops up to
+# this distance as long as neither point is closer to a pole than
+# `LOCAL_PLANE_MAX_LATITUDE`.
+LOCAL_PLANE_MAX_DISTANCE_KM: Final = 10.0
+LOCAL_PLANE_MAX_LATITUDE: Final = 80.0
+LOCAL_PLANE_MIN_COS_LATITUDE: Final = math.cos(LOCAL_PLANE_MAX_LATITUDE * math.pi / 180)
+
+# hops at least this long are refined using the WGS84 ellipsoid when using the
+# geodesic engine.
+GEODESIC_MIN_DISTANCE_KM: Final = LOCAL_PLANE_MAX_DISTANCE_KM
+GEODESIC_CACHE_SIZE: Final = 256
+GEODESIC_MAX_ITERATIONS: Final = 200
+
+WGS84_A: Final = 6378137.0
+WGS84_F: Final = 1 / 298.257223563
+WGS84_B: Final = (1 - WGS84_F) * WGS84_A
+
+
+@dataclass(frozen=True)
+class DistanceCalculator:
+    """Distance functions for a single distance engine."""
+
+    pair: Callable[[Location, Location], float]
+    batch: Callable[[CoordinateArrays, Location], list[float]]
+
+
+def haversine(x: Location, y: Location) -> float:
+    """Calculate the great-circle distance between two locations.
+
+    The earth is treated as a sphere with a radius of `EARTH_RADIUS_KM`
+    (6371 km, the mean radius). This is the reference for all other engines,
+    whose results are bounded against it.
+
+    Returns:
+        The distance (in kilometers) from `x` to `y`.
+    """
+    d_lat = (y.latitude - x.latitude) * math.pi / 180
+    d_long = (y.longitude - x.longitude) * math.pi / 180
+    a = (math.sin(d_lat / 2) * math.sin(d_lat / 2)) + (
+        math.sin(d_long / 2)
+        * math.sin(d_long / 2)
+        * math.cos(x.latitude * math.pi / 180)
+        * math.cos(y.latitude * math.pi / 180)
+    )
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return EARTH_RADIUS_KM * c
+
+
+def haversine_cached(x: Location, y: Location) -> float:
+    """Calculate distance using the terms precomputed on each location.
+
+    This is equivalent to `haversine`, but avoids calculating the cosine of
+    each latitude on every call.
+
+    Returns:
+        The distance (in kilometers) from `x` to `y`.
+    """
+    return _haversine(
+        x.latitude,
+        x.longitude,
+        x.cos_latitude,
+        y.latitude,
+        y.longitude,
+        y.cos_latitude,
+    )
+
+
+def haversine_batch(coordinates: CoordinateArrays, y: Location) -> list[float]:
+    """Calculate the distance from many points to a single location.
+
+    This is equivalent to calling `haversine_cached` for each point, but
+    performs the calculation over the whole set of points at once. Small sets
+    of points fall back to calculating each distance individually.
+
+    Args:
+        coordinates: The coordinates (and precomputed terms) of the points.
+        y: The location to which distances are calculated.
+
+    Returns:
+        The distance (in kilometers) from each point to `y`.
+    """
+    if len(coordinates.latitudes) < BATCH_DISTANCE_MIN_POINTS:
+        return [
+            _haversine(lat, long, cos_lat, y.latitude, y.longitude, y.cos_latitude)
+            for lat, long, cos_lat in zip(*coordinates, strict=True)
+        ]
+
+    return cast("list[float]", _haversine_array(*_as_arrays(coordinates), y).tolist())
+
+
+def local_plane(x: Location, y: Location) -> float:
+    """Calculate distance on a local flat-earth (equirectangular) projection.
+
+    Short hops are measured on a plane tangent to the surface of the earth
+    which needs no trigonometric functions beyond those precomputed on each
+    location. Longer hops and those near the poles, where the approximation
+    degrades, fall back to `haversine_cached`.
+
+    Returns:
+        The distance (in kilometers) from `x` to `y`.
+    """
+    return _local_plane(
+        x.latitude,
+        x.longitude,
+        x.cos_latitude,
+        y.latitude,
+        y.longitude,
+        y.cos_latitude,
+    )
+
+
+def local_plane_batch(coordinates: CoordinateArrays, y: Location) -> list[float]:
+    """Calculate the distance from many points using `local_plane`.
+
+    Returns:
+        The distance (in kilometers) from each point to `y`.
+    """
+    if len(coordinates.latitudes) < BATCH_DISTANCE_MIN_POINTS:
+        return [
+            _local_plane(lat, long, cos_lat, y.latitude, y.longitude, y.cos_latitude)
+            for lat, long, cos_lat in zip(*coordinates, strict=True)
+        ]
+
+    x_lat, x_long, x_cos_lat = _as_arrays(coordinates)
+    result = EARTH_RADIUS_KM * np.hypot(
+        (y.longitude - x_long) * math.pi / 180 * (x_cos_lat + y.cos_latitude) / 2,
+        (y.latitude - x_lat) * math.pi / 180,
+    )
+    fallback = (result > LOCAL_PLANE_MAX_DISTANCE_KM) | (
+        np.minimum(x_cos_lat, y.cos_latitude) < LOCAL_PLANE_MIN_COS_LATITUDE
+    )
+
+    if fallback.any():
+        result[fallback] = _haversine_array(
+            x_lat[fallback],
+            x_long[fallback],
+            x_cos_lat[fallback],
+            y,
+        )
+
+    return cast("list[float]", result.tolist())
+
+
+def geodesic(x: Location, y: Location) -> float:
+    """Calculate distance on the WGS84 ellipsoid for long hops.
+
+    Hops shorter than `GEODESIC_MIN_DISTANCE_KM` are measured with
+    `local_plane` since the difference is negligible at that scale. Longer hops
+    are measured with Vincenty's inverse formula & cached since the same pair of
+    locations tends to be measured several times over consecutive updates.
+
+    Returns:
+        The distance (in kilometers) from `x` to `y`.
+    """
+    distance = local_plane(x, y)
+
+    if distance >= GEODESIC_MIN_DISTANCE_KM:
+        distance = _refine_geodesic(x.latitude, x.longitude, y, distance)
+
+    return distance
+
+
+def geodesic_batch(coordinates: CoordinateArrays, y: Location) -> list[float]:
+    """Calculate the distance from many points using `geodesic`.
+
+    Returns:
+        The distance (in kilometers) from each point to `y`.
+    """
+    return [
+        _refine_geodesic(lat, long, y, distance)
+        if distance >= GEODESIC_MIN_DISTANCE_KM
+        else distance
+        for lat, long, distance in zip(
+            coordinates.latitudes,
+            coordinates.longitudes,
+            local_plane_batch(coordinates, y),
+            strict=True,
+        )
+    ]
+
+
+@dataclass
+class CacheCounters:
+    """Hit & miss counts for a cache."""
+
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float | None:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+        }
+
+
+class DistanceCache:
+    """DistanceCache class.
+
+    Distances from each prior history entry to the current location, which are
+    shared by all calculations made for a single update. Entries are identified
+    by their index in the prior items of the history, and each distance is only
+    calculated the first time it's needed.
+    """
+
+    def __init__(
+        self,
+        calculator: DistanceCalculator,
+        entries: Sequence[HistoryEntry],
+        coordinates: CoordinateArrays,
+        location: Location,
+        counters: CacheCounters | None = None,
+    ) -> None:
+        """Initialize."""
+        super().__init__()
+        self.calculator = calculator
+        self.counters = counters or CacheCounters()
+        self._entries = entries
+        self._coordinates = coordinates
+        self._location = location
+        self._distances: list[float | None] = [None] * len(coordinates.latitudes)
+
+    def get(self, indexes: slice) -> list[float]:
+        """Get the distances from a range of prior entries.
+
+        Missing distances are calculated in a single batch that spans from the
+        first to the last missing entry.
+
+        Returns:
+            The distance (in kilometers) from each entry to the current location.
+        """
+        distances = self._distances
+        start, stop, _ = indexes.indices(len(distances))
+        result = distances[start:stop]
+
+        if None not in result:
+            self.counters.hits += len(result)
+            return cast("list[float]", result)
+
+        missing = result.count(None)
+        first = start + result.index(None)
+        last = stop - result[::-1].index(None)
+        calculated = self.calculator.batch(
+            self._coordinates.select(slice(first, last)),
+            self._location,
+        )
+
+        # keep distances that were already calculated as they were
+        if missing != last - first:
+            calculated = [
+                distance if distance is not None else new_distance
+                for distance, new_distance in zip(
+                    distances[first:last], calculated, strict=True
+                )
+            ]
+
+        distances[first:last] = calculated
+        self.counters.hits += len(result) - missing
+        self.counters.misses += missing
+
+        if (first, last) != (start, stop):
+            calculated = cast("list[float]", distances[start:stop])
+
+        return calculated
+
+    def distance(self, index: int) -> float:
+        """Get the distance from a single prior entry.
+
+        Returns:
+            The distance (in kilometers) from the entry to the current location.
+        """
+        distance = self._distances[index]
+
+        if distance is None:
+            location = self._entries[index].location
+            assert not isinstance(location, AbsentNone)
+            self.counters.misses += 1
+            distance = self.calculator.pair(location, self._location)
+            self._distances[index] = distance
+        else:
+            self.counters.hits += 1
+
+        return distance
+
+
+DISTANCE_ENGINES: Final = {
+    DistanceEngine.LOCAL_PLANE: DistanceCalculator(local_plane, local_plane_batch),
+    DistanceEngine.HAVERSINE: DistanceCalculator(haversine_cached, haversine_batch),
+    DistanceEngine.GEODESIC: DistanceCalculator(geodesic, geodesic_batch),
+}
+
+
+def _haversine(  # noqa: PLR0917
+    lat1: float,
+    long1: float,
+    cos_lat1: float,
+    lat2: float,
+    long2: float,
+    cos_lat2: float,
+) -> float:
+    sin_d_lat = math.sin((lat2 - lat1) * math.pi / 180 / 2)
+    sin_d_long = math.sin((long2 - long1) * math.pi / 180 / 2)
+    a = (sin_d_lat * sin_d_lat) + (sin_d_long * sin_d_long * cos_lat1 * cos_lat2)
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return EARTH_RADIUS_KM * c
+
+
+def _haversine_array(
+    x_lat: npt.NDArray[np.float64],
+    x_long: npt.NDArray[np.float64],
+    x_cos_lat: npt.NDArray[np.float64],
+    y: Location,
+) -> npt.NDArray[np.float64]:
+    sin_d_lat = np.sin((y.latitude - x_lat) * math.pi / 180 / 2)
+    sin_d_long = np.sin((y.longitude - x_long) * math.pi / 180 / 2)
+    a = (sin_d_lat * sin_d_lat) + (sin_d_long * sin_d_long * x_cos_lat * y.cos_latitude)
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    result: npt.NDArray[np.float64] = EARTH_RADIUS_KM * c
+    return result
+
+
+def _local_plane(  # noqa: PLR0917
+    lat1: float,
+    long1: float,
+    cos_lat1: float,
+    lat2: float,
+    long2: float,
+    cos_lat2: float,
+) -> float:
+    if min(cos_lat1, cos_lat2) >= LOCAL_PLANE_MIN_COS_LATITUDE:
+        # the mean of the cosines is used in place of the cosine of the mean
+        # latitude. the difference is well within the error of the projection
+        # for short hops.
+        distance = EARTH_RADIUS_KM * math.hypot(
+            (long2 - long1) * math.pi / 180 * (cos_lat1 + cos_lat2) / 2,
+            (lat2 - lat1) * math.pi / 180,
+        )
+
+        if distance <= LOCAL_PLANE_MAX_DISTANCE_KM:
+            return distance
+
+    return _haversine(lat1, long1, cos_lat1, lat2, long2, cos_lat2)
+
+
+def _as_arrays(
+    coordinates: CoordinateArrays,
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    return (
+        np.asarray(coordinates.latitudes, dtype=np.float64),
+        np.asarray(coordinates.longitudes, dtype=np.float64),
+        np.asarray(coordinates.cos_latitudes, dtype=np.float64),
+    )
+
+
+def _refine_geodesic(
+    latitude: float,
+    longitude: float,
+    y: Location,
+    fallback: float,
+) -> float:
+    distance = _vincenty(latitude, longitude, y.latitude, y.longitude)
+    return fallback if distance is None else distance
+
+
+@lru_cache(maxsize=GEODESIC_CACHE_SIZE)
+def _vincenty(  # noqa: PLR0914
+    lat1: float,
+    long1: float,
+    lat2: float,
+    long2: float,
+) -> float | None:
+    """Calculate distance on the WGS84 ellipsoid with Vincenty's inverse formula.
+
+    This is only used for hops of at least `GEODESIC_MIN_DISTANCE_KM`, so the
+    points are never coincident.
+
+    Returns:
+        The distance (in kilometers) or `None` if the calculation did not
+        converge (which can happen for nearly antipodal points).
+    """
+    f = WGS84_F
+    u1 = math.atan((1 - f) * math.tan(lat1 * math.pi / 180))
+    u2 = math.atan((1 - f) * math.tan(lat2 * math.pi / 180))
+    sin_u1, cos_u1 = math.sin(u1), math.cos(u1)
+    sin_u2, cos_u2 = math.sin(u2), math.cos(u2)
+    d_long = (long2 - long1) * math.pi / 180
+    lambda_ = d_long
+
+    for _ in range(GEODESIC_MAX_ITERATIONS):
+        sin_lambda, cos_lambda = math.sin(lambda_), math.cos(lambda_)
+        sin_sigma = math.hypot(
+            cos_u2 * sin_lambda,
+            cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lambda,
+        )
+
+        cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lambda
+        sigma = math.atan2(sin_sigma, cos_sigma)
+        sin_alpha = cos_u1 * cos_u2 * sin_lambda / sin_sigma
+        cos_sq_alpha = 1 - sin_alpha * sin_alpha
+        cos_2_sigma_m = (
+            cos_sigma - 2 * sin_u1 * sin_u2 / cos_sq_alpha if cos_sq_alpha else 0.0
+        )
+        c = f / 16 * cos_sq_alpha * (4 + f * (4 - 3 * cos_sq_alpha))
+        prior_lambda = lambda_
+        lambda_ = d_long + (1 - c) * f * sin_alpha * (
+            sigma
+            + c
+            * sin_sigma
+            * (cos_2_sigma_m + c * cos_sigma * (-1 + 2 * cos_2_sigma_m**2))
+        )
+
+        if abs(lambda_ - prior_lambda) < 1e-12:
+            break
+    else:
+        return None
+
+    u_sq = cos_sq_alpha * (WGS84_A**2 - WGS84_B**2) / WGS84_B**2
+    a = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+    b = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+    delta_sigma = (
+        b
+        * sin_sigma
+        * (
+            cos_2_sigma_m
+            + b
+            / 4
+            * (
+                cos_sigma * (-1 + 2 * cos_2_sigma_m**2)
+                - b
+                / 6
+                * cos_2_sigma_m
+                * (-3 + 4 * sin_sigma**2)
+                * (-3 + 4 * cos_2_sigma_m**2)
+            )
+        )
+    )
+
+    return WGS84_B * a * (sigma - delta_sigma) / 1000
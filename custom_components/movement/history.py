@@ -1,17 +1,34 @@
 """Helper to manage history."""
 
-from collections.abc import Callable
+from bisect import bisect_left
+from collections.abc import Callable, Sequence
 from dataclasses import replace
-import datetime as dt
 import logging
+from typing import Final
 
 from homeassistant.core import State
 from homeassistant.util import dt as dt_util
 
 from .const import DEBOUNCE_UPDATES_DELTA, HISTORY_EXPIRATION_DELTA, SPEED_USABLE_DELTA
-from .types import ABSENT_NONE, AbsentNone, HistoryEntry, Location, StateChangedData
+from .distance import CacheCounters, DistanceCache, DistanceCalculator
+from .retention import HISTORY_ENTRY_BYTES, RetentionCounters, RetentionPolicy
+from .stationary import StationaryCell
+from .trace import TraceBuffer
+from .types import (
+    ABSENT_NONE,
+    AbsentNone,
+    CoordinateArrays,
+    HistoryEntry,
+    Location,
+    StateChangedData,
+)
 
 HISTORY_ENTRIES_MAX = 1000
+HISTORY_RETENTION: Final = RetentionPolicy(max_entries=HISTORY_ENTRIES_MAX)
+
+_SPEED_USABLE_SECONDS: Final = SPEED_USABLE_DELTA.total_seconds()
+_HISTORY_EXPIRATION_SECONDS: Final = HISTORY_EXPIRATION_DELTA.total_seconds()
+_DEBOUNCE_UPDATES_SECONDS: Final = DEBOUNCE_UPDATES_DELTA.total_seconds()
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -21,24 +38,126 @@ _TRACE = 5
 class HistoryRegistry:
     """HistoryRegistry class."""
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        trace: TraceBuffer | None = None,
+        retention: RetentionPolicy = HISTORY_RETENTION,
+    ) -> None:
         """Initialize."""
         super().__init__()
+        self.trace = trace
+        self.retention = retention
+        self.retention_counters = RetentionCounters(HISTORY_ENTRY_BYTES)
+        self._max_count = retention.max_count(HISTORY_ENTRY_BYTES)
         self._items: list[HistoryEntry] = []
-        self._prior: list[HistoryEntry] | None = None
+        self._unsettled = 0
+        self._pruned_at: float | None = None
+        self._prior: Sequence[HistoryEntry] | None = None
+        self._prior_coordinates: CoordinateArrays | None = None
+        self._distance_cache: DistanceCache | None = None
+        self._cell = StationaryCell()
+        self._stationary = False
+        self.distance_cache_counters = CacheCounters()
 
     @property
-    def items(self) -> list[HistoryEntry]:
+    def items(self) -> Sequence[HistoryEntry]:
         return self._items
 
     @property
-    def prior(self) -> list[HistoryEntry]:
+    def prior(self) -> Sequence[HistoryEntry]:
         if self._prior is None:
             msg = "prior items unavailable: registry was (re-)initialized and has had no new entries added"
             raise AttributeError(msg)
 
         return self._prior
 
+    @property
+    def prior_coordinates(self) -> CoordinateArrays:
+        """Get the coordinates of the prior items as parallel arrays.
+
+        The arrays are built once per update so that distance calculations can
+        be made against all prior items at once.
+        """
+        if self._prior_coordinates is None:
+            coordinates = CoordinateArrays([], [], [])
+
+            for entry in self.prior:
+                assert not isinstance(entry.location, AbsentNone)
+                coordinates.latitudes.append(entry.location.latitude)
+                coordinates.longitudes.append(entry.location.longitude)
+                coordinates.cos_latitudes.append(entry.location.cos_latitude)
+
+            self._prior_coordinates = coordinates
+
+        return self._prior_coordinates
+
+    def distance_cache(self, calculator: DistanceCalculator) -> DistanceCache:
+        """Get the cache of distances from prior items to the current item.
+
+        The cache is shared by all calculations made for an update (using the
+        same distance engine) & is discarded when a new entry is added.
+
+        Returns:
+            The distance cache.
+        """
+        cache = self._distance_cache
+
+        if cache is None or cache.calculator is not calculator:
+            location = self.current_entry.location
+            assert not isinstance(location, AbsentNone)
+            cache = DistanceCache(
+                calculator,
+                self.prior,
+                self.prior_coordinates,
+                location,
+                self.distance_cache_counters,
+            )
+            self._distance_cache = cache
+
+        return cache
+
+    def prior_window(
+        self,
+        timestamp: float,
+        *,
+        min_age: float,
+        max_age: float,
+    ) -> range:
+        """Get the indexes of prior items within a range of ages.
+
+        Prior items are ordered newest first, so their ages relative to
+        `timestamp` are sorted & the bounds of the range are found by bisection
+        rather than by checking each item.
+
+        Args:
+            timestamp: The time from which ages are measured.
+            min_age: The minimum age (inclusive, in seconds) of items in the
+                range.
+            max_age: The maximum age (exclusive, in seconds) of items in the
+                range.
+
+        Returns:
+            The range of indexes into `prior`.
+        """
+
+        def age(entry: HistoryEntry) -> float:
+            return timestamp - entry.timestamp
+
+        return range(
+            bisect_left(self.prior, min_age, key=age),
+            bisect_left(self.prior, max_age, key=age),
+        )
+
+    @property
+    def stationary(self) -> bool:
+        """Check if the current entry is stationary.
+
+        The current entry is stationary when the movement from every prior
+        item is within their combined accuracy (see `StationaryCell`), so none
+        of them can be used to calculate speed.
+        """
+        return self._stationary
+
     @property
     def current_entry(self) -> HistoryEntry:
         return self.items[0]
@@ -48,8 +167,14 @@ class HistoryRegistry:
         return self.prior[0]
 
     def reset(self, items: list[HistoryEntry]) -> None:
-        self._items = items
+        self._items = list(items)
+        self._unsettled = len(items)
+        self._pruned_at = None
         self._prior = None
+        self._prior_coordinates = None
+        self._distance_cache = None
+        self._cell.reset(items)
+        self._stationary = False
 
     def add_entry_from_state_change(
         self,
@@ -69,7 +194,7 @@ class HistoryRegistry:
         consideration #2 in `MovementUpdateCoordinator._calculate_speed` for why
         keeping recent items is important).
 
-        Also, constrain the history to a maximum size.
+        Also, constrain the history to the limits of the retention policy.
         """
         _LOGGER.log(_TRACE, "add_entry_from_state_change %s", change)
 
@@ -79,47 +204,96 @@ class HistoryRegistry:
         fallback_entry: HistoryEntry = self._make_fallback_entry(change)
         unworkable_reason: str | None = None
 
-        self._items = self._clean(self._items)
-        self._prune_items(change.new_state.attributes.get("gps_accuracy", None))
-        self._items.insert(0, self._make_entry(change.new_state))
-        self._mark_debounced_items()
-        self._items = self._items[:HISTORY_ENTRIES_MAX]  # constrain the history
-        self._prior = self._clean(self._items[1:]) or ([fallback_entry])
+        current_time = (change.at or dt_util.utcnow()).timestamp()
+
+        self._update_items(
+            self._make_entry(change.new_state, timestamp=current_time),
+            fallback_entry,
+            change.new_state.attributes.get("gps_accuracy", None),
+            current_time,
+        )
+        self._prior_coordinates = None
+        self._distance_cache = None
+
+        # prior items are ordered newest first, so all of them are members of
+        # the cell when the oldest is.
+        self._stationary = (
+            self._cell.add(self.current_entry)
+            and self.prior[-1] is not fallback_entry
+            and self._cell.contains(self.prior[-1])
+        )
 
         # flag to skip updates marked for debounce/inaccuracy
-        if self._items[0].debounce:
+        if self.current_entry.debounce:
             unworkable_reason = "first history item marked for debounce"
-        elif self._items[0].ignore == "inaccurate":
+        elif self.current_entry.ignore == "inaccurate":
             unworkable_reason = "poor gps_accuracy"
-        elif (ignore := self._prior[0].ignore) and self._prior[0] == fallback_entry:
+        elif (ignore := self.prior_entry.ignore) and self.prior_entry == fallback_entry:
             unworkable_reason = f"poor details ({ignore}) in `from_state`"
 
         if unworkable_reason:
             unworkable(unworkable_reason)
 
+    def _update_items(
+        self,
+        entry: HistoryEntry,
+        fallback_entry: HistoryEntry,
+        gps_accuracy: float | None,
+        current_time: float,
+    ) -> None:
+        """Clean & prune the items, then add a new entry at the head of the list.
+
+        This updates both the items & the prior items, using the fallback entry
+        as the only prior item when no others are usable.
+        """
+        self._prune_items(gps_accuracy, current_time)
+        self._items.insert(0, self._debounce(entry, next(iter(self._items), None)))
+        self._unsettled += 1
+        self._evict_items(current_time)
+
+        # only the new entry can need cleaning after pruning
+        self._prior = self._items[1:] or [fallback_entry]
+
+    def _evict_items(self, current_time: float) -> None:
+        """Evict the oldest items beyond the limits of the retention policy.
+
+        The new entry at the head of the list is always kept.
+        """
+        items = self._items
+        count = len(items)
+        del items[self._max_count :]
+
+        if (max_age := self.retention.max_age) is not None:
+            evict_before = current_time - max_age
+
+            while len(items) > 1 and items[-1].timestamp < evict_before:
+                items.pop()
+
+        self.retention_counters.record(len(items), count - len(items))
+
     @classmethod
-    def _make_entry(cls, state: State, at: dt.datetime | None = None) -> HistoryEntry:
+    def _make_entry(cls, state: State, timestamp: float | None = None) -> HistoryEntry:
         attrs = state.attributes
         gps_accuracy = attrs.get("gps_accuracy")
         inaccurate = _default_negative(gps_accuracy) > 1000
         ignore: str | AbsentNone = ABSENT_NONE
         latitude = attrs.get("latitude")
         longitude = attrs.get("longitude")
-        location: Location | AbsentNone = Location(
-            latitude=latitude,
-            longitude=longitude,
-        )
+        location: Location | AbsentNone = ABSENT_NONE
 
         if inaccurate:
             ignore = "inaccurate"
-            location = ABSENT_NONE
 
         if not latitude or not longitude:
             ignore = "no_location"
-            location = ABSENT_NONE
+
+        # the location (and the terms used for distance calculations) is only
+        # created for entries that will be used.
+        if not ignore:
+            location = Location(latitude=latitude, longitude=longitude)
 
         return HistoryEntry(
-            at=at or dt_util.utcnow(),
+            timestamp=dt_util.utcnow().timestamp() if timestamp is None else timestamp,
             location=location,
             accuracy=_default_no_accuracy(gps_accuracy),
             ignore=ignore,
@@ -132,10 +306,17 @@ class HistoryRegistry:
         Returns:
             A new history entry.
         """
-        return cls._make_entry(change.old_state, at=change.old_state.last_changed)
+        return cls._make_entry(
+            change.old_state,
+            timestamp=change.old_state.last_changed_timestamp,
+        )
 
-    def _prune_items(self, gps_accuracy: float | None) -> None:
-        """Prune items for usability.
+    def _prune_items(  # noqa: PLR0914
+        self,
+        gps_accuracy: float | None,
+        current_time: float,
+    ) -> None:
+        """Clean & prune items for usability.
 
         Items are always kept if:
 
@@ -148,20 +329,42 @@ class HistoryRegistry:
         - They're the first non-expired item that can be used for speed
           calculations even if they have worse accuracy than the given
           `gps_accuracy`.
+
+        Pruning is incremental. Usable items that were kept the last time the
+        items were pruned each have better accuracy than all newer items, so
+        they are ordered from worst to best accuracy. These settled items are
+        never checked individually. Expired items are removed from the end of
+        the list & items without better accuracy than newer items are removed
+        from the start of the settled items. Only the unsettled items at the
+        head of the list (those that were waiting to be usable or have been
+        added since items were last pruned) are cleaned & checked one by one.
         """
-        current_time = dt_util.utcnow()
-        usable_before = current_time - SPEED_USABLE_DELTA
-        expire_time = current_time - HISTORY_EXPIRATION_DELTA
+        usable_before = current_time - _SPEED_USABLE_SECONDS
+        expire_time = current_time - _HISTORY_EXPIRATION_SECONDS
 
+        items = self._items
         have_one_usable = False
+        trace = self.trace
         accuracy_threshold = _default_negative(gps_accuracy)
 
+        # settled items can only be relied on when time moves forward
+        if self._pruned_at is None or current_time < self._pruned_at:
+            self._unsettled = len(items)
+
+        self._pruned_at = current_time
+
+        # expired items are never kept & are at the end of the list
+        while items and items[-1].timestamp <= expire_time:
+            items.pop()
+
+        unsettled = min(self._unsettled, len(items))
         result = []
+        waiting_count = 0
 
-        for index, entry in enumerate(self._items):
-            usable = entry.at <= usable_before
+        for index, entry in enumerate(self._clean(items[:unsettled])):
+            usable = entry.timestamp <= usable_before
             waiting_to_be_usable = not usable
-            expired = entry.at <= expire_time
+            expired = entry.timestamp <= expire_time
             is_accurate = entry.accuracy < accuracy_threshold
             keep = waiting_to_be_usable or (is_accurate and not expired)
 
@@ -175,44 +378,71 @@ class HistoryRegistry:
                 result.append(entry)
                 accuracy_threshold = min(accuracy_threshold, entry.accuracy)
 
-            _LOGGER.debug(
-                "\n"
-                "  [%s]\n"
-                "    usable: %s\n"
-                "    waiting_to_be_usable: %s\n"
-                "    expired: %s\n"
-                "    is_accurate: %s\n"
-                "    have_one_usable: %s\n"
-                "    keep: %s",
-                index,
-                usable,
-                waiting_to_be_usable,
-                expired,
-                is_accurate,
-                have_one_usable,
-                keep,
-            )
-
-        self._items = result
-
-    def _mark_debounced_items(self) -> None:
-        """Mark items that should be debounced.
+                if waiting_to_be_usable:
+                    waiting_count = len(result)
+
+            if trace is not None:
+                trace.record(
+                    "prune",
+                    index,
+                    usable,
+                    expired,
+                    is_accurate,
+                    have_one_usable,
+                    keep,
+                )
+
+        # settled items are usable & not expired, so the first one is kept if
+        # none of the unsettled items were usable. the rest are kept from the
+        # first that's more accurate than all newer items.
+        settled = unsettled
+
+        if not have_one_usable and settled < len(items):
+            entry = items[settled]
+            result.append(entry)
+            accuracy_threshold = min(accuracy_threshold, entry.accuracy)
+            settled += 1
+
+        while settled < len(items) and items[settled].accuracy >= accuracy_threshold:
+            settled += 1
+
+        if trace is not None:
+            trace.record("prune_settled", unsettled, settled, len(items))
+
+        items[:settled] = result
+        self._unsettled = waiting_count
+
+    def _debounce(
+        self,
+        entry: HistoryEntry,
+        prev_entry: HistoryEntry | None,
+    ) -> HistoryEntry:
+        """Mark a new entry for debounce if needed.
 
         Entries that arrive with a very short timeframe of each other are marked
         (and later cleaned out of the working set of items) to work around
         home-assistant/core#126972.
+
+        Only the new entry needs to be checked. Every other entry was checked
+        against the one before it when it was added, and those that were marked
+        have been cleaned out, so none of the remaining entries are within the
+        timeframe of each other.
+
+        Returns:
+            The entry, marked for debounce if needed.
         """
-        result: list[HistoryEntry] = []
-        prev_entry = None
-        for index, entry in enumerate(reversed(self._items)):
-            if prev_entry is not None:
-                delta = entry.at - prev_entry.at
-                _LOGGER.debug("[%s] delta for debounce: %s", index, delta)
-                if delta < DEBOUNCE_UPDATES_DELTA:
-                    entry = replace(entry, debounce=True)
-            result.insert(0, entry)
-            prev_entry = entry
-        self._items = result
+        if prev_entry is None:
+            return entry
+
+        delta = entry.seconds_since(prev_entry.timestamp)
+
+        if self.trace is not None:
+            self.trace.record("debounce", delta)
+
+        if delta < _DEBOUNCE_UPDATES_SECONDS:
+            entry = replace(entry, debounce=True)
+
+        return entry
 
     @staticmethod
     def _clean(items: list[HistoryEntry]) -> list[HistoryEntry]:
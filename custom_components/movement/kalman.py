@@ -0,0 +1,216 @@
+"""Kalman filter for speed estimation."""
+
+from dataclasses import dataclass, replace
+import logging
+import math
+from typing import Final
+
+from .const import HISTORY_EXPIRATION_DELTA, SPEED_USABLE_DELTA
+from .distance import EARTH_RADIUS_KM
+from .types import AbsentNone, HistoryEntry, Location
+
+EARTH_RADIUS_M: Final = EARTH_RADIUS_KM * 1000
+
+# spectral density of the (white noise) acceleration in m²/s³. this allows for
+# the speed to change by roughly 1 m/s over the course of a second.
+KALMAN_ACCELERATION_NOISE: Final = 0.1
+
+# uncertainty (in m/s) of the speed when the filter starts. this is large enough
+# that the first few updates determine the speed.
+KALMAN_INITIAL_SPEED_UNCERTAINTY: Final = 50.0
+
+# uncertainty (in meters) of locations from updates that lack `gps_accuracy`.
+KALMAN_DEFAULT_ACCURACY: Final = 5.0
+
+# clustered updates (those within `SPEED_USABLE_DELTA` of the prior update) are
+# rejected when they are this unlikely given the current state (99.9% for the
+# chi-squared distribution with 2 degrees of freedom). see consideration #2 in
+# `calculate_speed`.
+KALMAN_CLUSTERED_UPDATE_GATE: Final = 13.8
+
+
+_SPEED_USABLE_SECONDS: Final = SPEED_USABLE_DELTA.total_seconds()
+_HISTORY_EXPIRATION_SECONDS: Final = HISTORY_EXPIRATION_DELTA.total_seconds()
+
+_LOGGER = logging.getLogger(__name__)
+_TRACE = 5
+
+
+@dataclass
+class _Axis:
+    """Position & velocity along one axis of the local plane.
+
+    Covariance is stored as the three unique terms of the symmetric 2x2 matrix.
+    """
+
+    position: float
+    velocity: float
+    position_variance: float
+    covariance: float
+    velocity_variance: float
+
+    def predict(self, seconds: float) -> None:
+        """Advance the state using a constant velocity model."""
+        q = KALMAN_ACCELERATION_NOISE
+        self.position += self.velocity * seconds
+        self.position_variance += (
+            2 * seconds * self.covariance
+            + seconds * seconds * self.velocity_variance
+            + q * seconds**3 / 3
+        )
+        self.covariance += seconds * self.velocity_variance + q * seconds**2 / 2
+        self.velocity_variance += q * seconds
+
+    def innovation(self, measurement: float, variance: float) -> float:
+        """Get the squared difference from a measured position.
+
+        Returns:
+            The squared difference normalized by its expected variance.
+        """
+        residual = measurement - self.position
+        return residual * residual / (self.position_variance + variance)
+
+    def correct(self, measurement: float, variance: float) -> None:
+        """Correct the state using a measured position."""
+        innovation_variance = self.position_variance + variance
+        position_gain = self.position_variance / innovation_variance
+        velocity_gain = self.covariance / innovation_variance
+        residual = measurement - self.position
+
+        self.position += position_gain * residual
+        self.velocity += velocity_gain * residual
+        self.velocity_variance -= velocity_gain * self.covariance
+        self.covariance -= position_gain * self.covariance
+        self.position_variance -= position_gain * self.position_variance
+
+
+class KalmanSpeedFilter:
+    """KalmanSpeedFilter class.
+
+    Tracks position & velocity on a plane tangent to the surface of the earth
+    at the most recent filtered location. Each entry is weighted by its
+    `gps_accuracy`, and the cost of adding one is independent of the size of
+    the location history.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        super().__init__()
+        self.reset()
+
+    @property
+    def initialized(self) -> bool:
+        return self._origin is not None
+
+    @property
+    def speed(self) -> float:
+        """Get the estimated speed (in km/h)."""
+        return math.hypot(self._x.velocity, self._y.velocity) * 3.6
+
+    @property
+    def is_confident(self) -> bool:
+        """Check if the speed can be distinguished from GPS inaccuracy.
+
+        Like speeds calculated from history, entries must span at least
+        `SPEED_USABLE_DELTA` & the most recent movement must exceed the
+        combined accuracy of the prior filtered location & the new location.
+        """
+        return (
+            self._at is not None
+            and self._started_at is not None
+            and self._at - self._started_at >= _SPEED_USABLE_SECONDS
+            and self._acceptable_movement
+        )
+
+    def reset(self) -> None:
+        self._origin: Location | None = None
+        self._at: float | None = None
+        self._started_at: float | None = None
+        self._acceptable_movement = False
+        self._x = _Axis(0, 0, 0, 0, 0)
+        self._y = _Axis(0, 0, 0, 0, 0)
+
+    def add_entry(self, entry: HistoryEntry) -> None:
+        """Update the filter with the location from a history entry.
+
+        The filter is restarted when there is no prior state or the prior state
+        has expired (`HISTORY_EXPIRATION_DELTA`).
+        """
+        location = entry.location
+        variance = _default_accuracy(entry.accuracy) ** 2
+
+        assert not isinstance(location, AbsentNone)
+
+        if (
+            self._origin is None
+            or self._at is None
+            or entry.timestamp - self._at > _HISTORY_EXPIRATION_SECONDS
+        ):
+            self._start(entry.timestamp, location, variance)
+            return
+
+        origin = self._origin
+        seconds = entry.seconds_since(self._at)
+        scale = math.pi / 180 * EARTH_RADIUS_M
+        d_long = (location.longitude - origin.longitude + 180) % 360 - 180
+        x = d_long * scale * (origin.cos_latitude + location.cos_latitude) / 2
+        y = (location.latitude - origin.latitude) * scale
+
+        x_axis = replace(self._x)
+        y_axis = replace(self._y)
+        x_axis.predict(seconds)
+        y_axis.predict(seconds)
+
+        if (
+            seconds < _SPEED_USABLE_SECONDS
+            and x_axis.innovation(x, variance) + y_axis.innovation(y, variance)
+            > KALMAN_CLUSTERED_UPDATE_GATE
+        ):
+            _LOGGER.log(_TRACE, "kalman filter rejected clustered update")
+            return
+
+        self._acceptable_movement = math.hypot(x, y) >= math.sqrt(
+            variance,
+        ) + math.sqrt((self._x.position_variance + self._y.position_variance) / 2)
+
+        x_axis.correct(x, variance)
+        y_axis.correct(y, variance)
+        self._x = x_axis
+        self._y = y_axis
+
+        # move the origin of the plane to the filtered location so distortion of
+        # the projection is limited to a single update.
+        self._origin = Location(
+            latitude=origin.latitude + self._y.position / scale,
+            longitude=origin.longitude
+            + self._x.position / (scale * origin.cos_latitude),
+        )
+        self._x.position = 0
+        self._y.position = 0
+        self._at = entry.timestamp
+
+        _LOGGER.log(
+            _TRACE,
+            "kalman filter updated: speed=%s, confident=%s",
+            self.speed,
+            self.is_confident,
+        )
+
+    def _start(
+        self,
+        timestamp: float,
+        location: Location,
+        variance: float,
+    ) -> None:
+        velocity_variance = KALMAN_INITIAL_SPEED_UNCERTAINTY**2
+
+        self._origin = location
+        self._at = timestamp
+        self._started_at = timestamp
+        self._acceptable_movement = False
+        self._x = _Axis(0, 0, variance, 0, velocity_variance)
+        self._y = _Axis(0, 0, variance, 0, velocity_variance)
+
+
+def _default_accuracy(value: float) -> float:
+    return KALMAN_DEFAULT_ACCURACY if value == HistoryEntry.NO_ACCURACY else value
@@ -0,0 +1,96 @@
+"""Streaming quantiles with bounded memory."""
+
+import math
+from typing import Final
+
+QUANTILE_RELATIVE_ACCURACY: Final = 0.01
+QUANTILE_MIN_VALUE: Final = 0.01
+QUANTILE_BUCKETS: Final = 1024
+
+
+class QuantileSketch:
+    """QuantileSketch class.
+
+    Counts values in buckets whose bounds grow geometrically, so any quantile
+    is within a fixed relative accuracy of the exact value (the same approach
+    as DDSketch). Values at or below the minimum value share the first bucket
+    & are reported as 0, and values beyond the last bucket are counted in it.
+
+    Counts are kept in a Fenwick tree, so values can be both added & removed
+    (as they leave a window) & the bucket for a rank can be found in
+    `O(log k)` for `k` buckets. The memory used is fixed by the number of
+    buckets, not by the number of values.
+    """
+
+    def __init__(
+        self,
+        relative_accuracy: float = QUANTILE_RELATIVE_ACCURACY,
+        min_value: float = QUANTILE_MIN_VALUE,
+        buckets: int = QUANTILE_BUCKETS,
+    ) -> None:
+        """Initialize."""
+        super().__init__()
+        gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(gamma)
+        self._log_min_value = math.log(min_value)
+        self._min_value = min_value
+        self._gamma = gamma
+        self._tree = [0] * (buckets + 1)
+        self._top = 1 << (buckets.bit_length() - 1)
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        self._update(self._bucket(value), 1)
+
+    def remove(self, value: float) -> None:
+        """Remove a value that was previously added."""
+        self._update(self._bucket(value), -1)
+
+    def quantile(self, q: float) -> float | None:
+        """Get a quantile of the values.
+
+        Args:
+            q: The quantile (from 0 to 1).
+
+        Returns:
+            The approximate value at the quantile or `None` if there are no
+            values.
+        """
+        if not self.count:
+            return None
+
+        # find the bucket of the value at the rank using the tree: the largest
+        # position whose prefix count does not include the value.
+        rank = int(q * (self.count - 1))
+        tree = self._tree
+        position = 0
+        step = self._top
+
+        while step:
+            if (following := position + step) < len(tree) and tree[following] <= rank:
+                position = following
+                rank -= tree[following]
+            step >>= 1
+
+        if not position:
+            return 0
+
+        # the middle of the bucket (relative to its bounds).
+        return self._min_value * self._gamma**position * 2 / (self._gamma + 1)
+
+    def _bucket(self, value: float) -> int:
+        if value <= self._min_value:
+            return 0
+
+        index = math.ceil((math.log(value) - self._log_min_value) / self._log_gamma)
+
+        return min(index, len(self._tree) - 2)
+
+    def _update(self, bucket: int, delta: int) -> None:
+        tree = self._tree
+        position = bucket + 1
+        self.count += delta
+
+        while position < len(tree):
+            tree[position] += delta
+            position += position & -position
@@ -0,0 +1,106 @@
+"""Retention of registry entries."""
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any, Final, Self
+
+from .const import (
+    CONF_RETENTION_MAX_AGE,
+    CONF_RETENTION_MAX_ENTRIES,
+    CONF_RETENTION_MAX_SIZE,
+    HISTORY_EXPIRATION_DELTA,
+    SPEED_USABLE_DELTA,
+)
+
+# the approximate memory (in bytes) used by each entry, including the objects
+# that it refers to & the registry's reference to it.
+HISTORY_ENTRY_BYTES: Final = 256
+TRANSITION_ENTRY_BYTES: Final = 104
+
+# a registry always keeps enough entries to have a prior entry.
+RETENTION_ENTRIES_MIN: Final = 2
+RETENTION_ENTRIES_MAX: Final = 10_000
+
+# entries are used to calculate speed until they expire, so a shorter max age
+# would remove every entry that could be used.
+RETENTION_MAX_AGE_MIN: Final = max(HISTORY_EXPIRATION_DELTA, SPEED_USABLE_DELTA)
+
+
+@dataclass(frozen=True, slots=True)
+class RetentionPolicy:
+    """Limits on the entries kept by a registry.
+
+    When a registry exceeds any of the limits, its oldest entries are evicted
+    first.
+    """
+
+    max_entries: int
+    max_age: float | None = None  # seconds
+    max_bytes: int | None = None
+
+    @classmethod
+    def from_config(cls, data: Mapping[str, Any], *, max_entries: int) -> Self:
+        """Create a policy from config entry data.
+
+        Configured values outside of the allowed range (i.e. from before the
+        range was enforced) are limited to it.
+
+        Args:
+            data: The config entry data.
+            max_entries: The maximum number of entries when it's not configured.
+
+        Returns:
+            The policy.
+        """
+        max_age = data.get(CONF_RETENTION_MAX_AGE) or None
+        max_size = data.get(CONF_RETENTION_MAX_SIZE) or None
+
+        return cls(
+            max_entries=min(
+                int(data.get(CONF_RETENTION_MAX_ENTRIES, max_entries)),
+                RETENTION_ENTRIES_MAX,
+            ),
+            max_age=(
+                None
+                if max_age is None
+                else max(max_age * 60, RETENTION_MAX_AGE_MIN.total_seconds())
+            ),
+            max_bytes=None if max_size is None else int(max_size * 1024),
+        )
+
+    def max_count(self, entry_bytes: int) -> int:
+        """Get the number of entries that can be kept.
+
+        Args:
+            entry_bytes: The approximate size of each entry.
+
+        Returns:
+            The maximum number of entries.
+        """
+        count = self.max_entries
+
+        if self.max_bytes is not None:
+            count = min(count, self.max_bytes // entry_bytes)
+
+        return max(count, RETENTION_ENTRIES_MIN)
+
+
+@dataclass
+class RetentionCounters:
+    """Eviction & peak size counts for a registry."""
+
+    entry_bytes: int
+    evicted: int = 0
+    peak_entries: int = 0
+
+    def record(self, entries: int, evicted: int = 0) -> None:
+        """Record the size of a registry after entries were evicted."""
+        self.evicted += evicted
+        self.peak_entries = max(self.peak_entries, entries)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "evicted": self.evicted,
+            "peak_entries": self.peak_entries,
+            "peak_bytes": self.peak_entries * self.entry_bytes,
+        }
@@ -44,6 +44,7 @@ from .const import (
     MAX_RESTORE_TRANSITION,
 )
 from .coordinator import MovementUpdateCoordinator
+from .store import decode_history, encode_history
 from .types import (
     HistoryEntry,
     ModeOfTransit,
@@ -92,9 +93,13 @@ def _set_coordinator_data(
 ) -> None:
     history = data.pop("history", [])
     transition = data.pop("transition", None)
+
+    # history is stored as columns, but was a list of entries in prior versions
     coordinator.inject_data(
         MovementData.from_dict(data),
-        history=[*map(HistoryEntry.from_dict, history)],
+        history=decode_history(history)
+        if isinstance(history, dict)
+        else [*map(HistoryEntry.from_dict, history)],
         transition=transition and [*map(TransitionEntry.from_dict, transition)],
     )
 
@@ -126,10 +131,9 @@ SENSOR_TYPES: tuple[SensorEntityDescription, ...] = (
         restore_data_fn=lambda data, coordinator: (
             {
                 **data.as_dict(),
-                "history": [
-                    item.as_dict()
-                    for item in coordinator.history.items[:MAX_RESTORE_HISTORY]
-                ],
+                "history": encode_history(
+                    coordinator.history.items[:MAX_RESTORE_HISTORY],
+                ),
                 "transition": [
                     item.as_dict()
                     for item in coordinator.transition.items[:MAX_RESTORE_TRANSITION]
@@ -235,6 +239,7 @@ SENSOR_TYPES: tuple[SensorEntityDescription, ...] = (
             {
                 "speed_recent_avg": coordinator.statistics.speed_recent_avg.value,
                 "speed_recent_max": coordinator.statistics.speed_recent_max.value,
+                "speed_recent_p95": coordinator.statistics.speed_recent_p95.value,
             }
         ),
         device_class=SensorDeviceClass.SPEED,
@@ -0,0 +1,111 @@
+"""Stationary detection for location history."""
+
+import math
+from typing import Final
+
+from .distance import haversine_cached
+from .types import AbsentNone, HistoryEntry, Location
+
+# distances are bounded using `haversine`, so this allows for the (much
+# smaller) differences of the other distance engines at short range.
+STATIONARY_DISTANCE_MARGIN: Final = 1.01
+
+
+class StationaryCell:
+    """StationaryCell class.
+
+    Tracks the cell around an anchor location that contains every entry added
+    since the anchor was set, along with the radius of the cell & the range of
+    accuracies of those entries.
+
+    Distance is a metric, so an entry that is `d` from the anchor is at most
+    `d + radius` from every other entry in the cell. When that is less than the
+    combined accuracy of the entry & the most accurate entry of the cell, the
+    movement from every other entry is within the accuracy of the locations,
+    i.e. the entry is within the accuracy envelope of the cell, without having
+    to calculate the distance to each of them.
+
+    An entry outside of the envelope becomes the anchor of a new cell.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        super().__init__()
+        self._anchor: Location | None = None
+        self._since = math.inf
+        self._latest = -math.inf
+        self._radius = 0.0
+        self._min_accuracy = math.inf
+        self._max_accuracy = -math.inf
+
+    def add(self, entry: HistoryEntry) -> bool:
+        """Add an entry to the cell.
+
+        Entries without a location are never used for calculations, so they
+        are not added.
+
+        Returns:
+            A flag indicating if the entry is within the envelope of the cell.
+        """
+        location = entry.location
+
+        if not location or isinstance(location, AbsentNone):
+            return False
+
+        # entries are only members of the cell if they were added in order, so
+        # that all (and only) members are at least as new as the anchor.
+        in_order = entry.timestamp > self._latest
+        self._latest = max(self._latest, entry.timestamp)
+
+        if not in_order:
+            self._anchor = None
+            return False
+
+        if self._anchor is None:
+            self._set_anchor(entry, location)
+            return False
+
+        distance = haversine_cached(self._anchor, location)
+        accuracy = entry.accuracy
+        contained = (
+            self._max_accuracy + accuracy < HistoryEntry.NO_ACCURACY
+            and (distance + self._radius) * 1000 * STATIONARY_DISTANCE_MARGIN
+            < self._min_accuracy + accuracy
+        )
+
+        if contained:
+            self._radius = max(self._radius, distance)
+            self._min_accuracy = min(self._min_accuracy, accuracy)
+            self._max_accuracy = max(self._max_accuracy, accuracy)
+        else:
+            self._set_anchor(entry, location)
+
+        return contained
+
+    def contains(self, entry: HistoryEntry) -> bool:
+        """Check if an entry was added to the cell.
+
+        Returns:
+            A flag indicating if the entry is a member of the cell.
+        """
+        return self._anchor is not None and entry.timestamp >= self._since
+
+    def reset(self, entries: list[HistoryEntry]) -> None:
+        """Rebuild the cell from existing entries.
+
+        Args:
+            entries: The entries ordered newest first.
+        """
+        self._anchor = None
+        self._since = math.inf
+        self._latest = -math.inf
+
+        for entry in reversed(entries):
+            self.add(entry)
+
+    def _set_anchor(self, entry: HistoryEntry, location: Location) -> None:
+        self._anchor = location
+        self._since = entry.timestamp
+        self._radius = 0.0
+        self._min_accuracy = entry.accuracy
+        self._max_accuracy = entry.accuracy
@@ -6,27 +6,30 @@ from collections import deque
 from collections.abc import Callable
 from datetime import timedelta
 import logging
+import math
+import operator
 import time
 
 from homeassistant.core import CALLBACK_TYPE
 from homeassistant.util import dt as dt_util
 
+from .quantile import QuantileSketch
+
 _LOGGER = logging.getLogger(__name__)
 
 
-def _stat_average_linear(states: deque[float], ages: deque[float]) -> float | None:
+def _stat_average_linear(stat: Statistic) -> float | None:
+    states = stat.states
     if len(states) == 1:
         return states[0]
     if len(states) >= 2:
-        area: float = 0
-        for i in range(1, len(states)):
-            area += 0.5 * (states[i] + states[i - 1]) * (ages[i] - ages[i - 1])
-        age_range_seconds = ages[-1] - ages[0]
-        return area / age_range_seconds
+        age_range_seconds = stat.ages[-1] - stat.ages[0]
+        return stat.area / age_range_seconds
     return None
 
 
-def _stat_change_second(states: deque[float], ages: deque[float]) -> float | None:
+def _stat_change_second(stat: Statistic) -> float | None:
+    states, ages = stat.states, stat.ages
     if len(states) > 1:
         age_range_seconds = ages[-1] - ages[0]
         if age_range_seconds > 0:
@@ -34,23 +37,49 @@ def _stat_change_second(states: deque[float], ages: deque[float]) -> float | Non
     return None
 
 
-def _stat_value_max(
-    states: deque[float],
-    ages: deque[float],  # noqa: ARG001
-) -> float | None:
-    if len(states) > 0:
-        return max(states)
-    return None
+def _stat_decayed_average(stat: Statistic) -> float | None:
+    return stat.decayed_average
+
+
+def _stat_decayed_rate(stat: Statistic) -> float | None:
+    return stat.decayed_rate
+
+
+def _stat_percentile(stat: Statistic) -> float | None:
+    return stat.quantile
+
+
+def _stat_value_extreme(stat: Statistic) -> float | None:
+    return stat.extreme
 
 
 STAT_AVERAGE_LINEAR = "average_linear"
 STAT_CHANGE_SECOND = "change_second"
+STAT_DECAYED_AVERAGE = "decayed_average"
+STAT_DECAYED_RATE = "decayed_rate"
+STAT_PERCENTILE = "percentile"
 STAT_VALUE_MAX = "value_max"
+STAT_VALUE_MIN = "value_min"
 
 STATS_NUMERIC_SUPPORT = {
     STAT_AVERAGE_LINEAR: _stat_average_linear,
     STAT_CHANGE_SECOND: _stat_change_second,
-    STAT_VALUE_MAX: _stat_value_max,
+    STAT_DECAYED_AVERAGE: _stat_decayed_average,
+    STAT_DECAYED_RATE: _stat_decayed_rate,
+    STAT_PERCENTILE: _stat_percentile,
+    STAT_VALUE_MAX: _stat_value_extreme,
+    STAT_VALUE_MIN: _stat_value_extreme,
+}
+
+# characteristics that are calculated without keeping the states.
+_DECAYED_CHARACTERISTICS = {STAT_DECAYED_AVERAGE, STAT_DECAYED_RATE}
+
+# for characteristics that are the extreme of the states, a new state replaces
+# the existing candidates that it dominates, i.e. that can no longer be the
+# extreme while it remains in the window.
+_EXTREME_DOMINATES: dict[str, Callable[[float, float], bool]] = {
+    STAT_VALUE_MAX: operator.ge,
+    STAT_VALUE_MIN: operator.le,
 }
 
 
@@ -65,19 +94,43 @@ class Statistic:
         state_characteristic: str,
         samples_max_buffer_size: int | None,
         samples_max_age: timedelta | None,
+        percentile: int = 50,
     ) -> None:
-        """Initialize the Statistic."""
+        """Initialize the Statistic.
+
+        Raises:
+            ValueError: If a decayed characteristic is given without a max age.
+        """
         self._state_characteristic: str = state_characteristic
+        self._percentile = percentile
         self._samples_max_age: float | None = (
             samples_max_age.total_seconds() if samples_max_age else None
         )
         self._value: float | None = None
+        self._dirty = True
 
         self.states: deque[float | bool] = deque(maxlen=samples_max_buffer_size)
         self.ages: deque[float] = deque(maxlen=samples_max_buffer_size)
+        self._area: float = 0
+        self._added = 0
+        self._dominates = _EXTREME_DOMINATES.get(state_characteristic)
+        self._extremes: deque[tuple[int, float]] = deque()
+        self._sketch = (
+            QuantileSketch() if state_characteristic == STAT_PERCENTILE else None
+        )
+        self._decayed = state_characteristic in _DECAYED_CHARACTERISTICS
+        self._decayed_average: float | None = None
+        self._decayed_rate: float | None = None
+        self._last_state: float | None = None
+        self._last_timestamp: float | None = None
+        self._updated_at: float | None = None
+
+        if self._decayed and self._samples_max_age is None:
+            msg = f"{state_characteristic} requires samples_max_age"
+            raise ValueError(msg)
 
         self._state_characteristic_fn: Callable[
-            [deque[float], deque[float]],
+            [Statistic],
             float | None,
         ] = STATS_NUMERIC_SUPPORT[state_characteristic]
 
@@ -87,15 +140,122 @@ class Statistic:
     def value(self) -> float | None:
         return self._value
 
+    @property
+    def area(self) -> float:
+        """Get the area under the states (linearly interpolated) over time.
+
+        The area is kept as states are added & removed, so it doesn't need to
+        be summed over all of the states.
+        """
+        return self._area
+
+    @property
+    def extreme(self) -> float | None:
+        """Get the maximum (or minimum) of the states.
+
+        This is only available for the `value_max` & `value_min`
+        characteristics. The candidates for the extreme are kept in a deque
+        (along with the index of their state) in monotonic order, so the
+        extreme is always the first of them & it's removed when its state is.
+        """
+        return self._extremes[0][1] if self._extremes else None
+
+    @property
+    def quantile(self) -> float | None:
+        """Get the configured percentile of the states.
+
+        This is only available for the `percentile` characteristic. The states
+        are also counted in a `QuantileSketch` as they're added & removed, so
+        the percentile is approximate (within 1%) but never needs the states to
+        be sorted.
+        """
+        if self._sketch is None:
+            return None
+
+        return self._sketch.quantile(self._percentile / 100)
+
+    @property
+    def decayed_average(self) -> float | None:
+        """Get the time-decayed average of the states.
+
+        This is only available for the `decayed_average` characteristic. Each
+        state is averaged in (linearly from the prior state, like
+        `average_linear`) with a weight that decays exponentially with time.
+        The time constant is half of the max age, so the weights have the same
+        average age as a window of the max age. Like a window, there is no
+        value once the newest state has reached the max age (which is also
+        when the next purge is scheduled).
+        """
+        if self._is_decayed_state_expired():
+            return None
+
+        return self._decayed_average
+
+    @property
+    def decayed_rate(self) -> float | None:
+        """Get the time-decayed rate of change (per second) of the states.
+
+        This is only available for the `decayed_rate` characteristic. The rate
+        between each state & the prior state is averaged in with a weight that
+        decays (as for `decayed_average`), and there's no change after the
+        newest state, so the rate also decays until the time of the update.
+        """
+        if self._decayed_rate is None or self._is_decayed_state_expired():
+            return None
+
+        assert self._last_timestamp is not None
+        assert self._updated_at is not None
+
+        return self._decayed_rate * self._decay(
+            self._updated_at - self._last_timestamp,
+        )
+
     def add_state(self, state: float, timestamp: float) -> None:
-        """Add the state to the queue."""
+        """Add the state to the queue.
+
+        Decayed characteristics are updated from the state, but don't keep it.
+        """
+        self._dirty = True
+
+        if self._decayed:
+            self._add_decayed_state(state, timestamp)
+            self.update(timestamp)
+            return
+
+        if len(self.states) == self.states.maxlen:
+            self._remove_oldest_state()
+
+        if self.states:
+            self._area += _trapezoid(self.states[-1], self.ages[-1], state, timestamp)
+
+        if (dominates := self._dominates) is not None:
+            extremes = self._extremes
+            while extremes and dominates(state, extremes[-1][1]):
+                extremes.pop()
+            extremes.append((self._added, state))
+
+        if self._sketch is not None:
+            self._sketch.add(state)
+
+        self._added += 1
         self.states.append(state)
         self.ages.append(timestamp)
-        self.update()
+        self.update(timestamp)
 
-    def update(self) -> None:
-        """Get the latest value and updates the states."""
-        self._async_purge_and_update()
+    def update(self, now_timestamp: float | None = None) -> None:
+        """Get the latest value and updates the states.
+
+        States are purged based on their age as of `now_timestamp` (which
+        defaults to the current time).
+
+        The value is only recalculated when states have been added or purged
+        since it was last calculated (or for decayed characteristics, which
+        also depend on the time of the update), so updating is constant time
+        when nothing has changed.
+        """
+        self._async_purge_and_update(
+            time.time() if now_timestamp is None else now_timestamp,
+        )
 
     def next_to_purge_timestamp(self) -> float | None:
         """Find the timestamp when the next purge would occur.
@@ -103,6 +263,15 @@ class Statistic:
         Returns:
             The next purge timestamp.
         """
+        if self._decayed:
+            # decayed characteristics keep no states, so the only purge is the
+            # expiry of the newest state.
+            if self._last_timestamp is None or self._is_decayed_state_expired():
+                return None
+
+            assert self._samples_max_age is not None
+            return self._last_timestamp + self._samples_max_age
+
         if self.ages and self._samples_max_age:
             # Take the oldest entry from the ages list and add the configured max_age.
             # If executed after purging old states, the result is the next timestamp
@@ -110,9 +279,8 @@ class Statistic:
             return self.ages[0] + self._samples_max_age
         return None
 
-    def _purge_old_states(self, max_age: float) -> None:
+    def _purge_old_states(self, max_age: float, now_timestamp: float) -> None:
         """Remove states which are older than a given age."""
-        now_timestamp = time.time()
         debug = _LOGGER.isEnabledFor(logging.DEBUG)
 
         if debug:  # pragma: no branch
@@ -131,23 +299,85 @@ class Statistic:
                     dt_util.as_local(dt_util.utc_from_timestamp(self.ages[0])),
                     dt_util.utc_from_timestamp(now_timestamp - self.ages[0]),
                 )
-            self.ages.popleft()
-            self.states.popleft()
+            self._remove_oldest_state()
 
-    def _async_purge_and_update(self) -> None:
+    def _add_decayed_state(self, state: float, timestamp: float) -> None:
+        prior_state = self._last_state
+        prior_timestamp = self._last_timestamp
+        self._last_state = state
+        self._last_timestamp = timestamp
+
+        if prior_state is None or prior_timestamp is None:
+            self._decayed_average = state
+            return
+
+        elapsed = timestamp - prior_timestamp
+
+        if elapsed <= 0:
+            return
+
+        weight = 1 - self._decay(elapsed)
+        rate = (state - prior_state) / elapsed
+
+        assert self._decayed_average is not None
+        self._decayed_average += weight * (
+            0.5 * (state + prior_state) - self._decayed_average
+        )
+        self._decayed_rate = (
+            rate
+            if self._decayed_rate is None
+            else self._decayed_rate + weight * (rate - self._decayed_rate)
+        )
+
+    def _decay(self, elapsed: float) -> float:
+        assert self._samples_max_age is not None
+        return math.exp(-max(elapsed, 0) / (self._samples_max_age / 2))
+
+    def _is_decayed_state_expired(self) -> bool:
+        if self._last_timestamp is None or self._updated_at is None:
+            return True
+
+        assert self._samples_max_age is not None
+        return (self._updated_at - self._last_timestamp) >= self._samples_max_age
+
+    def _remove_oldest_state(self) -> None:
+        self._dirty = True
+
+        if self._extremes and self._extremes[0][0] == self._added - len(self.states):
+            self._extremes.popleft()
+
+        state = self.states.popleft()
+        age = self.ages.popleft()
+
+        if self._sketch is not None:
+            self._sketch.remove(state)
+
+        # the area is reset with the last state to keep errors from building up
+        # as the area is repeatedly added to & subtracted from.
+        if len(self.states) > 1:
+            self._area -= _trapezoid(state, age, self.states[0], self.ages[0])
+        else:
+            self._area = 0
+
+    def _async_purge_and_update(self, now_timestamp: float) -> None:
         """Purge old states and update the value."""
         _LOGGER.debug("%s: updating statistics", self._state_characteristic)
-        if self._samples_max_age is not None:
-            self._purge_old_states(self._samples_max_age)
+        self._updated_at = now_timestamp
+        if (
+            purge_timestamp := self.next_to_purge_timestamp()
+        ) is not None and now_timestamp > purge_timestamp:
+            assert self._samples_max_age is not None
+            self._purge_old_states(self._samples_max_age, now_timestamp)
 
-        self._update_value()
+        if self._dirty or self._decayed:
+            self._update_value()
 
     def _update_value(self) -> None:
         """Front to call the right statistical characteristics functions.
 
         One of the _stat_*() functions is represented by self._state_characteristic_fn().
         """
-        value = self._state_characteristic_fn(self.states, self.ages)
+        value = self._state_characteristic_fn(self)
         _LOGGER.debug(
             "%s: updating value: states: %s, ages: %s => %s",
             self._state_characteristic,
@@ -156,3 +386,8 @@ class Statistic:
             value,
         )
         self._value = value
+        self._dirty = False
+
+
+def _trapezoid(state0: float, age0: float, state1: float, age1: float) -> float:
+    return 0.5 * (state1 + state0) * (age1 - age0)
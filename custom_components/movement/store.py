@@ -0,0 +1,203 @@
+"""Persistent storage for location history."""
+
+from collections.abc import Sequence
+import datetime as dt
+from typing import Any, Final, NamedTuple
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+from .types import (
+    ABSENT_FALSE,
+    ABSENT_NONE,
+    AbsentNone,
+    HistoryEntry,
+    Location,
+    TransitionEntry,
+)
+
+STORAGE_VERSION: Final = 1
+
+# the longest time between an update & the write that stores it. all updates
+# within this time are written together.
+STORAGE_SAVE_DELAY: Final = dt.timedelta(minutes=1)
+
+
+class StoredHistory(NamedTuple):
+    """Entries loaded from a `HistoryStore`."""
+
+    history: list[HistoryEntry]
+    transition: list[TransitionEntry] | None
+
+
+class HistoryStore(Store[dict[str, Any]]):
+    """HistoryStore class.
+
+    Stores the full history & transition entries of a config entry. Entries are
+    stored as columns of plain values rather than a dict per entry, which keeps
+    the file small & avoids parsing timestamps when loading.
+
+    Writes happen in the background. The first update after a write schedules
+    the next one `STORAGE_SAVE_DELAY` later, and later updates only replace the
+    entries that it will write, so a burst of updates results in a single
+    write. Any pending write is completed when Home Assistant stops.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize."""
+        super().__init__(
+            hass,
+            STORAGE_VERSION,
+            f"{DOMAIN}.{entry_id}",
+            atomic_writes=True,
+        )
+        self._snapshot: StoredHistory | None = None
+
+    async def async_load_entries(self) -> StoredHistory | None:
+        """Load the stored entries.
+
+        Returns:
+            The entries or `None` if nothing has been stored.
+        """
+        if (data := await self.async_load()) is None:
+            return None
+
+        return StoredHistory(
+            history=decode_history(data["history"]),
+            transition=_decode_transition(data["transition"]),
+        )
+
+    @callback
+    def async_schedule_save(
+        self,
+        history: Sequence[HistoryEntry],
+        transition: Sequence[TransitionEntry] | None,
+    ) -> None:
+        """Schedule a write of the entries.
+
+        Entries are immutable, so the sequences are copied (which is cheap) &
+        encoded later in the executor when the write happens.
+        """
+        self._snapshot = StoredHistory(
+            history=list(history),
+            transition=None if transition is None else list(transition),
+        )
+
+        # `async_delay_save` postpones a pending write each time it is called,
+        # so it is only called once per write to keep a steady stream of
+        # updates from postponing it indefinitely.
+        if self._delay_handle is None:
+            self.async_delay_save(
+                self._encode_snapshot,
+                STORAGE_SAVE_DELAY.total_seconds(),
+            )
+
+    async def async_flush(self) -> None:
+        """Write any entries that have not yet been written."""
+        if self._delay_handle is not None:
+            await self.async_save(self._encode_snapshot())
+
+    def _encode_snapshot(self) -> dict[str, Any]:
+        snapshot = self._snapshot
+
+        assert snapshot is not None
+
+        return {
+            "history": encode_history(snapshot.history),
+            "transition": _encode_transition(snapshot.transition),
+        }
+
+
+def encode_history(entries: Sequence[HistoryEntry]) -> dict[str, list[Any]]:
+    """Encode history entries as columns of plain values.
+
+    Returns:
+        A column of values for each field of the entries.
+    """
+    locations = [
+        entry.location if isinstance(entry.location, Location) else None
+        for entry in entries
+    ]
+
+    return {
+        "at": [entry.timestamp for entry in entries],
+        "latitude": [location and location.latitude for location in locations],
+        "longitude": [location and location.longitude for location in locations],
+        "accuracy": [
+            None if entry.accuracy == HistoryEntry.NO_ACCURACY else entry.accuracy
+            for entry in entries
+        ],
+        "ignore": [entry.ignore or None for entry in entries],
+        "debounce": [bool(entry.debounce) for entry in entries],
+    }
+
+
+def decode_history(data: dict[str, list[Any]]) -> list[HistoryEntry]:
+    """Decode history entries from `encode_history`.
+
+    Returns:
+        The history entries.
+    """
+    entries: list[HistoryEntry] = []
+    location: Location | AbsentNone
+
+    for at, latitude, longitude, accuracy, ignore, debounce in zip(
+        data["at"],
+        data["latitude"],
+        data["longitude"],
+        data["accuracy"],
+        data["ignore"],
+        data["debounce"],
+        strict=True,
+    ):
+        if latitude is None:
+            location = ABSENT_NONE
+        else:
+            location = Location(latitude=latitude, longitude=longitude)
+
+        entries.append(
+            HistoryEntry(
+                timestamp=at,
+                location=location,
+                accuracy=HistoryEntry.NO_ACCURACY if accuracy is None else accuracy,
+                ignore=ABSENT_NONE if ignore is None else ignore,
+                debounce=debounce or ABSENT_FALSE,
+            ),
+        )
+
+    return entries
+
+
+def _encode_transition(
+    entries: Sequence[TransitionEntry] | None,
+) -> dict[str, list[Any]] | None:
+    if entries is None:
+        return None
+
+    return {
+        "distance": [entry.distance for entry in entries],
+        "adjustments": [
+            None if entry.adjustments is ABSENT_NONE else entry.adjustments
+            for entry in entries
+        ],
+    }
+
+
+def _decode_transition(
+    data: dict[str, list[Any]] | None,
+) -> list[TransitionEntry] | None:
+    if data is None:
+        return None
+
+    return [
+        TransitionEntry(
+            distance=distance,
+            adjustments=ABSENT_NONE if adjustments is None else adjustments,
+        )
+        for distance, adjustments in zip(
+            data["distance"],
+            data["adjustments"],
+            strict=True,
+        )
+    ]
@@ -0,0 +1,41 @@
+"""Helper to trace calculations."""
+
+from collections import deque
+
+TRACE_BUFFER_SIZE = 500
+
+type TraceValue = str | float | bool
+
+
+class TraceBuffer:
+    """TraceBuffer class.
+
+    A fixed-size buffer of compact trace records from calculations that run for
+    every history entry on each update. Records are tuples of an event name
+    followed by its values, and the oldest records are dropped once the buffer
+    is full.
+
+    Code that records to a trace accepts `None` when tracing is disabled so
+    that a single check is all that's needed to skip the work entirely.
+    """
+
+    def __init__(self, size: int = TRACE_BUFFER_SIZE) -> None:
+        """Initialize."""
+        super().__init__()
+        self._records: deque[tuple[TraceValue, ...]] = deque(maxlen=size)
+
+    @property
+    def records(self) -> list[tuple[TraceValue, ...]]:
+        return list(self._records)
+
+    def record(self, event: str, *values: TraceValue) -> None:
+        """Add a record to the trace."""
+        self._records.append((event, *values))
+
+    def as_list(self) -> list[list[TraceValue]]:
+        """Convert the trace to a list for diagnostics.
+
+        Returns:
+            A list of records, each a list of the event name & its values.
+        """
+        return [list(record) for record in self._records]
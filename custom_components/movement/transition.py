@@ -5,6 +5,7 @@ from contextlib import contextmanager
 import logging
 
 from . import calculations as calc
+from .retention import TRANSITION_ENTRY_BYTES, RetentionCounters, RetentionPolicy
 from .types import ABSENT_NONE, MovementConfigEntry, MovementData, TransitionEntry
 
 TRANSITION_ENTRIES_MAX = 1000
@@ -15,7 +16,12 @@ _TRACE = 5
 
 
 class TransitionRegistry:
-    """TransitionRegistry class."""
+    """TransitionRegistry class.
+
+    The entries are constrained by the retention policy configured for the
+    config entry. Transition entries have no time, so only the maximum number
+    of entries & the size limit of the policy apply.
+    """
 
     def __init__(  # noqa: D417
         self,
@@ -45,10 +51,43 @@ class TransitionRegistry:
 
         spread(*args, **kwargs)
 
+        self.retention = RetentionPolicy.from_config(
+            self._config_entry.data,
+            max_entries=TRANSITION_ENTRIES_MAX,
+        )
+        self.retention_counters = RetentionCounters(TRANSITION_ENTRY_BYTES)
+        self._max_count = self.retention.max_count(TRANSITION_ENTRY_BYTES)
+
+        self._pending_count = 0
+        self._pending_distance: float = 0
+        self._finalized_distance: float = 0
+        self._finalized_adjustments: float = 0
+        self._recalculate_totals()
+
     @property
     def items(self) -> list[TransitionEntry] | None:
         return self._items
 
+    @property
+    def pending_count(self) -> int:
+        """Get the number of pending entries (those without `adjustments`)."""
+        return self._pending_count
+
+    @property
+    def pending_distance(self) -> float:
+        """Get the total distance of the pending entries."""
+        return self._pending_distance
+
+    @property
+    def finalized_distance(self) -> float:
+        """Get the total distance (including adjustments) of finalized entries."""
+        return self._finalized_distance
+
+    @property
+    def finalized_adjustments(self) -> float:
+        """Get the total adjustments of the finalized entries."""
+        return self._finalized_adjustments
+
     @property
     def prior(self) -> list[TransitionEntry] | None:
         if not self._prior_valid:
@@ -61,6 +100,7 @@ class TransitionRegistry:
         self._items = items
         self._prior = None
         self._prior_valid = False
+        self._recalculate_totals()
 
     @contextmanager
     def update_pending(self, *, noop_update_on_exit: bool = False) -> Generator[None]:
@@ -93,7 +133,8 @@ class TransitionRegistry:
         _LOGGER.debug("adjustments calculated as %s", result)
         _LOGGER.debug("transition calculated as %s", self._items)
 
-        self._items = self._items and self._items[:TRANSITION_ENTRIES_MAX]
+        self._evict_items()
+
         self._post_update()
 
         return result
@@ -106,10 +147,15 @@ class TransitionRegistry:
         """
         entries = self._items
 
-        if entries:
-            entries = [item for item in entries if item.adjustments == ABSENT_NONE]
+        # entries only need to be filtered when some have been finalized, and
+        # only entries that are filtered down to nothing are cleared (an empty
+        # list is kept).
+        if entries and self._pending_count < len(entries):
+            entries = [item for item in entries if item.adjustments is ABSENT_NONE]
+            self._finalized_distance = 0
+            self._finalized_adjustments = 0
 
-            if not len(entries):
+            if not entries:
                 entries = None
 
         _LOGGER.debug(
@@ -128,8 +174,11 @@ class TransitionRegistry:
         """
         self._items = self._items or []
 
+        # the list may be shared with `prior`, so a new one is created.
         if update.distance > 0:
-            self._items.append(TransitionEntry(distance=update.distance))
+            self._items = [*self._items, TransitionEntry(distance=update.distance)]
+            self._pending_count += 1
+            self._pending_distance += update.distance
 
     def _finalize_pending_entries(self, update: MovementData) -> None:
         """Finalize pending entries.
@@ -144,6 +193,11 @@ class TransitionRegistry:
 
         if mode and entries:
             new_entries: list[TransitionEntry] = []
+            self._pending_count = 0
+            self._pending_distance = 0
+            self._finalized_distance = 0
+            self._finalized_adjustments = 0
+
             for transition_entry in entries or []:
                 new_adjustments = calc.calculate_distance_adjustments(
                     distance=transition_entry.distance,
@@ -154,12 +208,13 @@ class TransitionRegistry:
                     config_entry=self._config_entry,
                 )
 
-                new_entries.append(
-                    TransitionEntry(
-                        distance=transition_entry.distance + new_adjustments,
-                        adjustments=new_adjustments,
-                    ),
+                new_entry = TransitionEntry(
+                    distance=transition_entry.distance + new_adjustments,
+                    adjustments=new_adjustments,
                 )
+                new_entries.append(new_entry)
+                self._finalized_distance += new_entry.distance
+                self._finalized_adjustments += new_adjustments
             entries = new_entries
 
         self._items = entries
@@ -170,11 +225,34 @@ class TransitionRegistry:
         Returns:
             The new adjustments.
         """
-        return update.adjustments + sum(
-            item.adjustments
-            for item in (self._items or [])
-            if item.adjustments != ABSENT_NONE
-        )
+        return update.adjustments + self._finalized_adjustments
+
+    def _evict_items(self) -> None:
+        """Evict the oldest items beyond the limits of the retention policy."""
+        count = len(self._items or [])
+        evicted = max(count - self._max_count, 0)
+
+        # items are added to the end of the list, so the oldest are first.
+        if self._items and evicted:
+            self._items = self._items[evicted:]
+            self._recalculate_totals()
+
+        self.retention_counters.record(count - evicted, evicted)
+
+    def _recalculate_totals(self) -> None:
+        """Recalculate the running totals from all items."""
+        self._pending_count = 0
+        self._pending_distance = 0
+        self._finalized_distance = 0
+        self._finalized_adjustments = 0
+
+        for item in self._items or []:
+            if item.adjustments is ABSENT_NONE:
+                self._pending_count += 1
+                self._pending_distance += item.distance
+            else:
+                self._finalized_distance += item.distance
+                self._finalized_adjustments += item.adjustments
 
     def _pre_update(self) -> None:
         """Prepare for a pending update."""
@@ -3,10 +3,12 @@
 from __future__ import annotations
 
 from collections.abc import Generator
+import dataclasses
 from dataclasses import dataclass, fields
 import datetime as dt
 from enum import Flag, StrEnum, auto
-from typing import Any, Self, cast
+import math
+from typing import TYPE_CHECKING, Any, NamedTuple, Self, cast
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import State
@@ -76,6 +78,28 @@ class ModeOfTransit(StrEnum):
     DRIVING = auto()
 
 
+class DistanceEngine(StrEnum):
+    """DistanceEngine class."""
+
+    LOCAL_PLANE = auto()
+    HAVERSINE = auto()
+    GEODESIC = auto()
+
+
+class SpeedEngine(StrEnum):
+    """SpeedEngine class."""
+
+    HISTORY = auto()
+    KALMAN = auto()
+
+
+class ModeConstraint(StrEnum):
+    """ModeConstraint class."""
+
+    MAX = auto()
+    P95 = auto()
+
+
 @dataclass(frozen=True, kw_only=True)
 class StatisticGroup:
     """StatisticGroup class."""
@@ -83,6 +107,7 @@ class StatisticGroup:
     update_rate: sts.Statistic
     speed_recent_avg: sts.Statistic
     speed_recent_max: sts.Statistic
+    speed_recent_p95: sts.Statistic
 
     def __iter__(self) -> Generator[sts.Statistic]:
         for field in fields(self):
@@ -99,10 +124,15 @@ class RecalculationRequest:
 
 @dataclass
 class StateChangedData(RecalculationRequest):
-    """StateChangedData class."""
+    """StateChangedData class.
+
+    Changes are processed as of the current time unless `at` is given, i.e.
+    when merged changes are processed after a delay as of the new state.
+    """
 
     old_state: State
     new_state: State
+    at: dt.datetime | None = None
 
 
 @dataclass
@@ -129,13 +159,34 @@ class UpdatesStalledIndicator(RecalculationRequest):
     """UpdatesStalledIndicator class."""
 
 
-@dataclass
+@dataclass(frozen=True)
 class Location:
-    """Location class for GPS location."""
+    """Location class for GPS location.
+
+    The cosine of the latitude needed for distance calculations is derived once
+    when the location is created since a single location is generally compared
+    against many others over the course of several updates. It's stored in a
+    slot rather than a field so it's not part of the data of the location.
+    """
+
+    __slots__ = ("cos_latitude", "latitude", "longitude")
 
     latitude: float
     longitude: float
 
+    if TYPE_CHECKING:
+        cos_latitude: float = dataclasses.field(init=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(
+            self,
+            "cos_latitude",
+            math.cos(self.latitude * math.pi / 180),
+        )
+
+    def __reduce__(self) -> tuple[type[Self], tuple[float, float]]:
+        return (type(self), (self.latitude, self.longitude))
+
     def as_dict(self) -> dict[str, Any]:
         return {
             "latitude": self.latitude,
@@ -150,31 +201,71 @@ class Location:
         )
 
 
-@dataclass
+class CoordinateArrays(NamedTuple):
+    """Parallel arrays of coordinate terms for many locations."""
+
+    latitudes: list[float]
+    longitudes: list[float]
+    cos_latitudes: list[float]
+
+    def select(self, indexes: slice) -> Self:
+        """Select a subset of the locations.
+
+        Returns:
+            The coordinate terms for the selected locations.
+        """
+        return type(self)(
+            self.latitudes[indexes],
+            self.longitudes[indexes],
+            self.cos_latitudes[indexes],
+        )
+
+
+@dataclass(frozen=True, slots=True)
 class HistoryEntry:
-    """HistoryEntry class."""
+    """HistoryEntry class.
+
+    The time of an entry is kept as seconds since the epoch so that comparing &
+    subtracting times (which is done for many entries on every update) is
+    float arithmetic. It's only converted to a `datetime` (`at`) for display.
+    """
 
     NO_ACCURACY = float("inf")  # noqa: RUF045
 
-    at: dt.datetime
+    timestamp: float
     location: Location | AbsentNone
     accuracy: float
     ignore: str | AbsentNone = ABSENT_NONE
     debounce: bool | AbsentFalse = ABSENT_FALSE
 
+    @property
+    def at(self) -> dt.datetime:
+        return dt_util.utc_from_timestamp(self.timestamp)
+
+    def seconds_since(self, timestamp: float) -> float:
+        """Get the time elapsed from a timestamp to this entry.
+
+        The difference is rounded to the microsecond (the precision of the
+        timestamps) so that it matches the difference of the `datetime` values.
+
+        Returns:
+            The number of seconds.
+        """
+        return round(self.timestamp - timestamp, 6)
+
     def as_dict(self) -> dict[str, Any]:
         result = {
             "at": self.at.isoformat(sep=" "),
             "accuracy": self.accuracy,
         }
 
-        if self.location != ABSENT_NONE:
+        if self.location is not ABSENT_NONE:
             result["location"] = self.location.as_dict() if self.location else None
 
-        if self.ignore != ABSENT_NONE:
+        if self.ignore is not ABSENT_NONE:
             result["ignore"] = self.ignore or None
 
-        if self.debounce != ABSENT_FALSE:
+        if self.debounce is not ABSENT_FALSE:
             result["debounce"] = self.debounce or None
 
         return result
@@ -187,7 +278,10 @@ class HistoryEntry:
             location = Location.from_dict(location)
 
         return cls(
-            at=dt_util.parse_datetime(data["at"]),
+            timestamp=dt_util.parse_datetime(
+                data["at"],
+                raise_on_error=True,
+            ).timestamp(),
             location=location,
             accuracy=data.get("accuracy", HistoryEntry.NO_ACCURACY),
             ignore=data.get("ignore", ABSENT_NONE),
@@ -195,7 +289,7 @@ class HistoryEntry:
         )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TransitionEntry:
     """TransitionEntry class."""
 
@@ -207,7 +301,7 @@ class TransitionEntry:
             "distance": self.distance,
         }
 
-        if self.adjustments != ABSENT_NONE:
+        if self.adjustments is not ABSENT_NONE:
             result["adjustments"] = self.adjustments
 
         return result
@@ -220,7 +314,7 @@ class TransitionEntry:
         )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TypedMovementData:
     """TypedMovementData class."""
 
@@ -263,7 +357,25 @@ class TypedMovementData:
         )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True, kw_only=True)
+class TypedMovementContext:
+    """TypedMovementContext class.
+
+    The parts of an update that are shared by all typed movement sensors &
+    dependent entities, calculated once for each update.
+    """
+
+    reset: bool
+    changed: bool
+    from_mode: ModeOfTransit | None = None
+    to_mode: ModeOfTransit | None = None
+    contributes_to: frozenset[ModeOfTransit] = frozenset()
+    applicable_distance: float = 0
+    applicable_distance_adjustments: float = 0
+    at: dt.datetime | None = None
+
+
+@dataclass(slots=True)
 class MovementData:
     """MovementData class."""
 
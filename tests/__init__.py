@@ -2,13 +2,85 @@ import datetime as dt
 
 from freezegun.api import FrozenDateTimeFactory
 from homeassistant.core import HomeAssistant
+from homeassistant.util.yaml.loader import parse_yaml
 from pytest_homeassistant_custom_component.common import (
     MockConfigEntry,
     async_fire_time_changed,
+    load_fixture,
 )
 
+from custom_components.movement.const import DOMAIN
+
 MOCK_UTC_NOW = dt.datetime(2025, 5, 20, 10, 51, 32, 3245, tzinfo=dt.UTC)
 
+SCENARIOS = [
+    "from_home_to_park_in_15_min",
+    "from_home_to_park_in_4_min",
+    "from_home_to_park_in_1_min",
+    "person_without_gps",
+    "movement_along_highway",
+    "from_home_to_park_after_updates_stalled_3hr",
+    "from_park_to_home_after_updates_resumed",
+    "from_home_to_park_after_updates_resumed_update2",
+    "ord_to_sea",
+    "from_home_to_park_in_15_min_while_driving_slowly",
+    "recent_speed_max_or_avg_dropping_to_walking_pace",
+    "recent_speed_max_or_avg_higher_after_driving",
+    "driving_after_slow_start_categorized_as_biking",
+    "recent_speed_max_or_avg_dropping_to_biking_pace",
+    "biking_after_driving_but_threshold_not_overcome",
+    "biking_after_driving_but_threshold_is_overcome",
+    "recent_speed_max_or_avg_expired",
+    "recent_speed_p95_dropping_to_walking_pace",
+    "distance_updates_lagging",
+    "location_update_has_moderate_gps_accuracy",
+    "location_update_has_moderate_gps_accuracy_and_worse_history",
+    "location_update_has_moderate_gps_accuracy_and_expired_history",
+    "location_update_while_driving_has_moderate_gps_accuracy_and_worse_history",
+    "location_update_has_poor_gps_accuracy",
+    "location_update_has_improved_gps_accuracy",
+    "location_update_has_improved_gps_accuracy_but_state_lacks_history",
+    "rapid_updates_entering_home_zone_after_being_at_neighbors_30_min_ago",
+    "nearly_immediate_location_update_has_improved_gps_accuracy",
+    "frequent_updates_recently_while_driving",
+    "small_distance_changes_walking_after_driving",
+    "clustered_updates_due_to_app_race_condition_1",
+    "clustered_updates_due_to_app_race_condition_2",
+    "clustered_updates_due_to_app_race_condition_a_minute_ago",
+    "event_for_manual_adjust",
+    "event_for_manual_adjust_while_in_transition",
+    "reset",
+    "type_walking_walking",
+    "type_walking_walking_to_biking",
+    "type_walking_walking_to_driving",
+    "type_walking_walking_0_0_reset",
+    "type_walking_walking_0_reset",
+    "type_walking_trigger_transition_walking",
+    "type_walking_trigger_transition_walking_2",
+    "type_walking_trigger_transition_walking_3",
+    "type_walking_trigger_transition_driving",
+    "type_walking_trigger_transition_walking_4",
+    "type_biking_walking",
+    "type_biking_walking_to_biking",
+    "type_biking_trigger_transition_biking",
+    "type_biking_trigger_transition_biking_2",
+    "type_biking_trigger_transition_driving",
+    "type_biking_trigger_transition_biking_3",
+    "type_driving_walking",
+    "type_driving_walking_to_driving",
+    "type_driving_trigger_transition_walking_to_driving",
+    "type_driving_driving_to_walking",
+    "type_driving_trigger_transition_driving",
+    "type_driving_trigger_transition_driving_2",
+    "type_driving_trigger_transition_driving_3",
+    "type_driving_trigger_transition_driving_4",
+    "type_walking_trigger_id_reset",
+    "simple_distance_traveled_changed_trigger",
+    "distance_traveled_changed_with_continuing_transition_but_old_state_value",
+    "distance_traveled_changed_with_continuing_transition",
+    "distance_traveled_changed_with_continuing_transition_while_unavailable",
+]
+
 
 class MockNow:
     def __init__(self, hass: HomeAssistant, freezer: FrozenDateTimeFactory):
@@ -34,3 +106,11 @@ async def setup_added_integration(
     """Set up a previously added component."""
     await hass.config_entries.async_setup(config_entry.entry_id)
     await hass.async_block_till_done()
+
+
+def load_scenario(name: str) -> dict:
+    """Load a scenario as an object."""
+    anchors_str = load_fixture("scenarios/_anchors.yaml", DOMAIN)
+    fixture_str = load_fixture(f"scenarios/{name}.yaml", DOMAIN)
+
+    return dict(parse_yaml(f"{anchors_str}\n{fixture_str}"))
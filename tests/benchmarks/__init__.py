@@ -0,0 +1,43 @@
+"""Benchmarks for the movement integration.
+
+These aren't collected as tests. Each module is run directly from the root of
+the repository, i.e. `python -m tests.benchmarks.bench_distance`.
+"""
+
+from collections.abc import Callable
+import random
+import timeit
+
+from custom_components.movement.types import Location
+
+REPEAT = 5
+
+
+def best_of(func: Callable[[], object], *, number: int) -> float:
+    """Time a function, taking the best of several repeats.
+
+    Returns:
+        The time (in microseconds) of a single call.
+    """
+    return min(timeit.repeat(func, number=number, repeat=REPEAT)) / number * 1e6
+
+
+def walk(count: int, *, step: float = 0.0005, seed: int = 0) -> list[Location]:
+    """Generate a reproducible path of short hops.
+
+    Each hop moves up to `step` degrees (about 50 m at the default) in
+    latitude & longitude.
+
+    Returns:
+        The locations along the path.
+    """
+    rng = random.Random(seed)  # noqa: S311
+    latitude, longitude = 45.5, -122.6
+    locations = []
+
+    for _ in range(count):
+        latitude += rng.uniform(-step, step)
+        longitude += rng.uniform(-step, step)
+        locations.append(Location(latitude, longitude))
+
+    return locations
@@ -0,0 +1,56 @@
+"""Benchmark distances from one fix to every history entry.
+
+Compares `haversine`, which derives the cosine of each latitude on every call,
+with `haversine_cached`, which uses the cosine precomputed on each `Location`,
+and with `haversine_batch`, which works over the coordinate arrays at once.
+"""
+
+import sys
+
+from custom_components.movement.distance import (
+    haversine,
+    haversine_batch,
+    haversine_cached,
+)
+from custom_components.movement.types import CoordinateArrays
+
+from . import best_of, walk
+
+SIZES = (100, 1000)
+
+
+def main() -> None:
+    sys.stdout.write(
+        f"{'entries':>7}  {'haversine':>10}  {'haversine_cached':>16}  "
+        f"{'haversine_batch':>15}\n"
+    )
+
+    for size in SIZES:
+        *locations, fix = walk(size + 1)
+        coordinates = CoordinateArrays(
+            [location.latitude for location in locations],
+            [location.longitude for location in locations],
+            [location.cos_latitude for location in locations],
+        )
+        number = 100_000 // size
+
+        pair = best_of(
+            lambda: [haversine(location, fix) for location in locations],  # noqa: B023
+            number=number,
+        )
+        cached = best_of(
+            lambda: [haversine_cached(location, fix) for location in locations],  # noqa: B023
+            number=number,
+        )
+        batch = best_of(
+            lambda: haversine_batch(coordinates, fix),  # noqa: B023
+            number=number,
+        )
+
+        sys.stdout.write(
+            f"{size:>7}  {pair:>7.0f} us  {cached:>13.0f} us  {batch:>12.0f} us\n"
+        )
+
+
+if __name__ == "__main__":
+    main()
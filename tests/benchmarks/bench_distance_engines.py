@@ -0,0 +1,57 @@
+"""Benchmark the distance engines.
+
+Times the pair & batch function of each engine for distances from one fix to
+many short hops, and reports the largest relative difference of each engine's
+results from `haversine`, which is the reference for all of them.
+"""
+
+import sys
+
+from custom_components.movement.distance import DISTANCE_ENGINES, haversine
+from custom_components.movement.types import CoordinateArrays
+
+from . import best_of, walk
+
+SIZES = (10, 100, 1000)
+
+
+def main() -> None:
+    sys.stdout.write(
+        f"{'engine':<12}  {'hops':>5}  {'pair':>8}  {'batch':>8}  {'max error':>9}\n"
+    )
+
+    for engine, calculator in DISTANCE_ENGINES.items():
+        for size in SIZES:
+            *locations, fix = walk(size + 1)
+            coordinates = CoordinateArrays(
+                [location.latitude for location in locations],
+                [location.longitude for location in locations],
+                [location.cos_latitude for location in locations],
+            )
+            number = 100_000 // size
+
+            pair = best_of(
+                lambda: [calculator.pair(location, fix) for location in locations],  # noqa: B023
+                number=number,
+            )
+            batch = best_of(
+                lambda: calculator.batch(coordinates, fix),  # noqa: B023
+                number=number,
+            )
+            error = max(
+                abs(distance - expected) / expected
+                for distance, expected in zip(
+                    calculator.batch(coordinates, fix),
+                    (haversine(location, fix) for location in locations),
+                    strict=True,
+                )
+            )
+
+            sys.stdout.write(
+                f"{engine:<12}  {size:>5}  {pair:>5.0f} us  {batch:>5.0f} us  "
+                f"{error:>9.1e}\n"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Benchmark the memory & checks of the movement value types.
+
+Measures (with `tracemalloc`) the memory retained by a full history and by the
+state a coordinator holds at full history & transition registries. It also
+times the absence checks against the `ABSENT_NONE` sentinel, which compare by
+identity rather than equality, and the construction & serialization of the
+frozen, slotted value types.
+"""
+
+from collections.abc import Callable
+import datetime as dt
+import gc
+import sys
+import tracemalloc
+
+from custom_components.movement.history import HISTORY_ENTRIES_MAX, HistoryRegistry
+from custom_components.movement.transition import TRANSITION_ENTRIES_MAX
+from custom_components.movement.types import (
+    ABSENT_NONE,
+    HistoryEntry,
+    Location,
+    ModeOfTransit,
+    MovementData,
+    TransitionEntry,
+    TypedMovementData,
+)
+
+from . import best_of, walk
+
+START = dt.datetime(2025, 1, 1, tzinfo=dt.UTC)
+
+
+def retained[T](func: Callable[[], T]) -> tuple[T, int]:
+    """Measure the memory retained by the result of a function.
+
+    Returns:
+        The result of the function & the number of bytes it retained.
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = func()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def history_entries() -> list[HistoryEntry]:
+    return [
+        HistoryEntry(
+            timestamp=START.timestamp() + 5 * index,
+            location=location,
+            accuracy=5.0 + index,
+        )
+        for index, location in enumerate(walk(HISTORY_ENTRIES_MAX))
+    ]
+
+
+def coordinator_state() -> tuple[object, ...]:
+    history = HistoryRegistry()
+    history.reset(history_entries())
+    transitions = [
+        TransitionEntry(distance=0.01 * index, adjustments=0.001 * index)
+        for index in range(TRANSITION_ENTRIES_MAX)
+    ]
+    data = MovementData(1.0, 0.5, 12.0, ModeOfTransit.WALKING, 10, 1)
+    typed = [
+        TypedMovementData(
+            distance=1.0,
+            trip_distance=1.0,
+            trip_adjustments=0.0,
+            trip_start=START,
+        )
+        for _ in ModeOfTransit
+    ]
+    return history, transitions, data, typed
+
+
+def main() -> None:
+    _, entries_size = retained(history_entries)
+    _, state_size = retained(coordinator_state)
+
+    sys.stdout.write(
+        f"history entry (incl. location): {entries_size / HISTORY_ENTRIES_MAX:.0f} B\n"
+        f"coordinator state ({HISTORY_ENTRIES_MAX} history, "
+        f"{TRANSITION_ENTRIES_MAX} transition entries): "
+        f"{state_size / 1024:.1f} KiB\n"
+    )
+
+    location = Location(latitude=45.5, longitude=-122.6)
+    entry = HistoryEntry(
+        timestamp=START.timestamp(),
+        location=location,
+        accuracy=5.0,
+    )
+    number = 1_000_000
+    timings = {
+        "location != ABSENT_NONE": best_of(
+            lambda: entry.location != ABSENT_NONE,
+            number=number,
+        ),
+        "location is not ABSENT_NONE": best_of(
+            lambda: entry.location is not ABSENT_NONE,
+            number=number,
+        ),
+        "Location(...)": best_of(
+            lambda: Location(latitude=45.5, longitude=-122.6),
+            number=number,
+        ),
+        "HistoryEntry(...)": best_of(
+            lambda: HistoryEntry(timestamp=0.0, location=location, accuracy=5.0),
+            number=number,
+        ),
+        "HistoryEntry.as_dict()": best_of(entry.as_dict, number=number // 10),
+    }
+
+    for name, timing in timings.items():
+        sys.stdout.write(f"{name + ':':<30} {timing * 1000:>5.0f} ns\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,11 +11,20 @@ from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 from custom_components.movement.config_flow import SECTION_ADVANCED_OPTIONS
 from custom_components.movement.const import (
+    CONF_DECAYED_STATISTICS,
     CONF_DEPENDENT_ENTITIES,
+    CONF_DISTANCE_ENGINE,
     CONF_HIGHWAY,
     CONF_LOCAL,
+    CONF_MODE_CONSTRAINT,
     CONF_MULTIPLIERS,
     CONF_NEIGHBORHOOD,
+    CONF_RETENTION_MAX_AGE,
+    CONF_RETENTION_MAX_ENTRIES,
+    CONF_RETENTION_MAX_SIZE,
+    CONF_SOURCE_ENTITIES,
+    CONF_SPEED_ENGINE,
+    CONF_TRACE,
     CONF_TRACKED_ENTITY,
     CONF_TRIP_ADDITION,
     DOMAIN,
@@ -179,6 +188,15 @@ async def test_options_flow(
             },
             SECTION_ADVANCED_OPTIONS: {
                 CONF_DEPENDENT_ENTITIES: ["sensor.shared_vehicle_template"],
+                CONF_SOURCE_ENTITIES: ["device_tracker.iphone"],
+                CONF_DISTANCE_ENGINE: "local_plane",
+                CONF_SPEED_ENGINE: "kalman",
+                CONF_MODE_CONSTRAINT: "p95",
+                CONF_DECAYED_STATISTICS: True,
+                CONF_RETENTION_MAX_ENTRIES: 500,
+                CONF_RETENTION_MAX_AGE: 90,
+                CONF_RETENTION_MAX_SIZE: 64,
+                CONF_TRACE: True,
             },
         },
     )
@@ -193,9 +211,62 @@ async def test_options_flow(
             CONF_HIGHWAY: 1.25,
         },
         CONF_DEPENDENT_ENTITIES: ["sensor.shared_vehicle_template"],
+        CONF_SOURCE_ENTITIES: ["device_tracker.iphone"],
+        CONF_DISTANCE_ENGINE: "local_plane",
+        CONF_SPEED_ENGINE: "kalman",
+        CONF_MODE_CONSTRAINT: "p95",
+        CONF_DECAYED_STATISTICS: True,
+        CONF_RETENTION_MAX_ENTRIES: 500,
+        CONF_RETENTION_MAX_AGE: 90,
+        CONF_RETENTION_MAX_SIZE: 64,
+        CONF_TRACE: True,
     }
 
 
+async def test_options_flow_retention_max_age_too_short(
+    hass: HomeAssistant,
+) -> None:
+    """Test that a max age shorter than the history used for speed is rejected."""
+    data = {
+        CONF_TRACKED_ENTITY: "person.akio_toyoda",
+        CONF_TRIP_ADDITION: 0,
+        CONF_MULTIPLIERS: {
+            CONF_NEIGHBORHOOD: 1.15,
+            CONF_LOCAL: 0.98,
+            CONF_HIGHWAY: 1.2,
+        },
+    }
+    mock_config = MockConfigEntry(
+        domain=DOMAIN,
+        title="home",
+        data=data,
+        unique_id=f"{DOMAIN}_home",
+    )
+    mock_config.add_to_hass(hass)
+
+    with patch(
+        "custom_components.movement.async_setup_entry",
+        return_value=True,
+    ):
+        await hass.config_entries.async_setup(mock_config.entry_id)
+        await hass.async_block_till_done()
+
+        result = await hass.config_entries.options.async_init(mock_config.entry_id)
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        user_input={
+            **data,
+            SECTION_ADVANCED_OPTIONS: {CONF_RETENTION_MAX_AGE: 30},
+        },
+    )
+
+    assert result["type"] is FlowResultType.FORM
+    assert result["errors"] == {"base": "retention_max_age_too_short"}
+    assert result["description_placeholders"] == {"retention_max_age_min": "60"}
+    assert mock_config.data == data
+
+
 async def test_abort_duplicated_entry(
     hass: HomeAssistant,
 ) -> None:
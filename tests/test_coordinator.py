@@ -1,12 +1,13 @@
 """Test coordinator."""
 
 from collections.abc import Mapping
-from contextlib import suppress
+from contextlib import nullcontext, suppress
 from dataclasses import asdict, fields
 import datetime as dt
 from typing import Any, cast
 from unittest.mock import Mock, patch
 
+from freezegun.api import FrozenDateTimeFactory
 from homeassistant.core import (
     EVENT_STATE_CHANGED,
     Event,
@@ -15,36 +16,53 @@ from homeassistant.core import (
     State,
 )
 from homeassistant.util import dt as dt_util
-from pytest_homeassistant_custom_component.common import MockConfigEntry
+import pytest
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
 from syrupy.assertion import SnapshotAssertion
 from syrupy.matchers import path_type
 
 from custom_components.movement.calculations import (
+    calculate_typed_movement_context,
     get_updates_for_typed_movement_sensor,
 )
 from custom_components.movement.const import (
+    CONF_DECAYED_STATISTICS,
     CONF_HIGHWAY,
     CONF_LOCAL,
     CONF_MULTIPLIERS,
     CONF_NEIGHBORHOOD,
+    CONF_SOURCE_ENTITIES,
+    CONF_SPEED_ENGINE,
+    CONF_TRACE,
     CONF_TRACKED_ENTITY,
     CONF_TRIP_ADDITION,
     DOMAIN,
 )
 from custom_components.movement.coordinator import MovementUpdateCoordinator
+from custom_components.movement.history import HistoryRegistry
 from custom_components.movement.statistics import Statistic
+from custom_components.movement.trace import TraceBuffer
 from custom_components.movement.transition import TransitionRegistry
 from custom_components.movement.types import (
     ABSENT_FALSE,
     ABSENT_NONE,
     HistoryEntry,
+    Location,
     ModeOfTransit,
     MovementData,
     ServiceAdjustment,
+    SpeedEngine,
+    SpeedStaleIndicator,
+    StateChangedData,
     StatisticGroup,
     TransitionEntry,
 )
 
+from . import SCENARIOS, load_scenario
+
 
 async def test_data_calculation(
     hass: HomeAssistant,
@@ -53,52 +71,7 @@ async def test_data_calculation(
     snapshot: SnapshotAssertion,
 ) -> None:
     """Test sensors when tracked device changes state."""
-    mock_config_entry = MockConfigEntry(
-        domain=DOMAIN,
-        unique_id="mock-unique-id",
-        data={
-            CONF_TRACKED_ENTITY: "person.akio_toyoda",
-            CONF_TRIP_ADDITION: "0",
-            CONF_MULTIPLIERS: {
-                CONF_NEIGHBORHOOD: "0",
-                CONF_LOCAL: "0",
-                CONF_HIGHWAY: "0",
-                **scenario.get("config_entry", {}).get(CONF_MULTIPLIERS, {}),
-            },
-            **{
-                key: value
-                for key, value in scenario.get("config_entry", {}).items()
-                if key != CONF_MULTIPLIERS
-            },
-        },
-    )
-
-    coordinator_config = scenario.get("coordinator", {})
-    history = coordinator_config.pop("history", None) or []
-    transition = coordinator_config.pop("transition", None)
-    coordinator = MovementUpdateCoordinator(hass, mock_config_entry)
-    coordinator.inject_data(
-        MovementData.from_dict(coordinator_config),
-        history=[*map(HistoryEntry.from_dict, history)],
-        transition=(transition and [*map(TransitionEntry.from_dict, transition)]),
-    )
-    statistic_mocks = {
-        field.name: Mock(spec=Statistic) for field in fields(StatisticGroup)
-    }
-    coordinator.statistics = StatisticGroup(**statistic_mocks)
-
-    for mock in statistic_mocks.values():
-        mock.value = None
-        mock.next_to_purge_timestamp.return_value = None
-
-    for key, value in coordinator_config.items():
-        if key == "statistics":
-            for sensor_key, sensor_value in value.items():
-                mock = getattr(coordinator.statistics, sensor_key)
-                mock.value = sensor_value
-        if key == "last_changed":
-            coordinator.last_changed = dt_util.parse_datetime(value)
-
+    coordinator = _create_coordinator(hass, scenario)
     change = scenario["change"]
     change_type = change["id"]
     data: Any | None = None
@@ -106,40 +79,7 @@ async def test_data_calculation(
     result: dict | None = None
 
     if change_type == "add_distance":
-        now = dt_util.parse_datetime(change["now"])
-        from_state_last_change = dt_util.parse_datetime(
-            scenario.get("coordinator", {}).get("last_changed"),
-        )
-        from_state = change["from_state"]
-        to_state = change["to_state"]
-
-        # match the last change on the from state to what's used for the value
-        # on the coordinator. these values are probably pretty interchangeable
-        # (the value on the coordinator is based on when the distance last
-        # changed, i.e. when the tracked entity changes). an effort should be
-        # made in the future to refactor and choose which of these to use.
-        # at the time of this writing, the value was only used as a fallback
-        # for when no history was available on the coordinator anyway.
-        if from_state_last_change:
-            from_state["last_changed"] = from_state_last_change
-
-        event = Event(
-            EVENT_STATE_CHANGED,
-            EventStateChangedData(
-                entity_id="person.akio_toyoda",
-                old_state=State(
-                    "person.akio_toyoda",
-                    **({"state": "undefined"} | from_state),
-                ),
-                new_state=State(
-                    "person.akio_toyoda",
-                    **({"state": "undefined"} | to_state),
-                ),
-            ),
-        )
-
-        with patch("homeassistant.util.dt.utcnow", return_value=now):
-            await coordinator.async_handle_entity_state_change(event)
+        await _add_distance(coordinator, scenario)
     elif change_type == "recalculate_mode_of_transit":
         await coordinator.async_refresh()
     elif change_type == "updates_stalled":
@@ -183,12 +123,14 @@ async def test_data_calculation(
             )
             data = get_updates_for_typed_movement_sensor(
                 entity_id="sensor.toyota_prius_distance",
-                reset=reset,
                 type_data=type_data,
                 mode_type=mode_type,
-                prior=coordinator.data,
-                update=coordinator.update if not reset else None,
-                transition=coordinator.transition,
+                context=calculate_typed_movement_context(
+                    reset=reset,
+                    prior=coordinator.data,
+                    update=coordinator.update if not reset else None,
+                    transition=coordinator.transition,
+                ),
             )
 
         result = data.as_state_dict()
@@ -250,7 +192,7 @@ async def test_data_calculation(
         )
 
     if expectation:
-        assert _to_yaml_assertable(result) == expectation
+        assert _to_yaml_assertable(result) == _to_yaml_assertable(expectation)
 
     if data:
         assert data == snapshot(
@@ -270,6 +212,506 @@ async def test_data_calculation(
         )
 
 
+async def test_speed_engine_comparison(
+    hass: HomeAssistant,
+    snapshot: SnapshotAssertion,
+) -> None:
+    """Compare the speed calculated by each speed engine for every scenario."""
+    comparison: dict[str, dict[str, Any]] = {}
+
+    for scenario_name in SCENARIOS:
+        if load_scenario(scenario_name)["change"]["id"] != "add_distance":
+            continue
+
+        comparison[scenario_name] = {}
+
+        for speed_engine in SpeedEngine:
+            scenario = load_scenario(scenario_name)
+            coordinator = _create_coordinator(
+                hass,
+                scenario,
+                {CONF_SPEED_ENGINE: speed_engine},
+            )
+            await _add_distance(coordinator, scenario)
+            coordinator.cancel_all_listeners()
+
+            comparison[scenario_name][str(speed_engine)] = {
+                "speed": coordinator.data.speed,
+                "mode_of_transit": coordinator.data.mode_of_transit
+                and str(coordinator.data.mode_of_transit),
+                "transition": bool(coordinator.transition.items),
+            }
+
+    assert comparison == snapshot(matcher=_round_floats_matcher)
+
+
+async def test_stationary_fast_path(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+) -> None:
+    """Test that skipping speed calculations for stationary entries is exact."""
+    start = dt.datetime(2025, 5, 20, 10, 51, 32, tzinfo=dt.UTC)
+    jitter = [(0, 0, 10), (3, -2, 15), (-2, 4, 8), (1, 1, 20), (-4, -1, 12)]
+    positions = [
+        # sit at a desk, walk 300m north, then sit at another desk
+        *((0, *jitter[index % len(jitter)]) for index in range(60)),
+        *((index * 25, 0, 0, 5) for index in range(1, 13)),
+        *((300, *jitter[index % len(jitter)]) for index in range(60)),
+    ]
+    changes: list[StateChangedData] = []
+    old_state = State(
+        "person.akio_toyoda",
+        "not_home",
+        {"latitude": 35.054, "longitude": 137.143, "gps_accuracy": 10},
+        last_updated=start,
+    )
+
+    for index, (meters, north, east, accuracy) in enumerate(positions, 1):
+        new_state = State(
+            "person.akio_toyoda",
+            "not_home",
+            {
+                "latitude": 35.054 + (meters + north) / 111_194.9,
+                "longitude": 137.143 + east / 91_085.5,
+                "gps_accuracy": accuracy,
+            },
+            last_updated=start + dt.timedelta(seconds=index * 30),
+        )
+        changes.append(StateChangedData(old_state=old_state, new_state=new_state))
+        old_state = new_state
+
+    results = []
+
+    # tracing does not change whether the fast path is taken.
+    for fast_path, trace in ((True, False), (False, False), (True, True)):
+        coordinator = _create_coordinator(
+            hass,
+            {"coordinator": {"change_count": -1}},
+            {CONF_TRACE: trace},
+            mock_statistics=False,
+        )
+        coordinator.trace = coordinator.history.trace = (
+            TraceBuffer(size=10_000) if trace else None
+        )
+        stationary_count = 0
+
+        with (
+            nullcontext()
+            if fast_path
+            else patch.object(HistoryRegistry, "stationary", new=False)
+        ):
+            for change in changes:
+                freezer.move_to(change.new_state.last_updated)
+                await _handle_state_change(coordinator, change)
+                stationary_count += coordinator.history.stationary
+
+        coordinator.cancel_all_listeners()
+        results.append(
+            (
+                coordinator.data,
+                coordinator.walking_movement_data,
+                list(coordinator.history.items),
+                coordinator.transition.items,
+                [stat.value for stat in coordinator.statistics],
+            ),
+        )
+
+        assert bool(stationary_count) == fast_path
+
+        if coordinator.trace is not None:
+            events = [record[0] for record in coordinator.trace.records]
+
+            assert events.count("speed_stationary") == stationary_count
+
+    assert results[0] == results[1] == results[2]
+
+
+async def test_decayed_statistics(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+) -> None:
+    """Test that decayed statistics are close to those of the recent states."""
+    start = dt.datetime(2025, 5, 20, 10, 51, 32, tzinfo=dt.UTC)
+    results = []
+
+    for decayed in (False, True):
+        coordinator = _create_coordinator(
+            hass,
+            {"coordinator": {"change_count": -1}},
+            {CONF_DECAYED_STATISTICS: decayed},
+            mock_statistics=False,
+        )
+        old_state = State(
+            "person.akio_toyoda",
+            "not_home",
+            {"latitude": 35.054, "longitude": 137.143, "gps_accuracy": 5},
+            last_updated=start,
+        )
+
+        # walk north at a steady pace with an update every 30 seconds
+        for index in range(1, 41):
+            at = start + dt.timedelta(seconds=index * 30)
+            new_state = State(
+                "person.akio_toyoda",
+                "not_home",
+                {
+                    "latitude": 35.054 + index * 40 / 111_194.9,
+                    "longitude": 137.143,
+                    "gps_accuracy": 5,
+                },
+                last_updated=at,
+            )
+            freezer.move_to(at)
+            await _handle_state_change(
+                coordinator,
+                StateChangedData(old_state=old_state, new_state=new_state),
+            )
+            old_state = new_state
+
+        coordinator.cancel_all_listeners()
+        results.append(coordinator.statistics)
+
+    buffered, decayed_statistics = results
+
+    assert decayed_statistics.update_rate.value == pytest.approx(
+        buffered.update_rate.value,
+        rel=0.05,
+    )
+    assert decayed_statistics.speed_recent_avg.value == pytest.approx(
+        buffered.speed_recent_avg.value,
+        rel=0.05,
+    )
+    assert (
+        decayed_statistics.update_rate.next_to_purge_timestamp()
+        == (start + dt.timedelta(minutes=40)).timestamp()
+    )
+    assert (
+        decayed_statistics.speed_recent_avg.next_to_purge_timestamp()
+        == (start + dt.timedelta(minutes=28)).timestamp()
+    )
+
+
+async def test_decayed_statistics_expire(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+) -> None:
+    """Test that decayed statistics expire without further updates."""
+    start = dt.datetime(2025, 5, 20, 10, 51, 32, tzinfo=dt.UTC)
+    coordinator = _create_coordinator(
+        hass,
+        {"coordinator": {"change_count": -1}},
+        {CONF_DECAYED_STATISTICS: True},
+        mock_statistics=False,
+    )
+    statistics = coordinator.statistics
+    changes: list[Any] = []
+    async_refresh = coordinator.async_refresh
+
+    async def refresh() -> None:
+        changes.append(coordinator.change)
+        await async_refresh()
+
+    coordinator.async_refresh = refresh  # type: ignore[method-assign]
+
+    async def tick(minutes: float) -> None:
+        freezer.move_to(start + dt.timedelta(minutes=minutes))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+
+    old_state = State(
+        "person.akio_toyoda",
+        "not_home",
+        {"latitude": 35.054, "longitude": 137.143, "gps_accuracy": 5},
+        last_updated=start,
+    )
+
+    for index in range(1, 11):
+        at = start + dt.timedelta(seconds=index * 30)
+        new_state = State(
+            "person.akio_toyoda",
+            "not_home",
+            {
+                "latitude": 35.054 + index * 40 / 111_194.9,
+                "longitude": 137.143,
+                "gps_accuracy": 5,
+            },
+            last_updated=at,
+        )
+        freezer.move_to(at)
+        await _handle_state_change(
+            coordinator,
+            StateChangedData(old_state=old_state, new_state=new_state),
+        )
+        old_state = new_state
+
+    changes.clear()
+
+    def expired() -> list[bool]:
+        return [
+            statistic.value is None
+            for statistic in (statistics.speed_recent_avg, statistics.update_rate)
+        ]
+
+    assert expired() == [False, False]
+
+    # the recent speed expires 8 minutes after the last update.
+    await tick(13)
+
+    assert expired() == [True, False]
+    assert [type(change) for change in changes] == [SpeedStaleIndicator]
+
+    # the update rate expires when updates are considered stalled.
+    await tick(25)
+
+    assert expired() == [True, True]
+    assert statistics.update_rate.next_to_purge_timestamp() is None
+
+    coordinator.cancel_all_listeners()
+
+
+@pytest.mark.parametrize(
+    ("attrs", "refreshed"),
+    [
+        ({"battery_level": 40, "source": "device_tracker.iphone"}, False),
+        ({"latitude": 35.055}, True),
+        ({"gps_accuracy": 10}, True),
+        ({"latitude": None, "longitude": None, "battery_level": 40}, True),
+    ],
+    ids=["attributes_changed", "moved", "accuracy_changed", "without_location"],
+)
+async def test_skip_attribute_changes(
+    hass: HomeAssistant,
+    attrs: dict[str, Any],
+    *,
+    refreshed: bool,
+) -> None:
+    """Test that changes to attributes other than the location are skipped."""
+    coordinator = _create_coordinator(hass, {})
+    old_attrs = {
+        "latitude": 35.054,
+        "longitude": 137.143,
+        "gps_accuracy": 5,
+        "battery_level": 41,
+        "source": "device_tracker.iphone",
+    }
+    old_state = State("person.akio_toyoda", "not_home", old_attrs)
+    new_state = State("person.akio_toyoda", "Office", old_attrs | attrs)
+
+    with patch.object(coordinator, "async_refresh") as mock_refresh:
+        await coordinator.async_handle_entity_state_change(
+            Event(
+                EVENT_STATE_CHANGED,
+                EventStateChangedData(
+                    entity_id="person.akio_toyoda",
+                    old_state=old_state,
+                    new_state=new_state,
+                ),
+            ),
+        )
+
+    coordinator.cancel_all_listeners()
+
+    assert mock_refresh.called == refreshed
+    assert coordinator.skipped_state_changes == (not refreshed)
+
+
+async def test_merge_source_state_changes(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+) -> None:
+    """Test that state changes from several sources are merged."""
+    start = dt.datetime(2025, 5, 20, 10, 51, 32, tzinfo=dt.UTC)
+    coordinator = _create_coordinator(
+        hass,
+        {"coordinator": {"change_count": -1}},
+        {CONF_SOURCE_ENTITIES: ["device_tracker.iphone", "device_tracker.watch"]},
+        mock_statistics=False,
+    )
+    attrs = {"latitude": 35.054, "longitude": 137.143, "gps_accuracy": 10}
+    states: dict[str, State] = {
+        entity_id: State(entity_id, "not_home", attrs, last_updated=start)
+        for entity_id in (
+            "person.akio_toyoda",
+            "device_tracker.iphone",
+            "device_tracker.watch",
+        )
+    }
+
+    async def change(seconds: float, entity_id: str, **changes: Any) -> None:
+        freezer.move_to(start + dt.timedelta(seconds=seconds))
+        old_state = states[entity_id]
+        new_state = State(
+            entity_id,
+            "not_home",
+            old_state.attributes | changes,
+            last_updated=start + dt.timedelta(seconds=seconds),
+        )
+        states[entity_id] = new_state
+        await coordinator.async_handle_entity_state_change(
+            Event(
+                EVENT_STATE_CHANGED,
+                EventStateChangedData(
+                    entity_id=entity_id,
+                    old_state=old_state,
+                    new_state=new_state,
+                ),
+            ),
+        )
+
+    async def tick(seconds: float) -> None:
+        freezer.move_to(start + dt.timedelta(seconds=seconds))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+
+    # the same movement from the person, the phone & the watch (which has
+    # better accuracy) within a few seconds is a single update.
+    await change(60, "device_tracker.iphone", latitude=35.055)
+    await change(60, "person.akio_toyoda", latitude=35.055)
+    await change(62, "device_tracker.watch", latitude=35.0551, gps_accuracy=5)
+    await change(63, "device_tracker.watch", latitude=None, longitude=None)
+    await tick(64)
+
+    assert coordinator.data.change_count == -1
+
+    await tick(65)
+
+    assert coordinator.data.change_count == 1
+    assert coordinator.history.current_entry == HistoryEntry(
+        timestamp=(start + dt.timedelta(seconds=62)).timestamp(),
+        location=Location(latitude=35.0551, longitude=137.143),
+        accuracy=5,
+    )
+
+    # the next movement is from the merged location.
+    await change(120, "device_tracker.iphone", latitude=35.056)
+    await tick(125)
+
+    # pending changes are discarded when unloading.
+    await change(180, "device_tracker.iphone", latitude=35.057)
+    coordinator.cancel_all_listeners()
+    await tick(185)
+
+    assert coordinator.data.change_count == 2
+    assert coordinator.data.distance == pytest.approx(0.2224, abs=1e-4)
+    assert coordinator.merged_state_changes == 2
+    assert coordinator.skipped_state_changes == 1
+
+
+def _create_coordinator(
+    hass: HomeAssistant,
+    scenario: dict,
+    config: dict[str, Any] | None = None,
+    *,
+    mock_statistics: bool = True,
+) -> MovementUpdateCoordinator:
+    mock_config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        unique_id="mock-unique-id",
+        data={
+            CONF_TRACKED_ENTITY: "person.akio_toyoda",
+            CONF_TRIP_ADDITION: "0",
+            CONF_MULTIPLIERS: {
+                CONF_NEIGHBORHOOD: "0",
+                CONF_LOCAL: "0",
+                CONF_HIGHWAY: "0",
+                **scenario.get("config_entry", {}).get(CONF_MULTIPLIERS, {}),
+            },
+            **{
+                key: value
+                for key, value in scenario.get("config_entry", {}).items()
+                if key != CONF_MULTIPLIERS
+            },
+            **(config or {}),
+        },
+    )
+
+    coordinator_config = scenario.get("coordinator", {})
+    history = coordinator_config.pop("history", None) or []
+    transition = coordinator_config.pop("transition", None)
+    coordinator = MovementUpdateCoordinator(hass, mock_config_entry)
+    coordinator.inject_data(
+        MovementData.from_dict(coordinator_config),
+        history=[*map(HistoryEntry.from_dict, history)],
+        transition=(transition and [*map(TransitionEntry.from_dict, transition)]),
+    )
+    if mock_statistics:
+        statistic_mocks = {
+            field.name: Mock(spec=Statistic) for field in fields(StatisticGroup)
+        }
+        coordinator.statistics = StatisticGroup(**statistic_mocks)
+
+        for mock in statistic_mocks.values():
+            mock.value = None
+            mock.next_to_purge_timestamp.return_value = None
+
+    for key, value in coordinator_config.items():
+        if key == "statistics":
+            for sensor_key, sensor_value in value.items():
+                mock = getattr(coordinator.statistics, sensor_key)
+                mock.value = sensor_value
+        if key == "last_changed":
+            coordinator.last_changed = dt_util.parse_datetime(value)
+
+    return coordinator
+
+
+async def _handle_state_change(
+    coordinator: MovementUpdateCoordinator,
+    change: StateChangedData,
+) -> None:
+    await coordinator.async_handle_entity_state_change(
+        Event(
+            EVENT_STATE_CHANGED,
+            EventStateChangedData(
+                entity_id=coordinator.tracked_entity,
+                old_state=change.old_state,
+                new_state=change.new_state,
+            ),
+        ),
+    )
+
+
+async def _add_distance(
+    coordinator: MovementUpdateCoordinator,
+    scenario: dict,
+) -> None:
+    change = scenario["change"]
+    now = dt_util.parse_datetime(change["now"])
+    from_state_last_change = dt_util.parse_datetime(
+        scenario.get("coordinator", {}).get("last_changed"),
+    )
+    from_state = change["from_state"]
+    to_state = change["to_state"]
+
+    # match the last change on the from state to what's used for the value
+    # on the coordinator. these values are probably pretty interchangeable
+    # (the value on the coordinator is based on when the distance last
+    # changed, i.e. when the tracked entity changes). an effort should be
+    # made in the future to refactor and choose which of these to use.
+    # at the time of this writing, the value was only used as a fallback
+    # for when no history was available on the coordinator anyway.
+    if from_state_last_change:
+        from_state["last_changed"] = from_state_last_change
+
+    event = Event(
+        EVENT_STATE_CHANGED,
+        EventStateChangedData(
+            entity_id="person.akio_toyoda",
+            old_state=State(
+                "person.akio_toyoda",
+                **({"state": "undefined"} | from_state),
+            ),
+            new_state=State(
+                "person.akio_toyoda",
+                **({"state": "undefined"} | to_state),
+            ),
+        ),
+    )
+
+    with patch("homeassistant.util.dt.utcnow", return_value=now):
+        await coordinator.async_handle_entity_state_change(event)
+
+
 _round_floats_matcher = path_type(
     types=(float,),
     replacer=lambda data, _: round(data, 5),
@@ -284,7 +726,8 @@ def _to_yaml_assertable(value: Any, preserve_keys=("location",)):
             value = 1e99
         return round(value, 3)
     if isinstance(value, dt.datetime):
-        return value.isoformat(sep=" ")
+        # history entries only keep timestamps, so times are compared in UTC
+        return dt_util.as_utc(value).isoformat(sep=" ")
     if isinstance(value, Mapping):
         return {
             key: (
@@ -309,6 +752,8 @@ def _to_yaml_assertable(value: Any, preserve_keys=("location",)):
             float_value = float(value)
             if str(float_value) == value:
                 return round(float_value, 3)
+        if (datetime_value := dt_util.parse_datetime(value)) and datetime_value.tzinfo:
+            return _to_yaml_assertable(datetime_value)
         return value
     return value
 
@@ -19,6 +19,7 @@ from syrupy.assertion import SnapshotAssertion
 from syrupy.filters import props
 from syrupy.matchers import path_type
 
+from custom_components.movement.const import CONF_TRACE, DOMAIN
 from custom_components.movement.diagnostics import map_data
 
 from . import MOCK_UTC_NOW, setup_integration
@@ -92,6 +93,50 @@ async def test_entry_diagnostics(
         )
 
 
+async def test_entry_diagnostics_with_trace(
+    hass: HomeAssistant,
+    mock_config_entry: MockConfigEntry,
+    hass_client: ClientSessionGenerator,
+    snapshot: SnapshotAssertion,
+) -> None:
+    """Test config entry diagnostics with tracing enabled."""
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        entry_id=mock_config_entry.entry_id,
+        data={**mock_config_entry.data, CONF_TRACE: True},
+    )
+    initial_attrs = {
+        "friendly_name": "Akio Toyoda",
+        "latitude": 35.054,
+        "longitude": 137.143,
+        "gps_accuracy": 5,
+    }
+
+    hass.states.async_set("person.akio_toyoda", "not_home", initial_attrs)
+
+    with freeze_time(MOCK_UTC_NOW) as freezer:
+        await setup_integration(hass, config_entry)
+
+        for tick, change_attrs in (
+            (46.723, {"latitude": 35.052, "longitude": 137.145}),
+            (2.5, {"latitude": 35.0519, "longitude": 137.1451}),
+            (53.821, {"latitude": 35.05, "longitude": 137.147}),
+        ):
+            freezer.tick(dt.timedelta(seconds=tick))
+            hass.states.async_set(
+                "person.akio_toyoda",
+                "not_home",
+                initial_attrs | change_attrs,
+            )
+            await hass.async_block_till_done()
+
+    diagnostics = await get_diagnostics_for_config_entry(
+        hass, hass_client, config_entry
+    )
+
+    assert diagnostics["trace"] == snapshot(matcher=_round_floats_matcher)
+
+
 @pytest.mark.parametrize(
     ("data", "mappers", "expected"),
     [
@@ -0,0 +1,187 @@
+"""Test distance calculations."""
+
+import datetime as dt
+import math
+
+import pytest
+
+from custom_components.movement.distance import (
+    BATCH_DISTANCE_MIN_POINTS,
+    DISTANCE_ENGINES,
+    LOCAL_PLANE_MAX_DISTANCE_KM,
+    DistanceCache,
+    geodesic,
+    haversine,
+    haversine_cached,
+    local_plane,
+)
+from custom_components.movement.types import (
+    CoordinateArrays,
+    DistanceEngine,
+    HistoryEntry,
+    Location,
+)
+
+ORD_LOCATION = Location(latitude=41.9760934, longitude=-87.8972986)
+SEA_LOCATION = Location(latitude=47.4483688, longitude=-122.3111675)
+START = dt.datetime(2025, 5, 20, 10, 51, 32, tzinfo=dt.UTC)
+
+
+def _points(count: int, step: float = 1) -> list[Location]:
+    return [
+        Location(
+            latitude=30.30714 + i * 0.0013 * step,
+            longitude=-97.72812 - i * 0.0021 * step,
+        )
+        for i in range(count)
+    ]
+
+
+def _coordinates(points: list[Location]) -> CoordinateArrays:
+    return CoordinateArrays(
+        [point.latitude for point in points],
+        [point.longitude for point in points],
+        [point.cos_latitude for point in points],
+    )
+
+
+def _offset(location: Location, distance: float, bearing: float) -> Location:
+    """Offset a location by approximately `distance` km along a bearing."""
+    return Location(
+        latitude=location.latitude + distance / 111.2 * math.cos(bearing),
+        longitude=location.longitude
+        + distance / 111.2 * math.sin(bearing) / location.cos_latitude,
+    )
+
+
+@pytest.mark.parametrize(
+    ("x", "y"),
+    [
+        ((30.30714, -97.72812), (30.30714, -97.72812)),
+        ((30.30714, -97.72812), (30.30731, -97.72844)),
+        ((35.054, 137.143), (35.052, 137.145)),
+        ((41.978611, -87.904724), (47.443546, -122.301659)),
+    ],
+    ids=["same", "short", "neighborhood", "ord_to_sea"],
+)
+def test_haversine_cached(x: tuple[float, float], y: tuple[float, float]) -> None:
+    """Test that distance from precomputed terms matches `haversine`."""
+    x_location = Location(*x)
+    y_location = Location(*y)
+
+    assert haversine_cached(x_location, y_location) == pytest.approx(
+        haversine(x_location, y_location),
+        rel=1e-9,
+        abs=1e-12,
+    )
+
+
+@pytest.mark.parametrize("latitude", [-80, -45, 0, 30.30714, 60, 80])
+@pytest.mark.parametrize("distance", [0.001, 0.05, 0.5, 2, LOCAL_PLANE_MAX_DISTANCE_KM])
+@pytest.mark.parametrize("bearing", [0, 45, 90, 135, 200, 290])
+def test_local_plane_error_bound(
+    latitude: float,
+    distance: float,
+    bearing: float,
+) -> None:
+    """Test that the local plane is within its error bound for short hops."""
+    x = Location(latitude=latitude, longitude=-97.72812)
+    y = _offset(x, distance, bearing * math.pi / 180)
+
+    assert local_plane(x, y) == pytest.approx(haversine(x, y), rel=1e-5)
+
+
+@pytest.mark.parametrize(
+    ("x", "y"),
+    [
+        (ORD_LOCATION, SEA_LOCATION),
+        (Location(latitude=85, longitude=10), Location(latitude=85.01, longitude=10)),
+        (
+            Location(latitude=0, longitude=179.99),
+            Location(latitude=0, longitude=-179.99),
+        ),
+    ],
+    ids=["long_hop", "near_pole", "antimeridian"],
+)
+def test_local_plane_fallback(x: Location, y: Location) -> None:
+    """Test that the local plane falls back to `haversine` where it degrades."""
+    assert local_plane(x, y) == haversine_cached(x, y)
+
+
+@pytest.mark.parametrize(
+    ("x", "y", "expected"),
+    [
+        (ORD_LOCATION, SEA_LOCATION, 2769.819931),
+        (
+            Location(latitude=-33.9, longitude=18.4),
+            Location(latitude=51.5, longitude=-0.1),
+            9631.973174,
+        ),
+        (
+            Location(latitude=10, longitude=10),
+            Location(latitude=10, longitude=10.2),
+            21.927872,
+        ),
+        (
+            Location(latitude=10, longitude=10),
+            Location(latitude=10, longitude=10),
+            0,
+        ),
+    ],
+    ids=["ord_to_sea", "cape_town_to_london", "just_over_threshold", "same"],
+)
+def test_geodesic(x: Location, y: Location, expected: float) -> None:
+    """Test geodesic distances against reference WGS84 values."""
+    assert geodesic(x, y) == pytest.approx(expected, abs=1e-6)
+
+
+def test_geodesic_nearly_antipodal() -> None:
+    """Test that nearly antipodal points fall back to the spherical distance."""
+    x = Location(latitude=0, longitude=0)
+    y = Location(latitude=0.5, longitude=179.7)
+
+    assert geodesic(x, y) == haversine_cached(x, y)
+
+
+@pytest.mark.parametrize("engine", list(DistanceEngine))
+@pytest.mark.parametrize("step", [1, 50], ids=["short_hops", "long_hops"])
+@pytest.mark.parametrize(
+    "count",
+    [0, 1, BATCH_DISTANCE_MIN_POINTS - 1, BATCH_DISTANCE_MIN_POINTS, 1000],
+    ids=["empty", "single", "below_threshold", "at_threshold", "full_history"],
+)
+def test_batch(engine: DistanceEngine, step: float, count: int) -> None:
+    """Test that batch distances match individual distance calculations."""
+    calculator = DISTANCE_ENGINES[engine]
+    to_location = Location(latitude=30.30714, longitude=-97.72812)
+    points = _points(count, step)
+
+    assert calculator.batch(_coordinates(points), to_location) == pytest.approx(
+        [calculator.pair(point, to_location) for point in points],
+        rel=1e-9,
+        abs=1e-12,
+    )
+
+
+def test_distance_cache() -> None:
+    """Test that cached distances are reused & counted."""
+    calculator = DISTANCE_ENGINES[DistanceEngine.HAVERSINE]
+    to_location = Location(latitude=30.30714, longitude=-97.72812)
+    points = _points(5)
+    coordinates = _coordinates(points)
+    expected = calculator.batch(coordinates, to_location)
+    cache = DistanceCache(
+        calculator,
+        [
+            HistoryEntry(timestamp=START.timestamp(), location=point, accuracy=5)
+            for point in points
+        ],
+        coordinates,
+        to_location,
+    )
+
+    assert cache.counters.hit_rate is None
+    assert cache.distance(2) == expected[2]
+    assert cache.get(slice(5)) == expected
+    assert cache.get(slice(-1, None)) == expected[-1:]
+    assert cache.counters.as_dict() == {"hits": 2, "misses": 5, "hit_rate": 2 / 7}
@@ -1,10 +1,17 @@
 """Test history."""
 
+import datetime as dt
+import math
+import random
+
+from freezegun.api import FrozenDateTimeFactory
 from homeassistant.core import State
+from homeassistant.util import dt as dt_util
 import pytest
 
 from custom_components.movement.history import HistoryRegistry
-from custom_components.movement.types import StateChangedData
+from custom_components.movement.retention import HISTORY_ENTRY_BYTES, RetentionPolicy
+from custom_components.movement.types import HistoryEntry, StateChangedData
 
 
 def test_prior_attribute_availability() -> None:
@@ -15,6 +22,10 @@ def test_prior_attribute_availability() -> None:
     with pytest.raises(AttributeError):
         history.prior  # noqa: B018
 
+    # and there is no current entry
+    with pytest.raises(IndexError):
+        history.current_entry  # noqa: B018
+
     history.add_entry_from_state_change(
         StateChangedData(
             old_state=State("person.akio_toyoda", {"state": "not_home"}),
@@ -29,3 +40,164 @@ def test_prior_attribute_availability() -> None:
     history.reset([])
     with pytest.raises(AttributeError):
         history.prior  # noqa: B018
+
+
+def test_prior_coordinates() -> None:
+    """Test the coordinates of prior items."""
+    history = HistoryRegistry()
+    history.add_entry_from_state_change(
+        StateChangedData(
+            old_state=State(
+                "person.akio_toyoda",
+                "not_home",
+                {"latitude": 35.054, "longitude": 137.143, "gps_accuracy": 5},
+            ),
+            new_state=State(
+                "person.akio_toyoda",
+                "not_home",
+                {"latitude": 35.052, "longitude": 137.145, "gps_accuracy": 5},
+            ),
+        ),
+    )
+
+    coordinates = history.prior_coordinates
+
+    assert coordinates == (
+        [35.054],
+        [137.143],
+        [math.cos(35.054 * math.pi / 180)],
+    )
+    assert history.prior_coordinates is coordinates
+
+    history.add_entry_from_state_change(
+        StateChangedData(
+            old_state=State("person.akio_toyoda", "not_home"),
+            new_state=State(
+                "person.akio_toyoda",
+                "not_home",
+                {"latitude": 35.05, "longitude": 137.147, "gps_accuracy": 5},
+            ),
+        ),
+    )
+
+    coordinates = history.prior_coordinates
+
+    assert coordinates == (
+        [35.052],
+        [137.145],
+        [math.cos(35.052 * math.pi / 180)],
+    )
+    assert history.prior_coordinates is coordinates
+
+
+@pytest.mark.parametrize(
+    ("min_age", "max_age", "expected"),
+    [
+        (0, 3600, range(4)),
+        (45, 3600, range(1, 4)),
+        (45, 1200, range(1, 2)),
+        (3600, 7200, range(4, 4)),
+    ],
+    ids=["all", "usable", "not_stale", "none"],
+)
+def test_prior_window(
+    freezer: FrozenDateTimeFactory,
+    min_age: float,
+    max_age: float,
+    expected: range,
+) -> None:
+    """Test finding the indexes of prior items within a range of ages."""
+    history = HistoryRegistry()
+
+    # older items are more accurate so that none are pruned
+    for accuracy, seconds in enumerate((0, 1800, 3000, 3560, 3580), start=1):
+        attributes = {
+            "latitude": 35.054,
+            "longitude": 137.143,
+            "gps_accuracy": accuracy,
+        }
+        freezer.move_to(
+            dt.datetime(2025, 1, 1, tzinfo=dt.UTC) + dt.timedelta(seconds=seconds)
+        )
+        history.add_entry_from_state_change(
+            StateChangedData(
+                old_state=State("person.akio_toyoda", "not_home", attributes),
+                new_state=State("person.akio_toyoda", "not_home", attributes),
+            ),
+        )
+
+    assert [entry.at.minute for entry in history.prior] == [59, 50, 30, 0]
+    assert (
+        history.prior_window(
+            dt_util.utcnow().timestamp(),
+            min_age=min_age,
+            max_age=max_age,
+        )
+        == expected
+    )
+
+
+@pytest.mark.parametrize(
+    "retention",
+    [
+        RetentionPolicy(max_entries=4),
+        RetentionPolicy(max_entries=1000, max_age=600),
+        RetentionPolicy(max_entries=1000, max_bytes=1024),
+    ],
+    ids=["max_entries", "max_age", "max_bytes"],
+)
+def test_retention(retention: RetentionPolicy) -> None:
+    """Test that the history is kept within the limits of the retention policy."""
+    rng = random.Random(3)  # noqa: S311
+    start = dt.datetime(2025, 5, 20, 10, 51, 32, tzinfo=dt.UTC)
+    at = start
+    history = HistoryRegistry(retention=retention)
+    max_count = retention.max_count(HISTORY_ENTRY_BYTES)
+    restored = [
+        HistoryEntry.from_dict(
+            {
+                "at": (start - dt.timedelta(seconds=seconds)).isoformat(),
+                "location": {"latitude": 35.054, "longitude": 137.143},
+                "accuracy": 10,
+                **extra,
+            },
+        )
+        for seconds, extra in (
+            (1, {"debounce": True}),
+            (10, {}),
+            (50, {"ignore": "inaccurate"}),
+            (90, {}),
+        )
+    ]
+    old_state = State("person.akio_toyoda", "not_home")
+
+    history.reset(restored)
+
+    for _ in range(300):
+        at += dt.timedelta(seconds=rng.choice((1, 4, 5, 20, 45, 60, 600, 3700)))
+        attributes = {
+            "latitude": 35.054 + rng.random() / 100,
+            "longitude": 137.143 + rng.random() / 100,
+            "gps_accuracy": rng.choice((3, 5, 10, 20, 50, 1500)),
+        }
+
+        if rng.random() < 0.05:
+            attributes.pop("latitude")
+
+        new_state = State("person.akio_toyoda", "not_home", attributes)
+        history.add_entry_from_state_change(
+            StateChangedData(old_state=old_state, new_state=new_state, at=at),
+        )
+        old_state = new_state
+
+        assert len(history.items) <= max_count
+
+        # the newest entry is always kept
+        if retention.max_age is not None:
+            assert all(
+                at.timestamp() - entry.timestamp <= retention.max_age
+                for entry in history.items[1:]
+            )
+
+    assert history.retention_counters.evicted
+    assert history.retention_counters.peak_entries <= max_count
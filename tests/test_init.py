@@ -74,6 +74,25 @@ async def test_unload(
     assert not hass.data.get(DOMAIN)
 
 
+async def test_remove(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    mock_config_entry: MockConfigEntry,
+) -> None:
+    await setup_integration(hass, mock_config_entry)
+
+    assert await hass.config_entries.async_unload(mock_config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    # unloading writes pending history
+    assert f"{DOMAIN}.{mock_config_entry.entry_id}" in hass_storage
+
+    assert await hass.config_entries.async_remove(mock_config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert f"{DOMAIN}.{mock_config_entry.entry_id}" not in hass_storage
+
+
 async def test_unload_failure(
     hass: HomeAssistant,
     mock_config_entry: MockConfigEntry,
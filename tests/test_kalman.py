@@ -0,0 +1,130 @@
+"""Test Kalman filter speed estimation."""
+
+import datetime as dt
+
+import pytest
+
+from custom_components.movement.kalman import KalmanSpeedFilter
+from custom_components.movement.types import HistoryEntry, Location
+
+START = dt.datetime(2025, 5, 20, 10, 51, 32, tzinfo=dt.UTC)
+
+# meters per degree of latitude
+METERS_PER_DEGREE = 111_194.9
+
+
+def _entry(
+    seconds: float,
+    latitude: float,
+    longitude: float = 137.143,
+    accuracy: float = 5,
+) -> HistoryEntry:
+    return HistoryEntry(
+        timestamp=START.timestamp() + seconds,
+        location=Location(latitude=latitude, longitude=longitude),
+        accuracy=accuracy,
+    )
+
+
+@pytest.mark.parametrize(
+    ("speed", "interval", "accuracy"),
+    [
+        (1.4, 60, 5),
+        (10, 30, 10),
+        (30, 10, 5),
+        (30, 60, HistoryEntry.NO_ACCURACY),
+    ],
+    ids=["walking", "biking", "driving", "without_accuracy"],
+)
+def test_constant_speed(speed: float, interval: float, accuracy: float) -> None:
+    """Test that the filter tracks a constant speed (in m/s)."""
+    speed_filter = KalmanSpeedFilter()
+
+    for index in range(10):
+        seconds = index * interval
+        speed_filter.add_entry(
+            _entry(
+                seconds,
+                35.054 + seconds * speed / METERS_PER_DEGREE,
+                accuracy=accuracy,
+            ),
+        )
+
+    assert speed_filter.is_confident
+    assert speed_filter.speed == pytest.approx(speed * 3.6, rel=1e-3)
+
+
+def test_stationary() -> None:
+    """Test that movement within GPS accuracy is not confident."""
+    speed_filter = KalmanSpeedFilter()
+
+    for index, offset in enumerate((0, 3, -2, 4, -1, 2)):
+        speed_filter.add_entry(
+            _entry(index * 60, 35.054 + offset / METERS_PER_DEGREE, accuracy=10),
+        )
+
+    assert not speed_filter.is_confident
+
+
+def test_usable_delta() -> None:
+    """Test that entries must span `SPEED_USABLE_DELTA` to be confident."""
+    speed_filter = KalmanSpeedFilter()
+
+    assert (speed_filter.initialized, speed_filter.is_confident) == (False, False)
+
+    speed_filter.add_entry(_entry(0, 35.054))
+    speed_filter.add_entry(_entry(30, 35.055))
+
+    assert (speed_filter.initialized, speed_filter.is_confident) == (True, False)
+
+    speed_filter.add_entry(_entry(60, 35.056))
+
+    assert speed_filter.is_confident
+
+
+def test_restart_after_expiration() -> None:
+    """Test that the filter restarts after the state expires."""
+    speed_filter = KalmanSpeedFilter()
+    speed_filter.add_entry(_entry(0, 35.054))
+    speed_filter.add_entry(_entry(60, 35.055))
+
+    assert speed_filter.is_confident
+
+    speed_filter.add_entry(_entry(60 + 3601, 35.155))
+
+    assert (speed_filter.is_confident, speed_filter.speed) == (False, 0)
+
+
+def test_clustered_update_rejected() -> None:
+    """Test that an unlikely clustered update is rejected."""
+    speed_filter = KalmanSpeedFilter()
+
+    for index in range(5):
+        speed_filter.add_entry(
+            _entry(index * 60, 35.054 + index * 60 / METERS_PER_DEGREE),
+        )
+
+    speed = speed_filter.speed
+    speed_filter.add_entry(_entry(250, 35.054 + 1000 / METERS_PER_DEGREE))
+
+    assert speed_filter.speed == speed
+
+
+def test_antimeridian() -> None:
+    """Test movement across the antimeridian."""
+    speed_filter = KalmanSpeedFilter()
+    speed_filter.add_entry(_entry(0, 0, longitude=179.999))
+    speed_filter.add_entry(_entry(60, 0, longitude=-179.999))
+
+    assert speed_filter.speed == pytest.approx(
+        2 * 0.001 * METERS_PER_DEGREE / 60 * 3.6, rel=1e-2
+    )
+
+
+def test_reset() -> None:
+    """Test resetting the filter."""
+    speed_filter = KalmanSpeedFilter()
+    speed_filter.add_entry(_entry(0, 35.054))
+    speed_filter.reset()
+
+    assert not speed_filter.initialized
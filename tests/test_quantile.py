@@ -0,0 +1,53 @@
+"""Test streaming quantiles."""
+
+from collections import deque
+import random
+
+import pytest
+
+from custom_components.movement.quantile import QuantileSketch
+
+
+@pytest.mark.parametrize("q", [0, 0.5, 0.95, 1])
+def test_quantile_within_relative_accuracy(q: float) -> None:
+    """Test that quantiles of a sliding window are within the accuracy."""
+    rng = random.Random(5)  # noqa: S311
+    sketch = QuantileSketch()
+    window: deque[float] = deque()
+
+    for _ in range(3000):
+        value = rng.choice((rng.uniform(0.5, 8), rng.uniform(20, 120), 900))
+        sketch.add(value)
+        window.append(value)
+
+        if len(window) > 200:
+            sketch.remove(window.popleft())
+
+        expected = sorted(window)[int(q * (len(window) - 1))]
+
+        assert sketch.count == len(window)
+        assert sketch.quantile(q) == pytest.approx(expected, rel=0.01)
+
+
+def test_quantile_bounds() -> None:
+    """Test values beyond the range of the buckets."""
+    sketch = QuantileSketch(buckets=8)
+
+    assert sketch.quantile(0.5) is None
+
+    sketch.add(0)
+    sketch.add(-3)
+    sketch.add(0.001)
+
+    assert sketch.quantile(1) == 0
+
+    sketch.add(1e9)
+
+    assert sketch.quantile(1) == pytest.approx(0.01 * 1.0202**7, rel=0.01)
+
+    sketch.remove(1e9)
+    sketch.remove(0)
+    sketch.remove(-3)
+    sketch.remove(0.001)
+
+    assert sketch.quantile(0) is None
@@ -0,0 +1,68 @@
+"""Test retention."""
+
+import pytest
+
+from custom_components.movement.const import (
+    CONF_RETENTION_MAX_AGE,
+    CONF_RETENTION_MAX_ENTRIES,
+    CONF_RETENTION_MAX_SIZE,
+)
+from custom_components.movement.retention import RetentionCounters, RetentionPolicy
+
+
+@pytest.mark.parametrize(
+    ("data", "expected"),
+    [
+        ({}, RetentionPolicy(max_entries=1000)),
+        (
+            {
+                CONF_RETENTION_MAX_ENTRIES: 200.0,
+                CONF_RETENTION_MAX_AGE: 0,
+                CONF_RETENTION_MAX_SIZE: 0,
+            },
+            RetentionPolicy(max_entries=200),
+        ),
+        (
+            {CONF_RETENTION_MAX_AGE: 90, CONF_RETENTION_MAX_SIZE: 64},
+            RetentionPolicy(max_entries=1000, max_age=5400, max_bytes=65536),
+        ),
+        (
+            {CONF_RETENTION_MAX_ENTRIES: 50_000, CONF_RETENTION_MAX_AGE: 30},
+            RetentionPolicy(max_entries=10_000, max_age=3600),
+        ),
+    ],
+    ids=["defaults", "unlimited", "limited", "out_of_range"],
+)
+def test_from_config(data: dict, expected: RetentionPolicy) -> None:
+    """Test that policies are created from config entry data."""
+    assert RetentionPolicy.from_config(data, max_entries=1000) == expected
+
+
+@pytest.mark.parametrize(
+    ("policy", "expected"),
+    [
+        (RetentionPolicy(max_entries=1000), 1000),
+        (RetentionPolicy(max_entries=1000, max_bytes=10_000), 100),
+        (RetentionPolicy(max_entries=10, max_bytes=10_000), 10),
+        (RetentionPolicy(max_entries=1000, max_bytes=10), 2),
+    ],
+    ids=["entries", "bytes", "entries_within_bytes", "minimum"],
+)
+def test_max_count(policy: RetentionPolicy, expected: int) -> None:
+    """Test that the number of entries is limited by count & size."""
+    assert policy.max_count(100) == expected
+
+
+def test_counters() -> None:
+    """Test that evictions are totaled & the peak size is kept."""
+    counters = RetentionCounters(entry_bytes=100)
+
+    counters.record(3)
+    counters.record(5, evicted=2)
+    counters.record(4, evicted=1)
+
+    assert counters.as_dict() == {
+        "evicted": 3,
+        "peak_entries": 5,
+        "peak_bytes": 500,
+    }
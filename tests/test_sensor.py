@@ -14,13 +14,15 @@ from pytest_homeassistant_custom_component.common import (
 )
 from syrupy.assertion import SnapshotAssertion
 
-from custom_components.movement.const import DOMAIN
+from custom_components.movement.const import CONF_SPEED_ENGINE, DOMAIN
+from custom_components.movement.store import HistoryStore, encode_history
 from custom_components.movement.types import (
     ABSENT_NONE,
     HistoryEntry,
     Location,
     ModeOfTransit,
     MovementData,
+    SpeedEngine,
     TransitionEntry,
     TypedMovementData,
 )
@@ -91,6 +93,39 @@ async def test_change_on_tracked_device(
         assert hass.states.get(entity.entity_id) == snapshot(name=entity.entity_id)
 
 
+async def test_kalman_speed_engine(
+    hass: HomeAssistant,
+    mock_config_entry: MockConfigEntry,
+    mock_now: MockNow,
+) -> None:
+    """Test the speed sensor when using the Kalman filter speed engine."""
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        entry_id=mock_config_entry.entry_id,
+        data={**mock_config_entry.data, CONF_SPEED_ENGINE: SpeedEngine.KALMAN},
+    )
+    attrs = {"latitude": 35.054, "longitude": 137.143, "gps_accuracy": 5}
+
+    hass.states.async_set("person.akio_toyoda", "not_home", attrs)
+
+    await setup_integration(hass, config_entry)
+
+    # move 100m north every minute (6 m/s)
+    for index in range(1, 6):
+        mock_now._tick(60)
+        hass.states.async_set(
+            "person.akio_toyoda",
+            "not_home",
+            attrs | {"latitude": 35.054 + index * 100 / 111_194.9},
+        )
+        await hass.async_block_till_done()
+
+    state = hass.states.get("sensor.mock_title_speed")
+
+    assert state is not None
+    assert float(state.state) == pytest.approx(6, abs=0.01)
+
+
 RESTORE_STATE_PARAMETRIZE_ARGS = [
     ("entity_id", "data", "history", "transition", "attr", "expected_state"),
     [
@@ -106,18 +141,24 @@ RESTORE_STATE_PARAMETRIZE_ARGS = [
             ),
             [
                 HistoryEntry(
-                    at=dt.datetime(2025, 5, 20, 21, 21, 45, 3945, tzinfo=dt.UTC),
+                    timestamp=dt.datetime(
+                        2025, 5, 20, 21, 21, 45, 3945, tzinfo=dt.UTC
+                    ).timestamp(),
                     location=Location(latitude=35.0539, longitude=137.1441),
                     accuracy=6,
                 ),
                 HistoryEntry(
-                    at=dt.datetime(2025, 5, 20, 21, 21, 45, 3945, tzinfo=dt.UTC),
+                    timestamp=dt.datetime(
+                        2025, 5, 20, 21, 21, 45, 3945, tzinfo=dt.UTC
+                    ).timestamp(),
                     location=Location(latitude=35.0539, longitude=137.1441),
                     accuracy=4,
                     debounce=True,
                 ),
                 HistoryEntry(
-                    at=dt.datetime(2025, 5, 20, 21, 18, 15, 2384, tzinfo=dt.UTC),
+                    timestamp=dt.datetime(
+                        2025, 5, 20, 21, 18, 15, 2384, tzinfo=dt.UTC
+                    ).timestamp(),
                     location=ABSENT_NONE,
                     accuracy=832,
                     ignore="inaccurate",
@@ -213,7 +254,7 @@ async def test_restore_sensor_save_state(
     expected_stored_data = data.as_dict()
 
     if history is not None:
-        expected_stored_data["history"] = [item.as_dict() for item in history]
+        expected_stored_data["history"] = encode_history(history)
 
     if transition is not None:
         expected_stored_data["transition"] = [item.as_dict() for item in transition]
@@ -238,10 +279,10 @@ async def test_restore_state(
     expected_state: str,
 ) -> None:
     """Test restoring sensor/coordinator state."""
-    extra_stored_data = {}
+    extra_stored_data: dict[str, Any] = {}
 
     if history is not None:
-        extra_stored_data["history"] = [item.as_dict() for item in history]
+        extra_stored_data["history"] = encode_history(history)
 
     if transition is not None:
         extra_stored_data["transition"] = [item.as_dict() for item in transition]
@@ -275,3 +316,66 @@ async def test_restore_state(
 
     if transition is not None:
         assert coordinator.transition.items == snapshot(name="transition")
+
+
+@pytest.mark.parametrize(
+    ("stored_delta", "expected_source"),
+    [
+        (dt.timedelta(0), "store"),
+        (dt.timedelta(minutes=-5), "sensor"),
+    ],
+    ids=["store_is_current", "store_is_outdated"],
+)
+async def test_restore_history_from_store(
+    hass: HomeAssistant,
+    mock_config_entry: MockConfigEntry,
+    stored_delta: dt.timedelta,
+    expected_source: str,
+) -> None:
+    """Test restoring the full history from the store."""
+    at = dt.datetime(2025, 5, 20, 21, 21, 45, 3945, tzinfo=dt.UTC)
+    location = Location(latitude=35.0539, longitude=137.1441)
+    restored_history = [
+        HistoryEntry(timestamp=at.timestamp(), location=location, accuracy=6)
+    ]
+    restored_transition = [TransitionEntry(distance=0.25)]
+    stored_history = [
+        HistoryEntry(
+            timestamp=(at + stored_delta - dt.timedelta(minutes=1) * index).timestamp(),
+            location=location,
+            accuracy=5,
+        )
+        for index in range(40)
+    ]
+
+    store = HistoryStore(hass, mock_config_entry.entry_id)
+    store.async_schedule_save(stored_history, None)
+    await store.async_flush()
+
+    mock_restore_cache_with_extra_data(
+        hass,
+        (
+            (
+                State("sensor.mock_title_distance_traveled", "4.56"),
+                MovementData(4.56, 2.31, 11.3, ModeOfTransit.BIKING, 4, 2).as_dict()
+                | {
+                    # history in the format restored by prior versions
+                    "history": [item.as_dict() for item in restored_history],
+                    "transition": [item.as_dict() for item in restored_transition],
+                },
+            ),
+        ),
+    )
+
+    await setup_integration(hass, mock_config_entry)
+
+    coordinator = mock_config_entry.runtime_data.coordinator
+
+    assert coordinator.data.distance == 4.56
+
+    if expected_source == "store":
+        assert coordinator.history.items == stored_history
+        assert coordinator.transition.items is None
+    else:
+        assert coordinator.history.items == restored_history
+        assert coordinator.transition.items == restored_transition
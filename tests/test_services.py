@@ -1,6 +1,5 @@
 """Test services for the Movement integration."""
 
-import datetime as dt
 from enum import Flag
 import re
 from typing import Any, cast
@@ -92,7 +91,7 @@ async def test_add_distance_service(
         ),
         history=[
             HistoryEntry(
-                at=dt_util.utcnow() - dt.timedelta(seconds=51.23),
+                timestamp=dt_util.utcnow().timestamp() - 51.23,
                 location=Location(55.301973, -114.820543),
                 accuracy=44,
             ),
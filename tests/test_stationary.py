@@ -0,0 +1,78 @@
+"""Test stationary detection."""
+
+import datetime as dt
+
+import pytest
+
+from custom_components.movement.stationary import StationaryCell
+from custom_components.movement.types import ABSENT_NONE, HistoryEntry, Location
+
+START = dt.datetime(2025, 5, 20, 10, 51, 32, tzinfo=dt.UTC)
+
+# meters per degree of latitude
+METERS_PER_DEGREE = 111_194.9
+
+
+def _entry(
+    seconds: float,
+    meters: float = 0,
+    accuracy: float = 10,
+) -> HistoryEntry:
+    return HistoryEntry(
+        timestamp=START.timestamp() + seconds,
+        location=Location(
+            latitude=35.054 + meters / METERS_PER_DEGREE,
+            longitude=137.143,
+        ),
+        accuracy=accuracy,
+    )
+
+
+@pytest.mark.parametrize(
+    ("entries", "expected"),
+    [
+        ([_entry(0), _entry(30, 3), _entry(60, -3)], [False, True, True]),
+        ([_entry(0), _entry(30, 8), _entry(60, -13)], [False, True, False]),
+        ([_entry(0), _entry(30, 25), _entry(60, 27)], [False, False, True]),
+        ([_entry(0), _entry(30, 3, accuracy=1), _entry(60, -9)], [False, True, False]),
+        (
+            [_entry(0, accuracy=HistoryEntry.NO_ACCURACY), _entry(30), _entry(60)],
+            [False, False, True],
+        ),
+        ([_entry(0), _entry(30), _entry(30), _entry(60)], [False, True, False, False]),
+    ],
+    ids=[
+        "jitter",
+        "jitter_beyond_accuracy",
+        "moved",
+        "better_accuracy",
+        "without_accuracy",
+        "out_of_order",
+    ],
+)
+def test_add(entries: list[HistoryEntry], expected: list[bool]) -> None:
+    """Test that entries are within the envelope of the cell."""
+    cell = StationaryCell()
+
+    assert [cell.add(entry) for entry in entries] == expected
+
+
+def test_contains() -> None:
+    """Test that entries are members from the time of the anchor."""
+    cell = StationaryCell()
+    entries = [_entry(0), _entry(30, 3), _entry(60, 30), _entry(90, 28)]
+
+    assert not cell.contains(entries[0])
+    assert not cell.add(
+        HistoryEntry(timestamp=START.timestamp(), location=ABSENT_NONE, accuracy=10),
+    )
+    assert not cell.contains(entries[0])
+
+    for entry in entries:
+        cell.add(entry)
+
+    assert [cell.contains(entry) for entry in entries] == [False, False, True, True]
+
+    cell.reset(entries[:2][::-1])
+
+    assert [cell.contains(entry) for entry in entries] == [True, True, True, True]
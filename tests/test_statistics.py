@@ -1,6 +1,11 @@
 """Test statistics."""
 
 from collections import deque
+from collections.abc import Callable
+from datetime import timedelta
+import math
+import random
+from unittest.mock import Mock
 
 from homeassistant.core import HomeAssistant
 import pytest
@@ -8,7 +13,11 @@ import pytest
 from custom_components.movement.statistics import (
     STAT_AVERAGE_LINEAR,
     STAT_CHANGE_SECOND,
+    STAT_DECAYED_AVERAGE,
+    STAT_DECAYED_RATE,
+    STAT_PERCENTILE,
     STAT_VALUE_MAX,
+    STAT_VALUE_MIN,
     Statistic,
 )
 
@@ -24,6 +33,10 @@ from custom_components.movement.statistics import (
         (STAT_CHANGE_SECOND, ([], []), None),
         (STAT_VALUE_MAX, ([1, 2], [0, 1]), 2),
         (STAT_VALUE_MAX, ([], []), None),
+        (STAT_VALUE_MIN, ([2, 1, 3], [0, 1, 2]), 1),
+        (STAT_VALUE_MIN, ([], []), None),
+        (STAT_PERCENTILE, ([4, 0, 2], [0, 1, 2]), pytest.approx(2, rel=0.01)),
+        (STAT_PERCENTILE, ([], []), None),
     ],
     ids=[
         "avg of {5}",
@@ -34,6 +47,10 @@ from custom_components.movement.statistics import (
         "change/s of {}",
         "max of {1,2}",
         "max of {}",
+        "min of {2,1,3}",
+        "min of {}",
+        "median of {4,0,2}",
+        "median of {}",
     ],
 )
 def test_statistics(
@@ -53,3 +70,229 @@ def test_statistics(
         stat.add_state(value, age)
 
     assert stat.value == result
+
+
+@pytest.mark.parametrize(
+    ("samples_max_buffer_size", "samples_max_age"),
+    [(None, timedelta(minutes=8)), (20, None), (20, timedelta(minutes=8))],
+    ids=["max_age", "max_buffer_size", "both"],
+)
+def test_average_linear_running_area(
+    samples_max_buffer_size: int | None,
+    samples_max_age: timedelta | None,
+) -> None:
+    """Test that the running area matches the area over all states."""
+    rng = random.Random(7)  # noqa: S311
+    stat = Statistic(
+        state_characteristic=STAT_AVERAGE_LINEAR,
+        samples_max_buffer_size=samples_max_buffer_size,
+        samples_max_age=samples_max_age,
+    )
+    timestamp = 1_747_738_292.0
+
+    for _ in range(2000):
+        timestamp += rng.choice((0.5, 5, 30, 60, 600))
+        stat.add_state(rng.uniform(0, 120), timestamp)
+
+        if rng.random() < 0.1:
+            timestamp += 60
+            stat.update(timestamp)
+
+        assert stat.value == pytest.approx(_average_linear(stat.states, stat.ages))
+
+
+@pytest.mark.parametrize(
+    ("state_characteristic", "expected_fn"),
+    [(STAT_VALUE_MAX, max), (STAT_VALUE_MIN, min)],
+    ids=["max", "min"],
+)
+@pytest.mark.parametrize(
+    ("samples_max_buffer_size", "samples_max_age"),
+    [(None, timedelta(minutes=3)), (20, None), (20, timedelta(minutes=3))],
+    ids=["max_age", "max_buffer_size", "both"],
+)
+def test_value_extreme_monotonic(
+    state_characteristic: str,
+    expected_fn: Callable[[deque[float]], float],
+    samples_max_buffer_size: int | None,
+    samples_max_age: timedelta | None,
+) -> None:
+    """Test that the kept extreme matches the extreme of all states."""
+    rng = random.Random(11)  # noqa: S311
+    stat = Statistic(
+        state_characteristic=state_characteristic,
+        samples_max_buffer_size=samples_max_buffer_size,
+        samples_max_age=samples_max_age,
+    )
+    timestamp = 1_747_738_292.0
+
+    for _ in range(2000):
+        timestamp += rng.choice((0.5, 5, 10, 30, 120))
+        stat.add_state(rng.choice((0, 5, 5, 20, rng.uniform(0, 120))), timestamp)
+
+        if rng.random() < 0.1:
+            timestamp += 60
+            stat.update(timestamp)
+
+        assert stat.value == (expected_fn(stat.states) if stat.states else None)
+
+
+def test_percentile_window() -> None:
+    """Test that the percentile is of the states within the window."""
+    rng = random.Random(13)  # noqa: S311
+    stat = Statistic(
+        state_characteristic=STAT_PERCENTILE,
+        samples_max_buffer_size=None,
+        samples_max_age=timedelta(minutes=3),
+        percentile=95,
+    )
+    other = Statistic(
+        state_characteristic=STAT_VALUE_MAX,
+        samples_max_buffer_size=None,
+        samples_max_age=None,
+    )
+    timestamp = 1_747_738_292.0
+
+    assert other.quantile is None
+    assert other.decayed_average is None
+    assert other.decayed_rate is None
+
+    for _ in range(1000):
+        timestamp += rng.choice((1, 5, 10, 30, 240))
+        stat.add_state(rng.uniform(0, 120), timestamp)
+        expected = sorted(stat.states)[int(0.95 * (len(stat.states) - 1))]
+
+        assert stat.value == pytest.approx(expected, rel=0.01)
+
+
+def test_decayed_average() -> None:
+    """Test the time-decayed average."""
+    stat = Statistic(
+        state_characteristic=STAT_DECAYED_AVERAGE,
+        samples_max_buffer_size=None,
+        samples_max_age=timedelta(minutes=8),
+    )
+    timestamp = 1_747_738_292.0
+
+    stat.add_state(10, timestamp)
+
+    assert stat.value == pytest.approx(10)
+
+    # a steady state is the average, and older states are forgotten
+    for _ in range(100):
+        timestamp += 30
+        stat.add_state(50, timestamp)
+
+    stat.add_state(70, timestamp)
+
+    assert stat.value == pytest.approx(50, rel=1e-3)
+
+    # half of the weight is within a quarter of the max age (of 4 minutes)
+    # after a change to a new state.
+    for _ in range(8):
+        timestamp += 30
+        stat.add_state(30, timestamp)
+
+    assert stat.value == pytest.approx(30 + 20 * math.exp(-1), rel=0.05)
+    assert not stat.states
+    assert stat.next_to_purge_timestamp() == timestamp + 8 * 60
+
+    stat.update(timestamp + 8 * 60 - 1)
+    value_before_expiry = stat.value
+    stat.update(timestamp + 8 * 60)
+
+    assert value_before_expiry is not None
+    assert stat.value is None
+    assert stat.next_to_purge_timestamp() is None
+
+
+def test_decayed_rate() -> None:
+    """Test the time-decayed rate of change."""
+    stat = Statistic(
+        state_characteristic=STAT_DECAYED_RATE,
+        samples_max_buffer_size=None,
+        samples_max_age=timedelta(minutes=20),
+    )
+    timestamp = 1_747_738_292.0
+
+    stat.add_state(0, timestamp)
+
+    assert stat.value is None
+
+    for count in range(1, 61):
+        timestamp += _interval(count)
+        stat.add_state(count, timestamp)
+
+    assert stat.value == pytest.approx(1 / 20, rel=0.05)
+
+    # the rate decays without changes
+    stat.update(timestamp + 10 * 60)
+
+    assert stat.value == pytest.approx(1 / 20 * math.exp(-1), rel=0.05)
+
+    stat.update(timestamp + 20 * 60)
+
+    assert stat.value is None
+
+
+def test_decayed_requires_max_age() -> None:
+    """Test that decayed characteristics need a max age."""
+    with pytest.raises(ValueError, match="requires samples_max_age"):
+        Statistic(
+            state_characteristic=STAT_DECAYED_AVERAGE,
+            samples_max_buffer_size=None,
+            samples_max_age=None,
+        )
+
+
+def test_update_only_when_dirty() -> None:
+    """Test that the value is only recalculated after changes or purges."""
+    stat = Statistic(
+        state_characteristic=STAT_AVERAGE_LINEAR,
+        samples_max_buffer_size=None,
+        samples_max_age=timedelta(minutes=1),
+    )
+    stat._state_characteristic_fn = Mock(wraps=stat._state_characteristic_fn)
+    timestamp = 1_747_738_292.0
+
+    stat.add_state(2, timestamp)
+    stat.add_state(4, timestamp + 30)
+
+    assert stat._state_characteristic_fn.call_count == 2
+
+    # nothing has changed & no states are old enough to purge
+    stat.update(timestamp + 30)
+    stat.update(timestamp + 60)
+
+    assert stat.value == 3
+    assert stat._state_characteristic_fn.call_count == 2
+
+    # the oldest state is purged
+    stat.update(timestamp + 61)
+
+    assert stat.value == 4
+    assert stat._state_characteristic_fn.call_count == 3
+
+    stat.update(timestamp + 62)
+
+    assert stat._state_characteristic_fn.call_count == 3
+
+    stat.add_state(6, timestamp + 70)
+
+    assert stat.value == 5
+    assert stat._state_characteristic_fn.call_count == 4
+
+
+def _interval(count: int) -> float:
+    return 20 + (count % 3 - 1) * 5
+
+
+def _average_linear(states: deque[float], ages: deque[float]) -> float | None:
+    if len(states) == 1:
+        return states[0]
+    if len(states) >= 2:
+        area: float = 0
+        for i in range(1, len(states)):
+            area += 0.5 * (states[i] + states[i - 1]) * (ages[i] - ages[i - 1])
+        return area / (ages[-1] - ages[0])
+    return None
@@ -0,0 +1,101 @@
+"""Test history storage."""
+
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+import pytest
+from syrupy.assertion import SnapshotAssertion
+
+from custom_components.movement.store import STORAGE_SAVE_DELAY, HistoryStore
+from custom_components.movement.types import (
+    ABSENT_NONE,
+    HistoryEntry,
+    Location,
+    TransitionEntry,
+)
+
+from . import MOCK_UTC_NOW, MockNow
+
+STORAGE_KEY = "movement.mock-entry-id"
+
+HISTORY = [
+    HistoryEntry(
+        timestamp=MOCK_UTC_NOW.timestamp(),
+        location=Location(latitude=35.054, longitude=137.143),
+        accuracy=5,
+        debounce=True,
+    ),
+    HistoryEntry(
+        timestamp=MOCK_UTC_NOW.timestamp() - 3,
+        location=Location(latitude=35.053, longitude=137.144),
+        accuracy=HistoryEntry.NO_ACCURACY,
+    ),
+    HistoryEntry(
+        timestamp=MOCK_UTC_NOW.timestamp() - 60,
+        location=ABSENT_NONE,
+        accuracy=1500,
+        ignore="inaccurate",
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    "transition",
+    [
+        None,
+        [
+            TransitionEntry(distance=0.05),
+            TransitionEntry(distance=0.1, adjustments=0.02),
+        ],
+    ],
+    ids=["without_transition", "with_transition"],
+)
+async def test_round_trip(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    snapshot: SnapshotAssertion,
+    transition: list[TransitionEntry] | None,
+) -> None:
+    """Test that stored entries are loaded unchanged."""
+    store = HistoryStore(hass, "mock-entry-id")
+
+    assert await store.async_load_entries() is None
+
+    store.async_schedule_save(HISTORY, transition)
+    await store.async_flush()
+
+    assert hass_storage[STORAGE_KEY]["data"] == snapshot
+
+    stored = await HistoryStore(hass, "mock-entry-id").async_load_entries()
+
+    assert stored
+    assert stored.history == HISTORY
+    assert stored.transition == transition
+
+
+async def test_coalesced_writes(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    mock_now: MockNow,
+) -> None:
+    """Test that a steady stream of updates is written once per delay."""
+    store = HistoryStore(hass, "mock-entry-id")
+    interval = 10
+    written: dict[int, int] = {}
+
+    for index in range(int(STORAGE_SAVE_DELAY.total_seconds()) * 3 // interval):
+        store.async_schedule_save(HISTORY * (index + 1), None)
+        mock_now._tick(interval)
+        await hass.async_block_till_done()
+
+        if STORAGE_KEY in hass_storage:
+            count = len(hass_storage.pop(STORAGE_KEY)["data"]["history"]["at"])
+            written[(index + 1) * interval] = count // len(HISTORY)
+
+    # writes include the most recent update at the time of the write & are not
+    # postponed by further updates.
+    assert written == {60: 6, 120: 12, 180: 18}
+
+    await store.async_flush()
+
+    assert STORAGE_KEY not in hass_storage
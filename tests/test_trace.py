@@ -0,0 +1,14 @@
+"""Test calculation tracing."""
+
+from custom_components.movement.trace import TraceBuffer
+
+
+def test_trace_buffer() -> None:
+    """Test that only the most recent records are kept."""
+    trace = TraceBuffer(size=2)
+    trace.record("first", 1)
+    trace.record("second", 2, 0.5)
+    trace.record("third")
+
+    assert trace.records == [("second", 2, 0.5), ("third",)]
+    assert trace.as_list() == [["second", 2, 0.5], ["third"]]
@@ -3,8 +3,18 @@
 import pytest
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
-from custom_components.movement.transition import TransitionRegistry
-from custom_components.movement.types import MovementData
+from custom_components.movement.const import CONF_RETENTION_MAX_SIZE, DOMAIN
+from custom_components.movement.retention import TRANSITION_ENTRY_BYTES
+from custom_components.movement.transition import (
+    TRANSITION_ENTRIES_MAX,
+    TransitionRegistry,
+)
+from custom_components.movement.types import (
+    ABSENT_NONE,
+    ModeOfTransit,
+    MovementData,
+    TransitionEntry,
+)
 
 
 def test_prior_attribute_availability(
@@ -51,3 +61,137 @@ def test_prior_attribute_availability(
         transition.prior  # noqa: B018
     with pytest.raises(AttributeError):
         transition.prior  # noqa: B018
+
+
+def test_running_totals(
+    mock_config_entry: MockConfigEntry,
+) -> None:
+    """Test that totals match the items as they're added, finalized & cleared."""
+    transition = TransitionRegistry(
+        mock_config_entry,
+        [TransitionEntry(distance=0.3, adjustments=0.1), TransitionEntry(distance=1)],
+    )
+
+    def assert_totals() -> None:
+        items = transition.items or []
+        pending = [item for item in items if item.adjustments == ABSENT_NONE]
+        finalized = [item for item in items if item.adjustments != ABSENT_NONE]
+
+        assert transition.pending_count == len(pending)
+        assert transition.pending_distance == pytest.approx(
+            sum(item.distance for item in pending)
+        )
+        assert transition.finalized_distance == pytest.approx(
+            sum(item.distance for item in finalized)
+        )
+        assert transition.finalized_adjustments == pytest.approx(
+            sum(item.adjustments for item in finalized)
+        )
+
+    assert_totals()
+
+    for distance in (0.2, 0, 0.4):
+        transition.process_update(
+            _movement_data(distance=distance),
+            transitioning=True,
+        )
+        assert_totals()
+
+    assert transition.pending_count == 3
+    assert transition.pending_distance == pytest.approx(1.6)
+
+    transition.process_update(
+        _movement_data(speed=80, mode_of_transit=ModeOfTransit.DRIVING),
+        transitioning=False,
+    )
+    assert_totals()
+
+    assert transition.pending_count == 0
+    assert transition.finalized_distance > 0
+
+    transition.process_update(_movement_data(), transitioning=False)
+    assert_totals()
+
+    assert transition.items is None
+
+
+def test_empty_items_kept(
+    mock_config_entry: MockConfigEntry,
+) -> None:
+    """Test that empty items are not cleared to `None`."""
+    transition = TransitionRegistry(mock_config_entry)
+
+    # a transitioning update without distance leaves an empty list.
+    transition.process_update(_movement_data(), transitioning=True)
+
+    assert transition.items == []
+
+    transition.process_update(
+        _movement_data(speed=80, mode_of_transit=ModeOfTransit.DRIVING),
+        transitioning=False,
+    )
+
+    assert transition.items == []
+    assert transition.prior == []
+
+
+def test_maximum_entries(
+    mock_config_entry: MockConfigEntry,
+) -> None:
+    """Test that the number of entries is constrained."""
+    transition = TransitionRegistry(
+        mock_config_entry,
+        [TransitionEntry(distance=1)] * TRANSITION_ENTRIES_MAX,
+    )
+    transition.process_update(_movement_data(distance=2), transitioning=True)
+
+    # the oldest entry is evicted
+    assert len(transition.items or []) == TRANSITION_ENTRIES_MAX
+    assert transition.pending_count == TRANSITION_ENTRIES_MAX
+    assert transition.pending_distance == TRANSITION_ENTRIES_MAX + 1
+    assert transition.retention_counters.as_dict() == {
+        "evicted": 1,
+        "peak_entries": TRANSITION_ENTRIES_MAX,
+        "peak_bytes": TRANSITION_ENTRIES_MAX * TRANSITION_ENTRY_BYTES,
+    }
+
+
+def test_maximum_size(
+    mock_config_entry: MockConfigEntry,
+) -> None:
+    """Test that the number of entries is constrained by the configured size."""
+    transition = TransitionRegistry(
+        MockConfigEntry(
+            domain=DOMAIN,
+            data={**mock_config_entry.data, CONF_RETENTION_MAX_SIZE: 1},
+        ),
+    )
+
+    for distance in range(1, 21):
+        transition.process_update(
+            _movement_data(distance=distance),
+            transitioning=True,
+        )
+
+    max_count = 1024 // TRANSITION_ENTRY_BYTES
+
+    assert [item.distance for item in transition.items or []] == list(
+        range(21 - max_count, 21),
+    )
+    assert transition.retention_counters.evicted == 20 - max_count
+
+
+def _movement_data(
+    *,
+    distance: float = 0,
+    speed: float | None = None,
+    mode_of_transit: ModeOfTransit | None = None,
+) -> MovementData:
+    return MovementData(
+        distance=distance,
+        adjustments=0,
+        speed=speed,
+        mode_of_transit=mode_of_transit,
+        change_count=0,
+        ignore_count=0,
+    )
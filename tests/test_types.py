@@ -0,0 +1,96 @@
+"""Test movement types."""
+
+import copy
+from dataclasses import FrozenInstanceError, replace
+import datetime as dt
+import math
+
+import pytest
+
+from custom_components.movement.types import (
+    ABSENT_FALSE,
+    ABSENT_NONE,
+    HistoryEntry,
+    Location,
+    ModeOfTransit,
+    MovementData,
+    TransitionEntry,
+    TypedMovementData,
+)
+
+START = dt.datetime(2025, 5, 20, 10, 51, 32, tzinfo=dt.UTC)
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        Location(latitude=35.054, longitude=137.143),
+        HistoryEntry(
+            timestamp=START.timestamp(),
+            location=Location(latitude=35.054, longitude=137.143),
+            accuracy=5,
+        ),
+        TransitionEntry(distance=0.1, adjustments=0.05),
+        TypedMovementData(
+            distance=1.5,
+            trip_distance=0.5,
+            trip_adjustments=None,
+            trip_start=START,
+        ),
+        MovementData(1.5, 0.5, 12, ModeOfTransit.WALKING, 4, 1),
+    ],
+    ids=lambda value: type(value).__name__,
+)
+def test_slots(value: object) -> None:
+    """Test that values are slotted & can be copied."""
+    assert not hasattr(value, "__dict__")
+    assert copy.deepcopy(value) == value
+    assert copy.copy(value) == value
+
+
+def test_location() -> None:
+    """Test that the cosine of the latitude is derived, but not data."""
+    location = Location(latitude=35.054, longitude=137.143)
+    copied = copy.deepcopy(location)
+
+    assert copied.cos_latitude == math.cos(35.054 * math.pi / 180)
+    assert repr(location) == "Location(latitude=35.054, longitude=137.143)"
+
+    with pytest.raises(FrozenInstanceError):
+        location.latitude = 0  # type: ignore[misc]
+
+
+def test_history_entry_absent_values() -> None:
+    """Test that absent & present `None` values are kept distinct."""
+    entry = HistoryEntry(timestamp=START.timestamp(), location=ABSENT_NONE, accuracy=5)
+    present = replace(entry, ignore=None, debounce=False)  # type: ignore[arg-type]
+
+    assert entry.ignore is ABSENT_NONE
+    assert entry.debounce is ABSENT_FALSE
+    assert entry.as_dict() == {"at": "2025-05-20 10:51:32+00:00", "accuracy": 5}
+    assert present.as_dict() == {
+        "at": "2025-05-20 10:51:32+00:00",
+        "accuracy": 5,
+        "ignore": None,
+        "debounce": None,
+    }
+    assert HistoryEntry.from_dict(present.as_dict()).as_dict() == present.as_dict()
+
+
+@pytest.mark.parametrize(
+    "delta",
+    [
+        dt.timedelta(seconds=45),
+        dt.timedelta(seconds=4, microseconds=999_999),
+        dt.timedelta(minutes=59, seconds=59, microseconds=123_457),
+        dt.timedelta(microseconds=-1),
+    ],
+)
+def test_history_entry_time(delta: dt.timedelta) -> None:
+    """Test that times are kept to the microsecond."""
+    at = START.replace(microsecond=3245)
+    prior = HistoryEntry(timestamp=at.timestamp(), location=ABSENT_NONE, accuracy=5)
+    entry = replace(prior, timestamp=(at + delta).timestamp())
+
+    assert entry.at == at + delta
+    assert entry.seconds_since(prior.timestamp) == delta.total_seconds()